@@ -2,10 +2,10 @@ import asyncio
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse, StreamingResponse
 
-from backend.api.schemas.audio_schemas import ToggleLikeRequest
+from backend.api.schemas.audio_schemas import LoudnessTargetRequest, ToggleLikeRequest
 
 from backend.core.audio.stream import stream_audio
-from backend.core.lib.utils import is_downloaded
+from backend.core.audio.index import DownloadIndex
 
 from backend.core.models.jobs import DownloadJob, EnrichJob
 import backend.globals as G
@@ -24,12 +24,12 @@ async def get_audio_stream(id: str, req: Request, full: bool = False):
     download_job = DownloadJob(id=id, queue_last=True) #add an ensure_fetched field so it fetches if it required a download
 
     queue_manager = req.app.state.queue_manager
-    db: AudioDatabase = req.app.state.db
+    download_index: DownloadIndex = req.app.state.download_index
 
     download_queue = queue_manager.get(G.DOWNLOAD_QUEUE_NAME)
     enrich_queue = queue_manager.get(G.ENRICH_QUEUE_NAME)
 
-    if not await db.is_downloaded(id):
+    if not download_index.has(id):
         if not download_queue.contains(download_job):
             await download_queue.push(download_job)
         
@@ -56,3 +56,32 @@ async def toggle_track_like(body: ToggleLikeRequest, req: Request):
     await db.toggle_like(id)
 
     return JSONResponse(content={"status": "toggled"}, status_code=200)
+
+
+@router.get("/gain/{id}")
+async def get_track_gain(id: str, req: Request):
+    """
+    Playback gain for a track, applied by the player instead of baked into the file.
+
+    Returns:
+        JSONResponse: {"gain", "integrated", "true_peak", "lra", "target"} in dB/LUFS, null for a
+            track that was never measured, which plays as is.
+    """
+    db: AudioDatabase = req.app.state.db
+
+    return JSONResponse(content={"content": await db.get_loudness(id)}, status_code=200)
+
+
+@router.post("/loudness-target")
+async def set_loudness_target(body: LoudnessTargetRequest, req: Request):
+    """
+    Moves every measured track's playback gain to a new loudness target, without touching a file.
+    """
+    if not -70 <= body.target <= 0:
+        raise HTTPException(status_code=400, detail="Loudness target must be between -70 and 0 LUFS")
+
+    db: AudioDatabase = req.app.state.db
+
+    count = await db.retarget_loudness(body.target)
+
+    return JSONResponse(content={"status": "retargeted", "count": count}, status_code=200)
@@ -4,10 +4,11 @@ from fastapi import APIRouter, Query, Request, HTTPException, Response
 from fastapi.responses import JSONResponse
 
 
-from backend.api.schemas.playlist_schemas import CreatePlaylistRequest, DeletePlaylistRequest, DeleteTrackRequest, EditPlaylistRequest, EditTrackRequest, ReorderPlaylistRequest
+from backend.api.schemas.playlist_schemas import CreatePlaylistRequest, DeletePlaylistRequest, DeleteTrackRequest, EditPlaylistRequest, EditTrackRequest, PlaylistTracksRequest, ReorderPlaylistRequest, TrackIdsRequest
 from backend.core.database.audio_database import AudioDatabase
 from backend.core.models.jobs import DownloadJob, EnrichJob
 from backend.core.playlists.manager import PlaylistExtractorManager
+from backend.exceptions import InvalidCursorError
 
 import backend.globals as G
 
@@ -16,6 +17,28 @@ import backend.globals as G
 router = APIRouter(prefix="/playlists")
 
 
+def _page_response(result: dict) -> JSONResponse:
+    """Paginated listing, the next page's cursor in the body and the total row count in a header"""
+    return JSONResponse(
+        content={"content": result["content"], "next_cursor": result["next_cursor"]},
+        headers={"X-Total-Count": str(result["total"])},
+        status_code=200
+    )
+
+
+def _check_bulk(ids: list):
+    if not ids:
+        raise HTTPException(status_code=400, detail="No track ids given")
+    if len(ids) > G.BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {G.BULK_MAX_IDS} track ids per request")
+
+
+def _playlist_id(id: str) -> int:
+    try:
+        return int(id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid playlist id {id}")
+
 
 @router.get("/")
 async def get_playlists(req: Request):
@@ -34,14 +57,29 @@ async def get_playlists(req: Request):
 
 
 @router.get("/content")
-async def get_playlist_content(req: Request, id: Optional[int] = Query(None)):
+async def get_playlist_content(
+    req: Request,
+    id: Optional[int] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=G.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None)
+):
     """
     Fetches track ids for the corresponding playlist
 
+    Paginated when limit or cursor is given, pass the returned next_cursor back for the next page.
+
     Returns:
         JSONResponse: A list of matching track ids from the local SQLite database.
+            Paginated: next_cursor in the body (null on the last page) and the playlist size in X-Total-Count.
     """
     db: AudioDatabase = req.app.state.db
+
+    if limit is not None or cursor is not None:
+        try:
+            return _page_response(await db.get_playlist_page(id, limit or G.PAGE_DEFAULT_LIMIT, cursor))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     content = await db.get_playlist_content(id)
 
     print("ID:", id, "CONTENT:", content)
@@ -50,20 +88,34 @@ async def get_playlist_content(req: Request, id: Optional[int] = Query(None)):
 
 
 @router.get("/downloads")
-async def get_downloads_content(req: Request):
+async def get_downloads_content(
+    req: Request,
+    limit: Optional[int] = Query(None, ge=1, le=G.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None)
+):
     """
     Fetch all currently downloaded track IDs.
 
     This endpoint retrieves the list of downloaded track IDs from the local
     SQLite database, ordered by their download time.
 
+    Paginated when limit or cursor is given, pass the returned next_cursor back for the next page.
+
     Returns:
         JSONResponse: An object containing a list of downloaded track IDs.
+            Paginated: next_cursor in the body (null on the last page) and the library size in X-Total-Count.
     """
     db: AudioDatabase = req.app.state.db
+
+    if limit is not None or cursor is not None:
+        try:
+            return _page_response(await db.get_downloads_page(limit or G.PAGE_DEFAULT_LIMIT, cursor))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     content = await db.get_downloads_content()
 
-    print("DOWNLOADS CONTENT:", content)
+    print("DOWNLOADS CONTENT:", len(content), "tracks")
 
     return JSONResponse(content={"content": content}, status_code=200)
 
@@ -166,6 +218,57 @@ async def reorder_playlist(body: ReorderPlaylistRequest, req: Request) -> Respon
 
 
 
+@router.post("/add-tracks")
+async def add_tracks(body: PlaylistTracksRequest, req: Request) -> Response:
+    """
+    Appends many tracks to a playlist, in one transaction with one update_playlist_tracks event.
+
+    Args:
+        body (PlaylistTracksRequest): Request body containing the playlist id and the track ids, in order.
+        req (Request): FastAPI request object to access app state.
+
+    Returns:
+        JSONResponse: The track ids actually added, ones already in the playlist or not downloaded are skipped.
+
+    Raises:
+        HTTPException: 400 for a bad id list, 404 if the playlist doesn't exist.
+    """
+    _check_bulk(body.track_ids)
+    playlist_id = _playlist_id(body.id)
+
+    db: AudioDatabase = req.app.state.db
+
+    content = await db.add_tracks_to_playlist(playlist_id, body.track_ids)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Playlist {playlist_id} not found")
+
+    return JSONResponse(content={"content": content}, status_code=200)
+
+
+
+@router.post("/remove-tracks")
+async def remove_tracks(body: PlaylistTracksRequest, req: Request) -> Response:
+    """
+    Removes many tracks from a playlist, in one statement with one update_playlist_tracks event.
+
+    Args:
+        body (PlaylistTracksRequest): Request body containing the playlist id and the track ids.
+        req (Request): FastAPI request object to access app state.
+
+    Returns:
+        JSONResponse: The track ids actually removed.
+    """
+    _check_bulk(body.track_ids)
+    playlist_id = _playlist_id(body.id)
+
+    db: AudioDatabase = req.app.state.db
+
+    content = await db.remove_tracks_from_playlist(playlist_id, body.track_ids)
+
+    return JSONResponse(content={"content": content}, status_code=200)
+
+
+
 @router.post("/edit-playlist")
 async def edit_playlist(body: EditPlaylistRequest, req: Request) -> Response:
     """
@@ -226,14 +329,28 @@ async def delete_playlist(body: DeletePlaylistRequest, req: Request) -> Response
 
 
 @router.get("/likes")
-async def get_likes(req: Request):
+async def get_likes(
+    req: Request,
+    limit: Optional[int] = Query(None, ge=1, le=G.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None)
+):
     """
     Fetches track ids from the likes database table.
 
+    Paginated when limit or cursor is given, pass the returned next_cursor back for the next page.
+
     Returns:
         JSONResponse: A list of matching track ids from the local SQLite database.
+            Paginated: next_cursor in the body (null on the last page) and the number of likes in X-Total-Count.
     """
     db: AudioDatabase = req.app.state.db
+
+    if limit is not None or cursor is not None:
+        try:
+            return _page_response(await db.fetch_liked_page(limit or G.PAGE_DEFAULT_LIMIT, cursor))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     content = await db.fetch_liked_tracks()
 
     return JSONResponse(content={"content": content}, status_code=200)
@@ -297,3 +414,48 @@ async def delete_track(body: DeleteTrackRequest, req: Request) -> Response:
     await db.unregister_download(track_id)
 
     return JSONResponse(content={"status": "deleted"}, status_code=200)
+
+
+
+@router.post("/delete-tracks")
+async def delete_tracks(body: TrackIdsRequest, req: Request) -> Response:
+    """
+    Deletes many downloads, in one statement with one unlog_downloads event.
+    Like delete-track, the metadata stays and playlist and like entries cascade away.
+
+    Args:
+        body (TrackIdsRequest): Request body containing the track ids to delete
+        req (Request): FastAPI request object to access app state.
+
+    Returns:
+        JSONResponse: The track ids actually deleted.
+    """
+    _check_bulk(body.ids)
+
+    db: AudioDatabase = req.app.state.db
+
+    deleted = await db.unregister_downloads(body.ids)
+
+    return JSONResponse(content={"content": {"ids": deleted}}, status_code=200)
+
+
+
+@router.post("/like-tracks")
+async def like_tracks(body: TrackIdsRequest, req: Request) -> Response:
+    """
+    Likes many tracks, in one transaction with one like_tracks event. They go on top in the order given.
+
+    Args:
+        body (TrackIdsRequest): Request body containing the track ids to like
+        req (Request): FastAPI request object to access app state.
+
+    Returns:
+        JSONResponse: The track ids actually liked, ones already liked or not downloaded are skipped.
+    """
+    _check_bulk(body.ids)
+
+    db: AudioDatabase = req.app.state.db
+
+    liked = await db.like_tracks(body.ids)
+
+    return JSONResponse(content={"content": {"ids": liked}}, status_code=200)
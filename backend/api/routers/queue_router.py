@@ -3,7 +3,7 @@ import traceback #debugging
 from fastapi import APIRouter, Request, HTTPException, Response
 from fastapi.responses import JSONResponse
 
-from backend.core.lib.utils import is_downloaded
+from backend.core.audio.index import DownloadIndex
 from backend.api.schemas.queue_schemas import *
 from backend.core.models.jobs import DownloadJob
 import backend.globals as G
@@ -28,7 +28,8 @@ async def queue_set_all_tracks(body: QueueSetAllTracksRequest, req: Request) ->
     Raises:
         HTTPException: Returns 500 if any unexpected error occurs.
     """
-    ids = [id for id in body.ids if is_downloaded(id)]
+    download_index: DownloadIndex = req.app.state.download_index
+    ids = [id for id in body.ids if download_index.has(id)]
     queue_manager = req.app.state.queue_manager
 
     play_queue = queue_manager.get(G.PLAY_QUEUE_NAME)
@@ -73,7 +74,7 @@ async def queue_set_first_track(body: QueueSetFirstTrackRequest, req: Request) -
 
     try:
         #queueing logic for replacing first item in queue if available
-        if is_downloaded(id=id):
+        if req.app.state.download_index.has(id):
             await play_queue.set_first(id)
         elif not download_queue.contains(job):
             await download_queue.insert_next(job)
@@ -111,7 +112,7 @@ async def queue_push_track(body: QueuePushTrackRequest, req: Request) -> Respons
 
     try:
         #normal queueing logic
-        if is_downloaded(id=id):
+        if req.app.state.download_index.has(id):
             await play_queue.push(id)
         elif not download_queue.contains(job):
             await download_queue.push(job)
@@ -149,7 +150,7 @@ async def queue_push_front(body: QueuePushTrackRequest, req: Request) -> Respons
 
     try:
         #push to front
-        if is_downloaded(id=id):
+        if req.app.state.download_index.has(id):
             await play_queue.insert_next(id)
         
         elif not download_queue.contains(job):
@@ -7,6 +7,7 @@ from typing import Optional
 from backend.api.schemas.search_schemas import *
 from backend.core.lib.utils import is_downloaded
 from backend.core.models.jobs import DownloadJob
+from backend.exceptions import InvalidCursorError
 import backend.globals as G
 
 from backend.core.database.audio_database import AudioDatabase
@@ -16,18 +17,42 @@ router = APIRouter(prefix="/search")
 
 
 @router.get("/")
-async def search(req: Request, q: Optional[str] = Query(None)):
+async def search(
+    req: Request,
+    q: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=G.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None)
+):
     """
     Search for tracks in the local database by title or artist.
 
+    Results are the best SEARCH_CANDIDATE_POOL matches by text relevance, reordered by preference
+    weights and download state. A broader query than that only ever reaches those.
+
     Args:
         q (str, optional): The search query string. Matches against lowercase title or artist.
+        limit (int, optional): Paginates the results, pass the returned next_cursor back for the next page.
+        cursor (str, optional): next_cursor of the previous page, q is ignored when given.
 
     Returns:
         JSONResponse: A list of matching tracks from the local SQLite database.
+            Paginated: next_cursor in the body (null on the last page) and the number of matches in X-Total-Count.
     """
     #local db search
     db: AudioDatabase = req.app.state.db
+
+    if limit is not None or cursor is not None:
+        try:
+            result = await db.search_page(q, limit or G.PAGE_DEFAULT_LIMIT, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return JSONResponse(
+            content={"content": result["content"], "next_cursor": result["next_cursor"]},
+            headers={"X-Total-Count": str(result["total"])},
+            status_code=200
+        )
+
     content = await db.search(q)
 
     return JSONResponse(content={"content": content}, status_code=200)
@@ -63,7 +88,7 @@ async def deep_search(req: Request, q: Optional[str] = Query(None)):
         print("ATTEMPTING LOG TRACK:", track)
         await db.register_track(track)
 
-    await db.rebuild_search_index()
+    await db.flush_search_refresh() #results should be searchable locally as soon as they're returned
 
     content = [track.to_json() for track in results]
     return JSONResponse(content={"content": content}, status_code=200)
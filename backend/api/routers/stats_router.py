@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from backend.core.database.audio_database import AudioDatabase
+
+router = APIRouter(prefix="/stats")
+
+
+@router.get("/search")
+async def search_stats(req: Request):
+    """
+    Search index metrics.
+
+    Returns:
+        JSONResponse: Refresh counters, requested vs coalesced vs actually executed refreshes,
+            search cache hit/miss counters for sizing it, the typeahead index size and typo corrections made.
+    """
+    db: AudioDatabase = req.app.state.db
+    content = {
+        "refresh": db.search_refresh_stats(),
+        "cache": db.search_cache_stats(),
+        "typeahead": db.typeahead_stats(),
+        "fuzzy": db.fuzzy_stats(),
+    }
+
+    return JSONResponse(content={"content": content}, status_code=200)
+
+
+@router.get("/downloads")
+async def download_stats(req: Request):
+    """
+    Download metrics.
+
+    Returns:
+        JSONResponse: Indexed downloads, their total size in bytes and count per audio format, bytes
+            written and time until playable for recent downloads, and post-processing pool load with
+            average queue wait and run time.
+    """
+    content = {
+        "index": req.app.state.download_index.stats(),
+        "downloads": req.app.state.yt.download_stats(),
+        "postprocess": req.app.state.post_scheduler.stats(),
+    }
+
+    return JSONResponse(content={"content": content}, status_code=200)
+
+
+@router.get("/maintenance")
+async def maintenance_stats(req: Request):
+    """
+    Database maintenance metrics.
+
+    Returns:
+        JSONResponse: Current file and WAL size and free page fraction, the last maintenance run with
+            the time each step took and the metrics before and after it, and the worker's schedule.
+    """
+    db: AudioDatabase = req.app.state.db
+    content = {
+        "database": await db.database_metrics(),
+        "maintenance": db.maintenance_stats(),
+        "worker": req.app.state.maintenance_worker.stats(),
+    }
+
+    return JSONResponse(content={"content": content}, status_code=200)
+
+
+@router.get("/db")
+async def db_stats(req: Request):
+    """
+    Database executor metrics.
+
+    Returns:
+        JSONResponse: Read executor and writer queue state, and per operation counts with queue wait
+            and execution time percentiles in ms, split into reads and writes, tagged by the database
+            method that ran them and slowest p95 first, and query resolution cache hits and misses.
+    """
+    db: AudioDatabase = req.app.state.db
+
+    content = {
+        **db.db_stats(),
+        "resolve_cache": db.resolve_cache_stats(),
+    }
+
+    return JSONResponse(content={"content": content}, status_code=200)
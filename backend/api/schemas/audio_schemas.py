@@ -6,3 +6,6 @@ class AudioRequest(BaseModel):
 
 class ToggleLikeRequest(BaseModel):
     id: str
+
+class LoudnessTargetRequest(BaseModel):
+    target: float
@@ -14,6 +14,15 @@ class ReorderPlaylistRequest(BaseModel):
     to_index: int
 
 
+class PlaylistTracksRequest(BaseModel):
+    id: str
+    track_ids: List[str]
+
+
+class TrackIdsRequest(BaseModel):
+    ids: List[str]
+
+
 class PlaylistSelection(BaseModel):
     id: str             #technically should be an int, but sqlite will handle conversion.
     checked: bool
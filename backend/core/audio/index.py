@@ -0,0 +1,100 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from backend.core.lib.utils import get_audio_dir, iter_download_files
+import backend.globals as G
+
+
+class DownloadEntry(NamedTuple):
+    path: Path
+    format: str
+    stat: os.stat_result #handed to FileResponse so serving a file doesn't stat it again
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size
+
+
+class DownloadIndex:
+    def __init__(self, base_dir: Path = G.DOWNLOAD_DIR, extensions: List[str] = G.AUDIO_EXTENSIONS):
+        """
+        In-memory map from downloaded track id to its audio file, so the queue and stream endpoints
+        answer "is it downloaded, and where" without touching the filesystem.
+
+        load() builds it from one scan of the download folder and the downloads table, after that it's
+        kept current by register_download_index_handlers from the database's download events. A track
+        is in here only if it's in the downloads table and has a file, which is what get_audio_path used
+        to check by statting every extension in turn.
+
+        Args:
+            base_dir: Download folder.
+            extensions: Audio extensions in order of preference, the first one found wins like get_audio_path.
+        """
+        self.base_dir = base_dir
+        self._rank = {ext: i for i, ext in enumerate(extensions)}
+        self._entries: Dict[str, DownloadEntry] = {}
+
+
+    def load(self, ids: Iterable[str]) -> int:
+        """Replaces the index with the files found for these ids. Returns the number indexed."""
+        ids = set(ids)
+        entries: Dict[str, DownloadEntry] = {}
+
+        for entry in iter_download_files(self.base_dir):
+            stem, _, ext = entry.name.rpartition(".")
+            if stem not in ids or ext not in self._rank:
+                continue
+
+            current = entries.get(stem)
+            if current is None or self._rank[ext] < self._rank[current.format]:
+                entries[stem] = DownloadEntry(Path(entry.path), ext, entry.stat())
+
+        self._entries = entries
+        print(f"[DownloadIndex] Indexed {len(entries)} of {len(ids)} downloads")
+        return len(entries)
+
+
+    def add(self, id: str) -> Optional[DownloadEntry]:
+        """Looks up the file for a new or moved download, the only time the index stats anything after load()"""
+        shard = get_audio_dir(id, self.base_dir)
+        for ext in self._rank:
+            for path in (shard / f"{id}.{ext}", self.base_dir / f"{id}.{ext}"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entry = DownloadEntry(path, ext, stat)
+                self._entries[id] = entry
+                return entry
+
+        print(f"[DownloadIndex] No audio file found for download {id}")
+        self._entries.pop(id, None)
+        return None
+
+
+    def remove(self, id: str):
+        self._entries.pop(id, None)
+
+
+    def get(self, id: str) -> Optional[DownloadEntry]:
+        return self._entries.get(id)
+
+
+    def has(self, id: str) -> bool:
+        return id in self._entries
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def stats(self) -> dict:
+        formats: Dict[str, int] = {}
+        for entry in self._entries.values():
+            formats[entry.format] = formats.get(entry.format, 0) + 1
+        return {
+            "entries": len(self._entries),
+            "bytes": sum(entry.size for entry in self._entries.values()),
+            "formats": formats,
+        }
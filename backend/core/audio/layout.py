@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+import traceback
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from backend.core.audio.index import DownloadIndex
+from backend.core.lib.utils import get_audio_dir
+import backend.globals as G
+
+
+def _flat_files(base_dir: Path, limit: int) -> List[os.DirEntry]:
+    """Up to limit files still sitting directly in the download folder"""
+    files = []
+    if not base_dir.exists():
+        return files
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if entry.is_file():
+                files.append(entry)
+                if len(files) >= limit:
+                    break
+    return files
+
+
+def _link_batch(base_dir: Path, files: List[os.DirEntry]) -> Tuple[List[Tuple[str, Path]], List[Path]]:
+    """
+    Gives each file its sharded name. A hard link keeps the flat name working until unlinked, so a
+    request that looked up the old path a moment ago can still open it. Filesystems without hard links
+    get a plain rename instead.
+
+    Returns:
+        tuple: (id, old path) for every file now in its shard, and the old paths still to unlink.
+    """
+    moved, to_unlink = [], []
+    for entry in files:
+        old = Path(entry.path)
+        stem = old.name.split(".", 1)[0]
+        new = get_audio_dir(stem, base_dir) / old.name
+        new.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            os.link(old, new)
+            to_unlink.append(old)
+        except FileExistsError:
+            to_unlink.append(old) #linked by a run that stopped before unlinking
+        except OSError:
+            os.replace(old, new)
+        moved.append((stem, old))
+    return moved, to_unlink
+
+
+def _unlink_all(paths: List[Path]):
+    for path in paths:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+async def migrate_flat_downloads(
+    base_dir: Path = G.DOWNLOAD_DIR,
+    index: Optional[DownloadIndex] = None,
+    batch_size: int = G.DOWNLOAD_MIGRATION_BATCH,
+    grace: float = G.DOWNLOAD_MIGRATION_GRACE,
+) -> int:
+    """
+    Online migration from the flat download folder to the sharded one, see get_audio_dir.
+
+    Moves batch_size files per step on a worker thread, so the server keeps serving. get_audio_path
+    and DownloadIndex.add look in the shard first and the flat folder second, so a track resolves the
+    whole time. Each batch is linked into its shard, the index is repointed, and the flat names are
+    unlinked grace seconds later. Safe to stop at any point, the next run picks up what's left.
+
+    Args:
+        base_dir: Download folder.
+        index: Download index to repoint as files move, None when the server isn't running.
+        batch_size: Files per step.
+        grace: Seconds a moved file keeps its flat name.
+
+    Returns:
+        int: Files moved.
+    """
+    start = time.perf_counter()
+    total = 0
+
+    while files := await asyncio.to_thread(_flat_files, base_dir, batch_size):
+        moved, to_unlink = await asyncio.to_thread(_link_batch, base_dir, files)
+
+        if index is not None:
+            for id, old in moved:
+                entry = index.get(id)
+                if entry is not None and entry.path == old:
+                    index.add(id)
+
+        if to_unlink:
+            await asyncio.sleep(grace)
+            await asyncio.to_thread(_unlink_all, to_unlink)
+
+        total += len(moved)
+        print(f"[DownloadLayout] Moved {total} files into shard folders")
+
+    if total:
+        print(f"[DownloadLayout] Download folder sharded, {total} files in {time.perf_counter() - start:.1f}s")
+    return total
+
+
+async def run_download_migration(base_dir: Path, index: DownloadIndex):
+    """Startup task wrapper, a failure leaves the rest flat and still served until the next startup"""
+    try:
+        await migrate_flat_downloads(base_dir, index=index)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[ERROR] Download folder migration failed ({e})\n{traceback.format_exc()}")
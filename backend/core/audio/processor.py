@@ -3,9 +3,34 @@ import re
 import json
 import os
 import asyncio
+import shutil
 import subprocess
+try:
+    import fcntl
+except ImportError: #windows
+    fcntl = None
 from pathlib import Path
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Tuple
+
+import backend.globals as G
+
+
+SILENCE_FILTER = (
+    "silenceremove=start_periods=1:start_duration=0.02:start_threshold=-50dB:detection=peak,"
+    "areverse,"
+    "silenceremove=start_periods=1:start_duration=0.02:start_threshold=-50dB:detection=peak,"
+    "areverse"
+)
+
+#passes audio through untouched and prints integrated loudness, loudness range and true peak when done
+MEASURE_FILTER = "ebur128=peak=true"
+
+
+class ProcessedAudio(NamedTuple):
+    path: Path
+    duration: float
+    bytes_written: int #every file the pipeline wrote along the way, intermediates included
+    loudness: Optional[dict] = None #{"integrated", "true_peak", "lra"} of the result when loudness is measured instead of applied
 
 
 class AudioProcessor:
@@ -13,14 +38,53 @@ class AudioProcessor:
         self,
         ffmpeg_bin: Optional[str] = None,
         ffprobe_bin: Optional[str] = None,
+        pipeline: Optional[str] = None,
+        loudness: Optional[str] = None,
+        threads: Optional[int] = None,
+        niceness: int = 0,
+        ionice: bool = False,
     ):
         #handle binaries from tools/ to use yt-dlp
         self.ffmpeg_bin = ffmpeg_bin or os.getenv("FFMPEG_BIN_PATH")
         self.ffprobe_bin = ffprobe_bin or os.getenv("FFPROBE_BIN_PATH")
 
+        #"stream", "fused" or "steps", see process and process_pipe
+        self.pipeline = pipeline or G.AUDIO_PIPELINE
+        if self.pipeline not in ("stream", "fused", "steps"):
+            raise ValueError(f"Unknown audio pipeline: {self.pipeline}")
+
+        #process_pipe hands raw os.pipe fds to both processes, which only works on POSIX
+        if self.pipeline == "stream" and os.name == "nt":
+            print(f"[WARN] {self.__class__.__name__} \"stream\" pipeline isn't supported on Windows, using \"fused\"")
+            self.pipeline = "fused"
+
+        #"normalize" re-encodes with loudnorm, "gain" only measures and leaves the gain to playback
+        self.loudness = loudness or G.AUDIO_LOUDNESS
+        if self.loudness not in ("normalize", "gain"):
+            raise ValueError(f"Unknown loudness mode: {self.loudness}")
+
+        #ffmpeg decode and filter threads per run, None leaves it to ffmpeg, which takes every core
+        self.threads = threads
+
+        #background processors run their commands under nice/ionice where those exist, see PostProcessScheduler
+        self._priority = []
+        if ionice and shutil.which("ionice"):
+            self._priority += ["ionice", "-c", "2", "-n", "7"] #lowest best-effort, idle class could starve behind a busy disk
+        if niceness and shutil.which("nice"):
+            self._priority += ["nice", "-n", str(niceness)]
+
+
+    def _prepare(self, cmd: List[str]) -> List[str]:
+        """Adds the thread limits to an ffmpeg command and the priority prefix to any command"""
+        if self.threads and cmd[0] == self.ffmpeg_bin:
+            #-threads before the input sets decoder threads, libopus and libmp3lame encode on one thread anyway
+            cmd = [cmd[0], "-threads", str(self.threads), "-filter_threads", str(self.threads), *cmd[1:]]
+        return [*self._priority, *cmd]
+
 
     async def _run_subprocess(self, cmd: List[str], timeout: int = 60):
         """Copied straight from yt-dlp client _run_subprocess code"""
+        cmd = self._prepare(cmd)
         proc = None
         #NOTE: using --reload on fastapi server boot cucks asyncio create_subprocess
         try:
@@ -98,6 +162,58 @@ class AudioProcessor:
         temp.rename(original)
 
 
+    def _parse_loudnorm_stats(self, stderr: str) -> dict:
+        """The loudnorm=print_format=json measurements, ffmpeg prints them at the end of stderr"""
+        #https://stackoverflow.com/questions/71791529/ffmpeg-loudnorm-reading-json-data
+        #bruh you have to extract from stderr
+        match = re.search(r"\{[\s\S]*\}", stderr)
+        if not match: 
+            raise RuntimeError("Loudnorm analysis failed")
+        return json.loads(match.group())
+
+
+    def _loudnorm_filter(self, stats: dict, target_i=-16) -> str:
+        """Second pass loudnorm filter from first pass measurements"""
+        return (
+            f"loudnorm=I={target_i}:TP=-1.5:LRA=11:"
+            f"measured_I={stats['input_i']}:"
+            f"measured_TP={stats['input_tp']}:"
+            f"measured_LRA={stats['input_lra']}:"
+            f"measured_thresh={stats['input_thresh']}:"
+            f"offset={stats['target_offset']}"
+        )
+
+
+    def _parse_ebur128(self, stderr: str) -> Optional[dict]:
+        """
+        The ebur128 filter's summary, ffmpeg prints it at the end of stderr. None if it's missing or the
+        audio was silent, which measures as -inf.
+        """
+        summary = stderr[stderr.rfind("Summary:"):] if "Summary:" in stderr else ""
+        integrated = re.search(r"I:\s+(-?[\d.]+|-inf) LUFS", summary)
+        lra = re.search(r"LRA:\s+([\d.]+) LU\b", summary)
+        peak = re.search(r"Peak:\s+(-?[\d.]+|-inf) dBFS", summary)
+        if not integrated or not peak or "inf" in integrated.group(1) + peak.group(1):
+            return None
+        return {
+            "integrated": float(integrated.group(1)),
+            "true_peak": float(peak.group(1)),
+            "lra": float(lra.group(1)) if lra else None,
+        }
+
+
+    def _parse_time(self, stderr: str) -> Optional[float]:
+        """
+        Seconds written according to ffmpeg's last progress line ("time=00:03:21.48"), which for a
+        finished encode is the output duration. None if there's no progress line.
+        """
+        matches = re.findall(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)", stderr)
+        if not matches:
+            return None
+        h, m, s = matches[-1]
+        return int(h) * 3600 + int(m) * 60 + float(s)
+
+
     async def get_duration(self, file_path: Path) -> float:
         """
         Get the duration of an audio file in seconds using ffprobe.
@@ -141,13 +257,7 @@ class AudioProcessor:
         cmd = [
             self.ffmpeg_bin, "-y", 
             "-i", str(input_path), 
-            "-af", 
-            (
-                "silenceremove=start_periods=1:start_duration=0.02:start_threshold=-50dB:detection=peak,"
-                "areverse,"
-                "silenceremove=start_periods=1:start_duration=0.02:start_threshold=-50dB:detection=peak,"
-                "areverse"
-            ),
+            "-af", SILENCE_FILTER,
             str(temp_path)
         ]
         await self._run_subprocess(cmd)
@@ -183,24 +293,10 @@ class AudioProcessor:
             "-f", "null", "-"
         ]
         _, _, stderr = await self._run_subprocess(cmd_analyze)
-        
-        #https://stackoverflow.com/questions/71791529/ffmpeg-loudnorm-reading-json-data
-        #bruh you have to extract from stderr
-        match = re.search(r"\{[\s\S]*\}", stderr)
-        if not match: 
-            raise RuntimeError("Loudnorm analysis failed")
-        
-        stats = json.loads(match.group())
+        stats = self._parse_loudnorm_stats(stderr)
 
         #build filter for second pass using extracted stats
-        loudnorm_filter = (
-            f"loudnorm=I=-16:TP=-1.5:LRA=11:"
-            f"measured_I={stats['input_i']}:"
-            f"measured_TP={stats['input_tp']}:"
-            f"measured_LRA={stats['input_lra']}:"
-            f"measured_thresh={stats['input_thresh']}:"
-            f"offset={stats['target_offset']}"
-        )
+        loudnorm_filter = self._loudnorm_filter(stats)
         cmd_apply = [
             self.ffmpeg_bin, "-y", 
             "-i", str(input_path), 
@@ -251,3 +347,257 @@ class AudioProcessor:
         await self._run_subprocess(cmd)
         input_path.unlink()
         return target_path
+
+
+    async def measure_loudness(self, input_path: Path) -> Optional[dict]:
+        """
+        Measures a file's loudness without writing anything.
+
+        Returns:
+            dict | None: {"integrated" LUFS, "true_peak" dBTP, "lra" LU}, None for a silent file.
+        """
+        cmd = [
+            self.ffmpeg_bin, "-hide_banner",
+            "-i", str(input_path),
+            "-af", MEASURE_FILTER,
+            "-f", "null", "-"
+        ]
+        code, _, stderr = await self._run_subprocess(cmd)
+        if code != 0:
+            raise RuntimeError(f"Loudness measurement of {input_path.name} failed: {stderr[-500:]}")
+        return self._parse_ebur128(stderr)
+
+
+    async def process(self, input_path: Path, format="webm", bitrate="192k") -> ProcessedAudio:
+        """
+        Trims silence, loudness normalizes and compresses a downloaded file, with the pipeline this
+        processor was created with. A file can't be streamed, the "stream" pipeline runs the fused one here.
+
+        Args:
+            input_path (Path): Downloaded audio file, any format ffmpeg decodes, replaced by the result.
+            format (str): Target format, see compress.
+            bitrate (str): Target bitrate, see compress.
+
+        Returns:
+            ProcessedAudio: Final file, its duration in seconds, the bytes written producing it and, in
+                "gain" loudness mode, its measured loudness.
+        """
+        if self.pipeline == "steps":
+            return await self.process_steps(input_path, format, bitrate)
+        return await self.process_fused(input_path, format, bitrate)
+
+
+    async def process_steps(self, input_path: Path, format="webm", bitrate="192k") -> ProcessedAudio:
+        """
+        The original pipeline, one ffmpeg run per step over intermediate files: trim_silence,
+        apply_loudnorm, compress, then ffprobe for the duration. The steps rewrite their input in its own
+        format, so a compressed download is decoded to WAV first rather than re-encoded lossy twice.
+        In "gain" loudness mode apply_loudnorm is replaced by measure_loudness.
+        """
+        written = 0
+        if input_path.suffix != ".wav":
+            wav_path = input_path.with_suffix(".wav")
+            code, _, stderr = await self._run_subprocess([self.ffmpeg_bin, "-y", "-i", str(input_path), str(wav_path)])
+            if code != 0:
+                raise RuntimeError(f"Decoding {input_path.name} failed: {stderr[-500:]}")
+            input_path.unlink()
+            input_path = wav_path
+            written += wav_path.stat().st_size
+
+        await self.trim_silence(input_path)
+        written += input_path.stat().st_size
+        loudness = None
+        if self.loudness == "gain":
+            loudness = await self.measure_loudness(input_path)
+        else:
+            await self.apply_loudnorm(input_path)
+            written += input_path.stat().st_size
+
+        done_path = await self.compress(input_path, format, bitrate)
+        written += done_path.stat().st_size
+        return ProcessedAudio(done_path, await self.get_duration(done_path), written, loudness)
+
+
+    async def process_fused(self, input_path: Path, format="webm", bitrate="192k", target_i=-16) -> ProcessedAudio:
+        """
+        Same result as process_steps in two ffmpeg runs and no intermediate files.
+
+        The analysis run measures loudness of the trimmed audio without writing anything. The encode run
+        decodes the input once more and trims, applies the measured loudnorm and encodes to the target
+        in a single filter graph. The duration comes from the encode's own progress output, ffprobe is
+        only asked if that's missing.
+
+        In "gain" loudness mode there's nothing to analyze ahead, the one encode run measures the trimmed
+        audio on its way to the encoder.
+        """
+        target_path = input_path.with_suffix(f".{format}")
+        temp_path = self._get_temp_path(target_path)
+        codec = "libopus" if format in ("opus", "webm") else "libmp3lame"
+
+        if self.loudness == "gain":
+            audio_filter = f"{SILENCE_FILTER},{MEASURE_FILTER}"
+        else:
+            audio_filter = await self._analyze_loudnorm(input_path, target_i)
+
+        cmd_encode = [
+            self.ffmpeg_bin, "-y", "-hide_banner",
+            "-i", str(input_path),
+            "-af", audio_filter,
+            "-ar", "48000", #loudnorm resamples to 192kHz internally
+            "-c:a", codec,
+            "-b:a", bitrate,
+            str(temp_path)
+        ]
+        try:
+            code, _, stderr = await self._run_subprocess(cmd_encode)
+            if code != 0:
+                raise RuntimeError(f"Encoding {input_path.name} failed: {stderr[-500:]}")
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        written = temp_path.stat().st_size
+        self._replace_file(target_path, temp_path)
+        if input_path != target_path:
+            input_path.unlink()
+
+        duration = self._parse_time(stderr)
+        if duration is None:
+            duration = await self.get_duration(target_path)
+        loudness = self._parse_ebur128(stderr) if self.loudness == "gain" else None
+        return ProcessedAudio(target_path, duration, written, loudness)
+
+
+    async def _analyze_loudnorm(self, input_path: Path, target_i=-16) -> str:
+        """Analysis run of process_fused, returns the trim and measured loudnorm filter for the encode run"""
+        cmd_analyze = [
+            self.ffmpeg_bin, "-hide_banner",
+            "-i", str(input_path),
+            "-af", f"{SILENCE_FILTER},loudnorm=I={target_i}:TP=-1.5:LRA=11:print_format=json",
+            "-f", "null", "-"
+        ]
+        code, _, stderr = await self._run_subprocess(cmd_analyze)
+        if code != 0:
+            raise RuntimeError(f"Loudness analysis of {input_path.name} failed: {stderr[-500:]}")
+        stats = self._parse_loudnorm_stats(stderr)
+        return f"{SILENCE_FILTER},{self._loudnorm_filter(stats, target_i)}"
+
+
+    def _set_pipe_size(self, fd: int):
+        """Sizes the kernel pipe buffer, the only buffer between the two processes, where the OS allows it"""
+        if fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
+            try:
+                fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, G.AUDIO_PIPE_BUFFER_BYTES)
+            except OSError:
+                pass #over /proc/sys/fs/pipe-max-size, the default 64KB works too
+
+
+    async def _drain(self, proc: asyncio.subprocess.Process) -> str:
+        """Reads a process's stderr to the end and waits for it to exit, so a full stderr pipe can't stall it"""
+        stderr = await proc.stderr.read()
+        await proc.wait()
+        return stderr.decode(errors="replace")
+
+
+    async def process_pipe(
+        self,
+        source_cmd: List[str],
+        target_path: Path,
+        format="webm",
+        bitrate="192k",
+        target_i=-16,
+        timeout: int = 60,
+    ) -> Tuple[ProcessedAudio, str]:
+        """
+        Runs a command that writes audio to stdout, e.g. yt-dlp -o -, and encodes it as it arrives.
+        The source's stdout is connected to ffmpeg's stdin through an OS pipe, so the download is never
+        written to disk and backpressure from a slow encode pauses the source instead of buffering.
+
+        Nothing can be analyzed ahead of the encode, so loudnorm runs in its one-pass (dynamic) mode, or
+        in "gain" loudness mode the audio is only measured on its way through.
+        ffmpeg writes a temp file that replaces target_path only once both processes exited cleanly.
+        A failure, timeout or cancellation kills both processes and removes the temp file.
+
+        Args:
+            source_cmd (List[str]): Command writing the source audio to stdout.
+            target_path (Path): Final file.
+            format (str): Target format, see compress.
+            bitrate (str): Target bitrate, see compress.
+            timeout (int): Seconds allowed for the source and the encode together.
+
+        Returns:
+            tuple[ProcessedAudio, str]: The final file, and the source's stderr, which is where yt-dlp
+                prints when its output is stdout.
+
+        Raises:
+            RuntimeError: If either process fails or the timeout is exceeded.
+        """
+        temp_path = self._get_temp_path(target_path)
+        temp_path.parent.mkdir(parents=True, exist_ok=True)
+        codec = "libopus" if format in ("opus", "webm") else "libmp3lame"
+        loudness_filter = MEASURE_FILTER if self.loudness == "gain" else f"loudnorm=I={target_i}:TP=-1.5:LRA=11"
+
+        cmd_encode = [
+            self.ffmpeg_bin, "-y", "-hide_banner",
+            "-i", "pipe:0",
+            "-af", f"{SILENCE_FILTER},{loudness_filter}",
+            "-ar", "48000", #loudnorm resamples to 192kHz internally
+            "-c:a", codec,
+            "-b:a", bitrate,
+            str(temp_path)
+        ]
+
+        source = encoder = None
+        try:
+            read_fd, write_fd = os.pipe()
+            try:
+                self._set_pipe_size(write_fd)
+                source = await asyncio.create_subprocess_exec(
+                    *source_cmd,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=write_fd,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                encoder = await asyncio.create_subprocess_exec(
+                    *self._prepare(cmd_encode),
+                    stdin=read_fd,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            finally:
+                #the children have their own copies, ffmpeg only sees EOF once every write end is closed
+                os.close(read_fd)
+                os.close(write_fd)
+
+            source_err, encode_err = await asyncio.wait_for(
+                asyncio.gather(self._drain(source), self._drain(encoder)),
+                timeout=timeout
+            )
+            #a source that died halfway still gives ffmpeg a clean EOF, so both exit codes matter
+            if source.returncode != 0:
+                raise RuntimeError(f"Source exited with code {source.returncode}: {source_err.strip()[-500:]}")
+            if encoder.returncode != 0:
+                raise RuntimeError(f"Encoding {target_path.name} failed: {encode_err[-500:]}")
+
+        except BaseException as e:
+            for proc in (source, encoder):
+                if proc is not None and proc.returncode is None:
+                    try:
+                        proc.kill()
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait() #clean up zombie process
+            temp_path.unlink(missing_ok=True)
+
+            if isinstance(e, asyncio.TimeoutError):
+                raise RuntimeError(f"Streaming {target_path.name} timed out after {timeout} seconds.") from e
+            raise
+
+        written = temp_path.stat().st_size
+        os.replace(temp_path, target_path)
+
+        duration = self._parse_time(encode_err)
+        if duration is None:
+            duration = await self.get_duration(target_path)
+        loudness = self._parse_ebur128(encode_err) if self.loudness == "gain" else None
+        return ProcessedAudio(target_path, duration, written, loudness), source_err
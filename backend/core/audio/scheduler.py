@@ -0,0 +1,116 @@
+import asyncio
+import time
+import traceback
+from pathlib import Path
+from typing import Optional, Set
+
+from backend.core.audio.processor import AudioProcessor, ProcessedAudio
+import backend.globals as G
+
+
+class PostProcessScheduler:
+    def __init__(
+        self,
+        processor: AudioProcessor,
+        background_processor: Optional[AudioProcessor] = None,
+        workers: int = G.POSTPROCESS_WORKERS,
+        max_queued: int = G.POSTPROCESS_QUEUE,
+    ):
+        """
+        Runs AudioProcessor.process for downloaded files, off the download path.
+
+        Jobs wait in a bounded queue and run once one of workers slots is free, a semaphore sized to the
+        cores by default, with the processor's ffmpeg thread limit keeping each run on its share of them.
+        A download only waits here for its own file, so the next download runs while this one encodes.
+        A full queue makes submit wait, which keeps downloads from piling up raw files faster than
+        they're processed.
+
+        Background jobs, downloads nobody is waiting to play, go to background_processor, usually one
+        running under nice/ionice.
+
+        Args:
+            processor: Processor for foreground jobs.
+            background_processor: Processor for background jobs, processor if None.
+            workers: Post-processing jobs running at once.
+            max_queued: Jobs waiting for a slot before submit blocks.
+        """
+        self.processor = processor
+        self.background_processor = background_processor or processor
+        self.workers = workers
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._slots = asyncio.Semaphore(workers)
+        self._running: Set[asyncio.Task] = set()
+
+        #metrics
+        self._completed = 0
+        self._failed = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+
+    async def submit(self, input_path: Path, format="webm", bitrate="192k", background: bool = False) -> ProcessedAudio:
+        """Queues a file for AudioProcessor.process and waits for the result, raises what processing raised"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((input_path, format, bitrate, background, future, time.perf_counter()))
+        return await future
+
+
+    async def run(self):
+        try:
+            while True:
+                job = await self._queue.get()
+                await self._slots.acquire()
+
+                task = asyncio.create_task(self._run_job(*job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+        except asyncio.CancelledError:
+            for task in self._running:
+                task.cancel()
+            raise
+
+        except Exception as e:
+            print(f"[CRITICAL] {self.__class__.__name__} crashed: {e}")
+            print(traceback.format_exc())
+
+
+    async def _run_job(self, input_path: Path, format: str, bitrate: str, background: bool, future: asyncio.Future, queued_at: float):
+        try:
+            if future.cancelled(): #the download that submitted it is gone
+                return
+
+            start = time.perf_counter()
+            self._wait_seconds += start - queued_at
+
+            processor = self.background_processor if background else self.processor
+            try:
+                result = await processor.process(input_path, format, bitrate)
+            except Exception as e:
+                self._failed += 1
+                if not future.done():
+                    future.set_exception(e)
+                return
+            finally:
+                self._run_seconds += time.perf_counter() - start
+
+            self._completed += 1
+            if not future.done():
+                future.set_result(result)
+
+        finally:
+            self._slots.release()
+
+
+    def stats(self) -> dict:
+        done = self._completed + self._failed
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": self._queue.qsize(),
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_ms": self._wait_seconds / done * 1000 if done else 0.0,
+            "avg_run_ms": self._run_seconds / done * 1000 if done else 0.0,
+        }
@@ -3,6 +3,7 @@ from fastapi import Request, HTTPException
 from fastapi.responses import StreamingResponse, FileResponse
 from typing import Union
 
+from backend.core.audio.index import DownloadIndex
 from backend.core.lib.utils import is_downloaded, get_audio_path, get_audio_size
 from backend.core.models.track import Track
 import backend.globals as G
@@ -15,16 +16,17 @@ def stream_audio(req: Request, id: str) -> FileResponse:
     if not id:
         raise HTTPException(status_code=404, detail="No track id provided.")
     
-    if not is_downloaded(id=id):
+    download_index: DownloadIndex = req.app.state.download_index
+    entry = download_index.get(id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Track not downloaded.")
 
-    file_path = get_audio_path(id=id)
-
     #according to gemini, the anyio call in fileresponse is actually faster than the one in streamingresponse
     #https://github.com/Kludex/starlette/blob/main/starlette/responses.py#L293
     #no need to reinvent the wheel anyway, fileresponse already handles all the range requests and shit.
     return FileResponse(
-        path=file_path,
+        path=entry.path,
+        stat_result=entry.stat, #indexed when it was downloaded, saves a stat per range request
         content_disposition_type="inline"
     )
 
@@ -3,11 +3,21 @@ from contextlib import contextmanager
 from pathlib import Path
 import sqlite3
 import math
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 
 from backend.core.events.event_bus import EventBus
 from backend.core.models.event import Event
 
+from backend.core.database.pool import ConnectionPool
+from backend.core.database.writer import SingleWriter
+from backend.core.database.executor import DBExecutor, OpTimings, op_tag
+from backend.core.database import migrations
+from backend.core.search.scheduler import RefreshScheduler
+from backend.core.search.cache import SearchCache
+from backend.core.search.typeahead import TypeaheadIndex
+from backend.core.search.fuzzy import FuzzyIndex
+
 from backend.core.database.mixins.seed import SeedMixin
 from backend.core.database.mixins.getset import GetsetMixin
 from backend.core.database.mixins.likes import LikesMixin
@@ -15,6 +25,13 @@ from backend.core.database.mixins.playlists import PlaylistsMixin
 from backend.core.database.mixins.register import RegisterMixin
 from backend.core.database.mixins.search import SearchMixin
 from backend.core.database.mixins.enrich import EnrichMixin
+from backend.core.database.mixins.positions import PositionsMixin
+from backend.core.database.mixins.artists import ArtistsMixin
+from backend.core.database.mixins.maintenance import MaintenanceMixin
+from backend.core.database.mixins.resolve import ResolveMixin
+from backend.core.database.mixins.loudness import LoudnessMixin
+
+import backend.globals as G
 
 
 
@@ -25,20 +42,73 @@ class AudioDatabase(
     PlaylistsMixin,
     RegisterMixin,
     SearchMixin,
-    EnrichMixin
+    EnrichMixin,
+    PositionsMixin,
+    ArtistsMixin,
+    MaintenanceMixin,
+    ResolveMixin,
+    LoudnessMixin
 ):
     def __init__(
         self, 
         name: str,
         filepath: Path,
         event_bus: Optional[EventBus] = None,
+        pool_size: int = 4,
+        executor_workers: Optional[int] = None,
+        write_batch_size: int = 64,
+        search_refresh_debounce: float = G.SEARCH_REFRESH_DEBOUNCE,
+        search_cache_entries: int = G.SEARCH_CACHE_MAX_ENTRIES,
+        search_cache_bytes: int = G.SEARCH_CACHE_MAX_BYTES,
+        typeahead: bool = G.SEARCH_TYPEAHEAD,
+        fuzzy: bool = G.SEARCH_FUZZY,
+        seed_snapshot: Optional[Path] = G.SEED_SNAPSHOT,
     ):
         self.name = name
 
         self._filepath = filepath
+        self._seed_snapshot = seed_snapshot
         self._event_bus = event_bus
         self._lock = asyncio.Lock()
 
+        #long-lived connections, PRAGMAs and UDFs are applied once per connection
+        self._pool = ConnectionPool(self._get_connection, size=pool_size) #reads
+        self._writer = SingleWriter(self._get_connection, name=f"{name}-writer", max_batch=write_batch_size) #writes, group committed
+
+        #reads run on their own threads, one per pooled connection unless told otherwise, and both reads and writes are timed per op
+        self._op_timings = OpTimings(samples=G.DB_STATS_SAMPLES)
+        self._executor = DBExecutor(name=f"{name}-reader", workers=executor_workers or pool_size, timings=self._op_timings)
+
+        #collapses bursts of search index refresh requests into one refresh
+        self._search_refresh = RefreshScheduler(self.refresh_search_index, name=f"{name}-search-refresh", debounce=search_refresh_debounce)
+
+        #lists whose position gaps got too small to keep halving, renumbered together in the background
+        self._rebalance_pending = set()
+        self._position_rebalance = RefreshScheduler(self.rebalance_positions, name=f"{name}-position-rebalance", debounce=G.POSITION_REBALANCE_DEBOUNCE)
+
+        #tracks waiting to be appended to playlists, a playlist import's downloads share one write per window
+        self._playlist_adds_pending: Dict[int, List[str]] = {}
+        self._playlist_adds = RefreshScheduler(self.apply_playlist_adds, name=f"{name}-playlist-adds", debounce=G.PLAYLIST_ADD_DEBOUNCE)
+
+        #one time merge of duplicate artists, started by initialize() on databases that never had it
+        self._artist_compaction: Optional[asyncio.Task] = None
+
+        #query resolution cache counters, see ResolveMixin
+        self._resolve_stats = {"hits": 0, "negative_hits": 0, "misses": 0}
+
+        #last run_maintenance report, see MaintenanceWorker
+        self._maintenance_runs = 0
+        self._maintenance_last: Optional[dict] = None
+
+        #search results per normalized query, dropped whenever a write could change them
+        self._search_cache = SearchCache(max_entries=search_cache_entries, max_bytes=search_cache_bytes)
+
+        #optional in-memory prefix index, loaded in initialize() and kept current by register_typeahead_handlers
+        self._typeahead = TypeaheadIndex(limit=G.SEARCH_LIMIT) if typeahead else None
+
+        #vocabulary trigrams for rewriting misspelled queries that found nothing, loaded in initialize() and fed by refresh_search_index
+        self._fuzzy = FuzzyIndex(min_similarity=G.SEARCH_FUZZY_MIN_SIMILARITY) if fuzzy else None
+
         self._filepath.parent.mkdir(parents=True, exist_ok=True)
 
         #generate
@@ -52,38 +122,104 @@ class AudioDatabase(
 
 
     def _get_connection(self):
-        """Creates a connection with the db file"""
+        """Creates a connection with the db file, only called when the pool needs to grow"""
         conn = sqlite3.connect(
             self._filepath,
             detect_types=sqlite3.PARSE_DECLTYPES,
-            timeout=30.0 #critical for multiprocessing
+            timeout=30.0, #critical for multiprocessing
+            check_same_thread=False #pooled connections move between executor threads, the pool hands each to one thread at a time
         )
         conn.row_factory = sqlite3.Row
 
-        def sql_ln_boost(pref):
-            return 1 + math.log(float(pref) + 1.0) #at x=0 y=1, and at x=1 y=1.69ish for a ~70% max boost
-        conn.create_function("LN_BOOST", 1, sql_ln_boost)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;") #only sticks on a new file before its first table, older ones keep whole-file VACUUM only
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA foreign_keys = ON;") #per connection setting, so it has to live here
+
+        #the weight triggers use the built in ln(), only sqlite builds without math functions need the python one
+        try:
+            conn.execute("SELECT ln(1.0);")
+        except sqlite3.OperationalError:
+            conn.create_function("ln", 1, math.log, deterministic=True)
         return conn
     
     @contextmanager
     def cursor(self):
-        """Managed connection and cursor that handle commit and rollback and closes"""
-        conn = self._get_connection()
-        cur = conn.cursor()
-        try:
-            yield cur
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            cur.close()
-            conn.close()
+        """
+        Managed pooled connection and cursor that handle commit and rollback and return the connection.
+
+        Inside a write closure (see _atomic_write_op) this yields a cursor on the writer connection
+        instead, and the writer thread owns the commit for the whole group.
+        """
+        writer_conn = self._writer.active_connection()
+        if writer_conn is not None:
+            cur = writer_conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+            return
+
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cur.close()
+
+
+    def close(self):
+        """Flushes pending writes and closes all connections. The database can't be used afterwards."""
+        self._search_refresh.close() #unrefreshed rows stay in catalog_fts_pending until the next startup
+        self._position_rebalance.close() #crowded lists still order correctly, the next crowded move queues them again
+        self._playlist_adds.close() #anything still queued is lost, await flush_playlist_adds first
+        if self._artist_compaction is not None:
+            self._artist_compaction.cancel() #batches already written stay, the marker isn't, so the next startup finishes it
+        self._writer.close()
+        self._executor.close()
+        self._pool.close()
+        print(f"[AudioDatabase] {self.name} connections closed")
 
 
     async def _atomic_db_op(self, func, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+        """Runs a read closure on a pooled connection in the database executor, timed under the method that built it"""
+        future = self._executor.submit(lambda: func(*args, **kwargs), tag=op_tag(func))
+        return await asyncio.wrap_future(future)
+
+
+    async def _atomic_write_op(self, func, *args, **kwargs):
+        """
+        Queues a write closure on the single writer thread and waits for its group to commit.
+        Returns the closure's own result, or raises its own exception, other writes in the same group are unaffected.
+        """
+        tag = op_tag(func)
+        submitted = time.perf_counter()
+
+        def _timed():
+            #execution covers the closure only, the group's COMMIT is shared and shows up as the next ops' wait
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self._op_timings.record("write", tag, start - submitted, time.perf_counter() - start, failed)
+
+        future = self._writer.submit(_timed)
+        return await asyncio.wrap_future(future)
+
+
+    def db_stats(self) -> dict:
+        """Read executor and writer queue state, and queue wait and execution percentiles per operation"""
+        return {
+            "reads": self._executor.stats(),
+            "writer": self._writer.stats(),
+            "ops": self._op_timings.snapshot(),
+        }
 
 
     async def _emit_event(self, action: str, payload: Optional[dict] = None):
@@ -95,18 +231,36 @@ class AudioDatabase(
             )
             await self._event_bus.publish(event)
 
-    async def build_from_file(self):
-        sql_path = Path(__file__).parent / "base_schema.sql"
+    async def build_from_file(self) -> list:
+        """
+        Brings the schema up to date, see migrations.py. A database already at the latest version
+        costs one PRAGMA read, base_schema.sql is only replayed for new or pre-versioning files.
+
+        Returns:
+            list[Migration]: Steps applied.
+        """
+        def _logic():
+            with self.cursor() as cur:
+                return migrations.migrate(cur)
+
+        applied = await self._atomic_db_op(_logic)
+        if applied:
+            print(f"[AudioDatabase] {self.name} schema migrated to version {migrations.LATEST} ({', '.join(m.name for m in applied)})")
+        return applied
+
+
+    async def migration_status(self) -> dict:
+        """Schema version, pending steps and search index marker, without applying anything"""
         def _logic():
-            with open(sql_path, "r") as f:
-                schema_script = f.read()
-        
             with self.cursor() as cur:
-                cur.execute("PRAGMA journal_mode = WAL;")
-                cur.execute("PRAGMA foreign_keys = ON;")
-                cur.executescript(schema_script)
+                report = migrations.status(cur)
+                report["search_index"] = {
+                    "built": migrations.read_meta(cur, "search_index_version"),
+                    "current": str(G.SEARCH_INDEX_VERSION),
+                }
+                return report
 
-        await self._atomic_db_op(_logic)
+        return await self._atomic_db_op(_logic)
 
 
     async def initialize(self):
@@ -114,8 +268,12 @@ class AudioDatabase(
         Public entry point to prepare the database for use.
         Ensures schema is built and any startup constraints are checked.
         """
+        self.restore_seed_snapshot() #first boot only, before anything opens the file
         await self.build_from_file()
         await self.seed()
-        await self.rebuild_search_index()
+        await self.ensure_search_index()
+        await self.ensure_artist_compaction()
+        await self.load_typeahead()
+        await self.load_fuzzy()
         
         print(f"[AudioDatabase] {self.name} schema verified and ready.")
@@ -1,3 +1,9 @@
+-- key value state about the database itself, see migrations.py
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
 -- titles table
 CREATE TABLE IF NOT EXISTS titles (
     rowid INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -6,7 +12,8 @@ CREATE TABLE IF NOT EXISTS titles (
     title_display TEXT,
     duration REAL DEFAULT 0.0,
     pref REAL DEFAULT 0.0 CHECK (pref >= 0.0 AND pref <= 1.0),
-    pref_weight REAL DEFAULT 1.0
+    pref_weight REAL DEFAULT 1.0,
+    static_rank REAL DEFAULT 0.1 --pref_weight * best artist pref_weight * download boost, kept current by the trg_rank_* triggers
 );
 
 -- titles insertion trigger
@@ -14,7 +21,7 @@ CREATE TRIGGER IF NOT EXISTS trg_pref_insert_titles
 AFTER INSERT ON titles
 BEGIN
     UPDATE titles
-    SET pref_weight = LN_BOOST(NEW.pref)
+    SET pref_weight = 1 + ln(NEW.pref + 1.0) --at x=0 y=1, and at x=1 y=1.69ish for a ~70% max boost
     WHERE rowid = NEW.rowid;
 END;
 
@@ -23,7 +30,7 @@ CREATE TRIGGER IF NOT EXISTS trg_pref_update_titles
 AFTER UPDATE OF pref ON titles
 BEGIN
     UPDATE titles
-    SET pref_weight = LN_BOOST(NEW.pref)
+    SET pref_weight = 1 + ln(NEW.pref + 1.0)
     WHERE rowid = NEW.rowid;
 END;
 
@@ -38,12 +45,16 @@ CREATE TABLE IF NOT EXISTS artists (
     enriched_at INTEGER DEFAULT 0 --see https://sqlite.org/lang_datefunc.html for (unixepoch())
 );
 
+-- artist resolution by normalized name, see ArtistsMixin
+CREATE INDEX IF NOT EXISTS idx_artists_artist
+ON artists (artist);
+
 -- artists insertion trigger
 CREATE TRIGGER IF NOT EXISTS trg_pref_insert_artist
 AFTER INSERT ON artists
 BEGIN
     UPDATE artists
-    SET pref_weight = LN_BOOST(NEW.pref)
+    SET pref_weight = 1 + ln(NEW.pref + 1.0)
     WHERE rowid = NEW.rowid;
 END;
 
@@ -52,7 +63,7 @@ CREATE TRIGGER IF NOT EXISTS trg_pref_update_artists
 AFTER UPDATE OF pref ON artists
 BEGIN
     UPDATE artists
-    SET pref_weight = LN_BOOST(NEW.pref)
+    SET pref_weight = 1 + ln(NEW.pref + 1.0)
     WHERE rowid = NEW.rowid;
 END;
 
@@ -65,6 +76,102 @@ CREATE TABLE IF NOT EXISTS title_artists (
     PRIMARY KEY (title_rowid, artist_rowid)
 );
 
+-- reverse lookup for the triggers that follow an artist to its titles
+CREATE INDEX IF NOT EXISTS idx_title_artists_artist
+ON title_artists (artist_rowid);
+
+-- display rows, what every read path returns for a track: display title, display artists in the order they were linked, duration
+-- computed per title so a trigger can refresh one row with an index lookup instead of grouping the whole catalog
+CREATE VIEW IF NOT EXISTS track_display_view AS
+SELECT
+    t.rowid AS rowid,
+    t.id AS id,
+    COALESCE(t.title_display, t.title) AS title,
+    (
+        SELECT GROUP_CONCAT(name, char(31))
+        FROM (
+            SELECT COALESCE(a.artist_display, a.artist) AS name
+            FROM title_artists ta
+            JOIN artists a ON a.rowid = ta.artist_rowid
+            WHERE ta.title_rowid = t.rowid
+            ORDER BY ta.rowid
+        )
+    ) AS artist_list,
+    t.duration AS duration
+FROM titles t;
+
+-- materialized track_display_view, kept current by the trg_display_* triggers
+-- they delete then insert, an outer INSERT OR IGNORE (see seed) would turn an INSERT OR REPLACE in a trigger into an ignore
+CREATE TABLE IF NOT EXISTS track_display (
+    rowid INTEGER PRIMARY KEY, --titles.rowid
+    id TEXT UNIQUE,
+    title TEXT,
+    artist TEXT, --display artists joined with ', '
+    artist_list TEXT, --display artists joined with UNIT_SEP, for callers that need a different delimiter
+    duration REAL
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_display_insert_titles
+AFTER INSERT ON titles
+BEGIN
+    DELETE FROM track_display WHERE rowid = NEW.rowid;
+    INSERT INTO track_display (rowid, id, title, artist, artist_list, duration)
+    SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+    FROM track_display_view WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_display_update_titles
+AFTER UPDATE OF id, title, title_display, duration ON titles
+BEGIN
+    DELETE FROM track_display WHERE rowid = NEW.rowid;
+    INSERT INTO track_display (rowid, id, title, artist, artist_list, duration)
+    SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+    FROM track_display_view WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_display_delete_titles
+AFTER DELETE ON titles
+BEGIN
+    DELETE FROM track_display WHERE rowid = OLD.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_display_update_artists
+AFTER UPDATE OF artist, artist_display ON artists
+BEGIN
+    DELETE FROM track_display WHERE rowid IN (SELECT title_rowid FROM title_artists WHERE artist_rowid = NEW.rowid);
+    INSERT INTO track_display (rowid, id, title, artist, artist_list, duration)
+    SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+    FROM track_display_view WHERE rowid IN (SELECT title_rowid FROM title_artists WHERE artist_rowid = NEW.rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_display_insert_title_artists
+AFTER INSERT ON title_artists
+BEGIN
+    DELETE FROM track_display WHERE rowid = NEW.title_rowid;
+    INSERT INTO track_display (rowid, id, title, artist, artist_list, duration)
+    SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+    FROM track_display_view WHERE rowid = NEW.title_rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_display_update_title_artists
+AFTER UPDATE ON title_artists
+BEGIN
+    DELETE FROM track_display WHERE rowid IN (OLD.title_rowid, NEW.title_rowid);
+    INSERT INTO track_display (rowid, id, title, artist, artist_list, duration)
+    SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+    FROM track_display_view WHERE rowid IN (OLD.title_rowid, NEW.title_rowid);
+END;
+
+-- also fires for the cascades when a title or an artist is deleted, a deleted title just selects nothing
+CREATE TRIGGER IF NOT EXISTS trg_display_delete_title_artists
+AFTER DELETE ON title_artists
+BEGIN
+    DELETE FROM track_display WHERE rowid = OLD.title_rowid;
+    INSERT INTO track_display (rowid, id, title, artist, artist_list, duration)
+    SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+    FROM track_display_view WHERE rowid = OLD.title_rowid;
+END;
+
 -- fts5 view
 CREATE VIEW IF NOT EXISTS title_artist_search_view AS
 SELECT 
@@ -76,15 +183,70 @@ JOIN title_artists ta ON t.rowid = ta.title_rowid
 JOIN artists a ON ta.artist_rowid = a.rowid
 GROUP BY t.rowid;
 
--- fts5 table
+-- fts5 table, stores its own copy of the indexed text so single rows can be deleted and re-inserted
 CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
     title, 
     artists,
-    content='title_artist_search_view',
-    content_rowid='rowid',
     tokenize='unicode61 remove_diacritics 1' --see https://sqlite.org/fts5.html section 4.3.1
 );
 
+-- title rowids whose fts5 row is out of date, drained by refresh_search_index
+CREATE TABLE IF NOT EXISTS catalog_fts_pending (
+    rowid INTEGER PRIMARY KEY
+);
+
+-- fts5 maintenance triggers, these only mark rows and never touch catalog_fts directly
+CREATE TRIGGER IF NOT EXISTS trg_fts_insert_titles
+AFTER INSERT ON titles
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid) VALUES (NEW.rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_update_titles
+AFTER UPDATE OF title ON titles
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid) VALUES (NEW.rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_delete_titles
+AFTER DELETE ON titles
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid) VALUES (OLD.rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_update_artists
+AFTER UPDATE OF artist ON artists
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid)
+    SELECT title_rowid FROM title_artists WHERE artist_rowid = NEW.rowid;
+END;
+
+-- before, so the junction rows are still there to find the affected titles
+CREATE TRIGGER IF NOT EXISTS trg_fts_delete_artists
+BEFORE DELETE ON artists
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid)
+    SELECT title_rowid FROM title_artists WHERE artist_rowid = OLD.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_insert_title_artists
+AFTER INSERT ON title_artists
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid) VALUES (NEW.title_rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_update_title_artists
+AFTER UPDATE ON title_artists
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid) VALUES (OLD.title_rowid), (NEW.title_rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_delete_title_artists
+AFTER DELETE ON title_artists
+BEGIN
+    INSERT OR IGNORE INTO catalog_fts_pending (rowid) VALUES (OLD.title_rowid);
+END;
+
 -- downloads table
 CREATE TABLE IF NOT EXISTS downloads (
     id TEXT PRIMARY KEY,
@@ -92,6 +254,83 @@ CREATE TABLE IF NOT EXISTS downloads (
     FOREIGN KEY (id) REFERENCES titles(id) ON DELETE CASCADE
 );
 
+-- downloads recency index, the rowid rides along so it also serves the (downloaded_at, rowid) page cursor
+CREATE INDEX IF NOT EXISTS idx_downloads_downloaded_at
+ON downloads(downloaded_at);
+
+-- static rank maintenance triggers, every write that moves a weight or the download state recomputes the affected titles
+-- downloaded titles get the full weight, everything else a tenth of it
+-- the search ranking multiplies bm25 by it instead of joining artists and downloads per query, see SearchMixin.search
+CREATE TRIGGER IF NOT EXISTS trg_rank_update_titles
+AFTER UPDATE OF pref_weight ON titles
+BEGIN
+    UPDATE titles
+    SET static_rank = pref_weight
+        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+        * CASE WHEN EXISTS (SELECT 1 FROM downloads d WHERE d.id = titles.id) THEN 1.0 ELSE 0.1 END
+    WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rank_update_artists
+AFTER UPDATE OF pref_weight ON artists
+BEGIN
+    UPDATE titles
+    SET static_rank = pref_weight
+        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+        * CASE WHEN EXISTS (SELECT 1 FROM downloads d WHERE d.id = titles.id) THEN 1.0 ELSE 0.1 END
+    WHERE rowid IN (SELECT title_rowid FROM title_artists WHERE artist_rowid = NEW.rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rank_insert_title_artists
+AFTER INSERT ON title_artists
+BEGIN
+    UPDATE titles
+    SET static_rank = pref_weight
+        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+        * CASE WHEN EXISTS (SELECT 1 FROM downloads d WHERE d.id = titles.id) THEN 1.0 ELSE 0.1 END
+    WHERE rowid = NEW.title_rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rank_update_title_artists
+AFTER UPDATE ON title_artists
+BEGIN
+    UPDATE titles
+    SET static_rank = pref_weight
+        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+        * CASE WHEN EXISTS (SELECT 1 FROM downloads d WHERE d.id = titles.id) THEN 1.0 ELSE 0.1 END
+    WHERE rowid IN (OLD.title_rowid, NEW.title_rowid);
+END;
+
+-- also fires for the cascade when an artist is deleted
+CREATE TRIGGER IF NOT EXISTS trg_rank_delete_title_artists
+AFTER DELETE ON title_artists
+BEGIN
+    UPDATE titles
+    SET static_rank = pref_weight
+        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+        * CASE WHEN EXISTS (SELECT 1 FROM downloads d WHERE d.id = titles.id) THEN 1.0 ELSE 0.1 END
+    WHERE rowid = OLD.title_rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rank_insert_downloads
+AFTER INSERT ON downloads
+BEGIN
+    UPDATE titles
+    SET static_rank = pref_weight
+        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rank_delete_downloads
+AFTER DELETE ON downloads
+BEGIN
+    UPDATE titles
+    SET static_rank = pref_weight
+        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+        * 0.1
+    WHERE id = OLD.id;
+END;
+
 -- likes table
 CREATE TABLE IF NOT EXISTS likes (
     id TEXT PRIMARY KEY,
@@ -124,4 +363,25 @@ CREATE TABLE IF NOT EXISTS playlist_titles (
 
 -- playlist titles covering index
 CREATE INDEX IF NOT EXISTS idx_playlist_titles_position
-ON playlist_titles (playlist_id, position, title_id);
\ No newline at end of file
+ON playlist_titles (playlist_id, position, title_id);
+-- normalized search query to the video it resolved to, NULL if it found nothing, see ResolveMixin
+CREATE TABLE IF NOT EXISTS resolve_cache (
+    query TEXT PRIMARY KEY,
+    video_id TEXT,
+    resolved_at INTEGER NOT NULL
+) WITHOUT ROWID;
+
+-- forget_resolved lookup
+CREATE INDEX IF NOT EXISTS idx_resolve_cache_video
+ON resolve_cache (video_id);
+
+-- measured loudness per download and the gain that brings it to the target in meta, see LoudnessMixin
+CREATE TABLE IF NOT EXISTS loudness (
+    id TEXT PRIMARY KEY,
+    integrated REAL NOT NULL,
+    true_peak REAL NOT NULL,
+    lra REAL,
+    gain REAL NOT NULL,
+    measured_at INTEGER DEFAULT (unixepoch()),
+    FOREIGN KEY (id) REFERENCES downloads(id) ON DELETE CASCADE
+);
@@ -1,4 +1,5 @@
 from pathlib import Path
+from backend.core.lib.utils import iter_download_files
 
 async def cleanup_download_folder(db, downloads_dir: Path):
     """
@@ -19,11 +20,9 @@ async def cleanup_download_folder(db, downloads_dir: Path):
     
     valid_ids = {item["id"] for item in content}
 
-    #2. walk through the downloads folder
-    for filepath in downloads_dir.iterdir():
-        if not filepath.is_file():
-            continue #ignore directories, but there shouldnt be any
-
+    #2. walk through the downloads folder, flat files and shard folders
+    for entry in iter_download_files(downloads_dir):
+        filepath = Path(entry.path)
         base_name = filepath.stem #filename without extension
 
         #3. if this file is not associated with any downloaded track, delete it
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+backend/core/database/cli.py
+
+Usage:
+    python -m backend.core.database.cli search-check
+    python -m backend.core.database.cli search-rebuild
+    python -m backend.core.database.cli seed-snapshot [--out PATH]
+    python -m backend.core.database.cli migrate-status
+    python -m backend.core.database.cli migrate-apply
+
+What it does:
+- search-check: compares the FTS5 search index against the catalog and reports drift
+- search-rebuild: repair command, rebuilds the whole FTS5 search index from scratch
+- seed-snapshot: seeds a fresh database from seed.csv and writes it out compacted, AudioDatabase copies it
+  into place on first boot instead of seeding (see SeedMixin.restore_seed_snapshot). Doesn't touch --db.
+- migrate-status: schema version, pending migrations and search index marker, changes nothing
+- migrate-apply: applies pending migrations, the server also does this on startup
+
+Run these while the server is stopped, or at least expect the server's writes to wait on them.
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from backend.core.database.audio_database import AudioDatabase
+import backend.globals as G
+
+
+async def search_check(db: AudioDatabase) -> bool:
+    report = await db.check_search_index()
+    print(json.dumps(report, indent=2))
+    return report["ok"]
+
+
+async def search_rebuild(db: AudioDatabase) -> bool:
+    await db.rebuild_search_index()
+    return await search_check(db)
+
+
+async def seed_snapshot(out: Path) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AudioDatabase(name=G.AUDIO_DATABASE_NAME, filepath=Path(tmp) / "seed.db", typeahead=False, fuzzy=False, seed_snapshot=None)
+        try:
+            await db.initialize()
+
+            def _logic():
+                with db.cursor() as cur:
+                    cur.execute("VACUUM INTO ?;", (str(out),))
+
+            out.unlink(missing_ok=True)
+            await db._atomic_db_op(_logic)
+        finally:
+            db.close()
+
+    print(f"Wrote seed snapshot to {out} ({out.stat().st_size / 1024 / 1024:.1f}MB)")
+    return True
+
+
+async def migrate_status(db: AudioDatabase) -> bool:
+    report = await db.migration_status()
+    print(json.dumps(report, indent=2))
+    return not report["pending"]
+
+
+async def migrate_apply(db: AudioDatabase) -> bool:
+    applied = await db.build_from_file()
+    print(f"Applied {len(applied)} migration(s)")
+    return await migrate_status(db)
+
+
+#commands that deal with the schema version themselves, everything else migrates first
+UNMIGRATED = {"migrate-status", "migrate-apply"}
+
+
+COMMANDS = {
+    "search-check": search_check,
+    "search-rebuild": search_rebuild,
+    "seed-snapshot": seed_snapshot,
+    "migrate-status": migrate_status,
+    "migrate-apply": migrate_apply,
+}
+
+
+async def run(command: str, db_path: Path) -> bool:
+    db = AudioDatabase(name=G.AUDIO_DATABASE_NAME, filepath=db_path)
+    try:
+        if command not in UNMIGRATED:
+            await db.build_from_file()
+        return await COMMANDS[command](db)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scuttle database maintenance commands",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "command",
+        choices=list(COMMANDS.keys()),
+        help=(
+            "search-check: report drift between the search index and the catalog\n"
+            "search-rebuild: rebuild the search index from scratch, then check it\n"
+            "seed-snapshot: build the prebuilt seed database restored on first boot\n"
+            "migrate-status: show schema version and pending migrations, exits 1 if any are pending\n"
+            "migrate-apply: apply pending migrations"
+        )
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=G.DB_FILE,
+        metavar="PATH",
+        help=f"Database file. Defaults to {G.DB_FILE}"
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=G.SEED_SNAPSHOT,
+        metavar="PATH",
+        help=f"seed-snapshot output file. Defaults to {G.SEED_SNAPSHOT}"
+    )
+    args = parser.parse_args()
+
+    if args.command == "seed-snapshot":
+        ok = asyncio.run(seed_snapshot(args.out))
+    else:
+        ok = asyncio.run(run(args.command, args.db))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Tuple
+
+
+def op_tag(func: Callable) -> str:
+    """
+    Names a database closure after the method that built it, LikesMixin.like_tracks.<locals>._logic
+    is tagged LikesMixin.like_tracks. Closures defined elsewhere keep their own name.
+    """
+    qualname = getattr(func, "__qualname__", None) or repr(func)
+    return qualname.split(".<locals>", 1)[0]
+
+
+def _percentiles(samples) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    def _at(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {"p50": _at(0.50), "p95": _at(0.95), "p99": _at(0.99), "max": ordered[-1]}
+
+
+class OpTimings:
+    def __init__(self, samples: int = 1024):
+        """
+        Queue wait and execution time per operation tag, for both the read executor and the writer.
+
+        Counters are kept for the whole run, percentiles are over the last `samples` operations of each
+        tag so they follow the current load instead of averaging in startup.
+
+        Args:
+            samples: Operations kept per tag for the percentiles.
+        """
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._tags: Dict[Tuple[str, str], dict] = {}
+
+
+    def record(self, kind: str, tag: str, wait: float, run: float, failed: bool = False):
+        """Called from worker threads once an operation finishes, times in seconds"""
+        with self._lock:
+            entry = self._tags.get((kind, tag))
+            if entry is None:
+                entry = {"count": 0, "failed": 0, "wait": deque(maxlen=self.samples), "run": deque(maxlen=self.samples)}
+                self._tags[(kind, tag)] = entry
+            entry["count"] += 1
+            entry["failed"] += failed
+            entry["wait"].append(wait)
+            entry["run"].append(run)
+
+
+    def snapshot(self) -> dict:
+        """{kind: {tag: {count, failed, wait_ms: {p50, p95, p99, max}, run_ms: {...}}}}, slowest p95 first"""
+        with self._lock:
+            copies = [
+                (kind, tag, entry["count"], entry["failed"], list(entry["wait"]), list(entry["run"]))
+                for (kind, tag), entry in self._tags.items()
+            ]
+
+        report: Dict[str, dict] = {}
+        for kind, tag, count, failed, wait, run in copies:
+            report.setdefault(kind, {})[tag] = {
+                "count": count,
+                "failed": failed,
+                "wait_ms": {k: v * 1000 for k, v in _percentiles(wait).items()},
+                "run_ms": {k: v * 1000 for k, v in _percentiles(run).items()},
+            }
+
+        return {
+            kind: dict(sorted(tags.items(), key=lambda item: item[1]["run_ms"]["p95"], reverse=True))
+            for kind, tags in report.items()
+        }
+
+
+    def reset(self):
+        with self._lock:
+            self._tags.clear()
+
+
+class DBExecutor:
+    def __init__(self, name: str = "db-reader", workers: int = 4, timings: OpTimings = None):
+        """
+        Thread pool that runs only read closures, instead of the event loop's default executor.
+
+        The default executor is shared with everything else that calls run_in_executor(None, ...),
+        so a burst of file or network work there could queue database reads behind it, and its
+        queue was invisible. Here every closure is timed from submit to start (queue wait) and
+        from start to finish (execution) and recorded under its op_tag.
+
+        Args:
+            name: Thread name prefix, shows up in debuggers and thread dumps.
+            workers: Threads, more than the connection pool size only adds threads waiting on a connection.
+            timings: Where operations are recorded, shared with the writer by AudioDatabase.
+        """
+        self._name = name
+        self.workers = workers
+        self.timings = timings if timings is not None else OpTimings()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._finished = 0
+
+
+    def submit(self, func: Callable, tag: str = None) -> Future:
+        tag = tag or op_tag(func)
+        submitted = time.perf_counter()
+        with self._lock:
+            self._submitted += 1
+
+        def _timed():
+            start = time.perf_counter()
+            with self._lock:
+                self._started += 1
+
+            failed = True
+            try:
+                result = func()
+                failed = False
+                return result
+            finally:
+                self.timings.record("read", tag, start - submitted, time.perf_counter() - start, failed)
+                with self._lock:
+                    self._finished += 1
+
+        return self._pool.submit(_timed)
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "submitted": self._submitted,
+                "queued": self._submitted - self._started,
+                "running": self._started - self._finished,
+            }
+
+
+    def close(self):
+        """Waits for reads already submitted, then stops the threads"""
+        self._pool.shutdown(wait=True)
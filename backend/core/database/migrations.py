@@ -0,0 +1,204 @@
+"""
+Schema migrations, keyed on PRAGMA user_version.
+
+base_schema.sql always describes the latest schema. A fresh database runs it once and is stamped with
+LATEST, an existing one runs only the steps above its user_version, in order, each stamped as it
+lands, and a current one runs nothing at all. All of it runs in one transaction, so a failure anywhere
+leaves the database as it was. New schema changes go into base_schema.sql and get a step appended to
+MIGRATIONS that brings an existing database to the same place.
+"""
+from pathlib import Path
+import sqlite3
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+from backend.exceptions import SchemaVersionError
+
+
+SCHEMA_PATH = Path(__file__).parent / "base_schema.sql"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+def _statements(script: str) -> Iterator[str]:
+    """Splits a script into single statements, trigger bodies included. executescript would commit first."""
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer
+            buffer = ""
+    if buffer.strip():
+        yield buffer #only comments left, or an unfinished statement that fails loudly
+
+
+def _baseline(cur: sqlite3.Cursor):
+    """Brings a database from before versioning, whatever state it's in, up to base_schema.sql"""
+    with open(SCHEMA_PATH, "r") as f:
+        schema_script = f.read()
+
+    #older databases used an external content fts5 table over the view, which can't delete single rows safely
+    cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'catalog_fts';")
+    row = cur.fetchone()
+    legacy_fts = row is not None and "content=" in row["sql"].replace(" ", "")
+    if legacy_fts:
+        print(f"[Migrations] Replacing external content search index")
+        cur.execute("DROP TABLE catalog_fts;")
+
+    #older databases computed weights with a python UDF and had no static rank
+    cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE '%LN_BOOST%';")
+    for row in cur.fetchall():
+        cur.execute(f"DROP TRIGGER {row['name']};")
+    cur.execute("SELECT name FROM pragma_table_info('titles');")
+    columns = {row["name"] for row in cur.fetchall()}
+    legacy_rank = bool(columns) and "static_rank" not in columns
+    if legacy_rank:
+        print(f"[Migrations] Adding static rank to titles")
+        cur.execute("ALTER TABLE titles ADD COLUMN static_rank REAL DEFAULT 0.1;")
+
+    #older databases grouped artists on every read instead of keeping track_display
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'track_display';")
+    legacy_display = bool(columns) and cur.fetchone() is None
+    if legacy_display:
+        print(f"[Migrations] Building track display rows")
+
+    for statement in _statements(schema_script):
+        cur.execute(statement)
+
+    #the new table starts empty, so queue every title for the next refresh
+    if legacy_fts:
+        cur.execute("INSERT OR IGNORE INTO catalog_fts_pending (rowid) SELECT rowid FROM titles;")
+
+    #touching pref_weight runs trg_rank_update_titles on every row
+    if legacy_rank:
+        cur.execute("UPDATE titles SET pref_weight = pref_weight;")
+
+    if legacy_display:
+        cur.execute('''
+            INSERT OR REPLACE INTO track_display (rowid, id, title, artist, artist_list, duration)
+            SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+            FROM track_display_view;
+        ''')
+
+
+def _artist_name_index(cur: sqlite3.Cursor):
+    """register_track resolves artists by name, the duplicates themselves are merged by compact_artists"""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artists_artist ON artists (artist);")
+
+
+def _resolve_cache(cur: sqlite3.Cursor):
+    """Query to video id cache consulted by DownloadWorker before searching"""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS resolve_cache (
+            query TEXT PRIMARY KEY,
+            video_id TEXT,
+            resolved_at INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_resolve_cache_video ON resolve_cache (video_id);")
+
+
+def _loudness(cur: sqlite3.Cursor):
+    """Measured loudness and playback gain per downloaded track"""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS loudness (
+            id TEXT PRIMARY KEY,
+            integrated REAL NOT NULL,
+            true_peak REAL NOT NULL,
+            lra REAL,
+            gain REAL NOT NULL,
+            measured_at INTEGER DEFAULT (unixepoch()),
+            FOREIGN KEY (id) REFERENCES downloads(id) ON DELETE CASCADE
+        );
+    ''')
+
+
+#append only, a step's version is its position
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", _baseline),
+    Migration(2, "artist_name_index", _artist_name_index),
+    Migration(3, "resolve_cache", _resolve_cache),
+    Migration(4, "loudness", _loudness),
+]
+
+LATEST = MIGRATIONS[-1].version
+
+
+def schema_version(cur: sqlite3.Cursor) -> int:
+    cur.execute("PRAGMA user_version;")
+    return cur.fetchone()[0]
+
+
+def pending(cur: sqlite3.Cursor) -> List[Migration]:
+    version = schema_version(cur)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def read_meta(cur: sqlite3.Cursor, key: str) -> Optional[str]:
+    """Value from the meta table, None if unset or if the table doesn't exist yet"""
+    try:
+        cur.execute("SELECT value FROM meta WHERE key = ?;", (key,))
+    except sqlite3.OperationalError:
+        return None
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def write_meta(cur: sqlite3.Cursor, key: str, value):
+    cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?);", (key, str(value)))
+
+
+def _stamp(cur: sqlite3.Cursor, version: int):
+    cur.execute(f"PRAGMA user_version = {int(version)};")
+    write_meta(cur, "migrated_at", int(time.time()))
+
+
+def migrate(cur: sqlite3.Cursor) -> List[Migration]:
+    """
+    Runs every pending step.
+
+    Returns:
+        list[Migration]: Steps applied, empty if the database was already current.
+
+    Raises:
+        SchemaVersionError: The database was written by a newer build.
+    """
+    version = schema_version(cur)
+    if version > LATEST:
+        raise SchemaVersionError(f"Database schema version {version} is newer than this build's {LATEST}")
+    if version == LATEST:
+        return []
+
+    #the driver doesn't open its implicit transaction for DDL, so every step and its stamp commit or roll back together here
+    if not cur.connection.in_transaction:
+        cur.execute("BEGIN;")
+
+    #a fresh file gets the latest schema in one go
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'titles';")
+    if cur.fetchone() is None:
+        _baseline(cur)
+        _stamp(cur, LATEST)
+        return list(MIGRATIONS)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        print(f"[Migrations] Applying {migration.version}: {migration.name}")
+        migration.apply(cur)
+        _stamp(cur, migration.version)
+        applied.append(migration)
+    return applied
+
+
+def status(cur: sqlite3.Cursor) -> dict:
+    return {
+        "version": schema_version(cur),
+        "latest": LATEST,
+        "pending": [{"version": m.version, "name": m.name} for m in pending(cur)],
+        "migrated_at": read_meta(cur, "migrated_at"),
+    }
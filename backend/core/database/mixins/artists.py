@@ -0,0 +1,164 @@
+import asyncio
+import traceback
+from typing import Optional
+from backend.core.database.migrations import read_meta, write_meta
+from backend.core.lib.utils import normalize_for_search
+import backend.globals as G
+
+
+class ArtistsMixin:
+    """
+    One artists row per normalized name.
+
+    artists.artist holds the normalize_for_search key, like the seed writes it, and artist_display the
+    name as it was given. register_track resolves an uploader name through idx_artists_artist instead of
+    inserting a row per track. compact_artists is the one time pass that brings older databases, where
+    every registered track got its own raw named row, to the same place.
+    """
+    def _artist_key(self, name: Optional[str]) -> str:
+        if not name:
+            return ""
+        return normalize_for_search(name) or name.strip().lower() #names that are all punctuation keep their own key
+
+
+    def _resolve_artist(self, cur, name: Optional[str]) -> int:
+        """
+        Rowid of the artist with this normalized name, inserting it if there's none.
+        Several seeded artists can share a name, the enriched one with the lowest rowid wins.
+
+        An empty or missing name resolves to one shared artist named "", every track needs a
+        title_artists row or the search view, the FTS refresh and the typeahead can't see it.
+
+        Returns:
+            int: artists rowid.
+        """
+        key = self._artist_key(name)
+
+        cur.execute('''
+            SELECT rowid
+            FROM artists
+            WHERE artist = ?
+            ORDER BY id IS NULL, rowid
+            LIMIT 1;
+        ''', (key,))
+        row = cur.fetchone()
+        if row is not None:
+            return row[0]
+
+        cur.execute('''
+            INSERT INTO artists (artist, artist_display)
+            VALUES (?, ?)
+            RETURNING rowid;
+        ''', (key, name))
+        return cur.fetchone()[0]
+
+
+    async def compact_artists(self, batch_size: int = G.ARTIST_COMPACTION_BATCH) -> dict:
+        """
+        Normalizes legacy artist names, then merges artists that share a normalized name into one.
+
+        Only rows without an id are merged away, two enriched artists with the same name are different
+        people. A merged row's title links move to the survivor, keeping their place in each title's
+        artist order, its pref is kept if higher, so is its display name if the survivor has none, and
+        the row is deleted. Runs batch_size rows per write op so foreground writes get through in between.
+
+        Returns:
+            dict: {"renamed": int, "merged": int}
+        """
+        def _scan():
+            with self.cursor() as cur:
+                cur.execute('SELECT rowid, id, artist FROM artists;')
+                return [tuple(row) for row in cur.fetchall()]
+
+        def _rename(batch):
+            with self.cursor() as cur:
+                #the raw name becomes the display name unless one was already set
+                cur.executemany('''
+                    UPDATE artists
+                    SET artist = ?, artist_display = COALESCE(artist_display, ?)
+                    WHERE rowid = ?;
+                ''', batch)
+
+        def _merge(batch):
+            with self.cursor() as cur:
+                cur.execute("CREATE TEMP TABLE IF NOT EXISTS artist_merge (dup INTEGER PRIMARY KEY, survivor INTEGER);")
+                cur.execute("DELETE FROM artist_merge;")
+                cur.executemany("INSERT INTO artist_merge (dup, survivor) VALUES (?, ?);", batch)
+
+                #a title already linked to the survivor keeps that link, the duplicate one cascades away below
+                cur.execute('''
+                    UPDATE OR IGNORE title_artists
+                    SET artist_rowid = m.survivor
+                    FROM artist_merge m
+                    WHERE title_artists.artist_rowid = m.dup;
+                ''')
+                cur.execute('''
+                    UPDATE artists
+                    SET pref = MAX(artists.pref, merged.pref),
+                        artist_display = COALESCE(artists.artist_display, merged.artist_display)
+                    FROM (
+                        SELECT m.survivor, MAX(a.pref) AS pref, MIN(a.artist_display) AS artist_display
+                        FROM artist_merge m
+                        JOIN artists a ON a.rowid = m.dup
+                        GROUP BY m.survivor
+                    ) AS merged
+                    WHERE artists.rowid = merged.survivor;
+                ''')
+                cur.execute("DELETE FROM artists WHERE rowid IN (SELECT dup FROM artist_merge);")
+
+        renamed = merged = 0
+        for _ in range(3): #a track registered mid pass can add a row the scan missed, the next pass picks it up
+            renames, survivors, merges = [], {}, []
+            for rowid, id, artist in sorted(await self._atomic_db_op(_scan), key=lambda r: (r[1] is None, r[0])):
+                key = self._artist_key(artist)
+                if not key:
+                    continue
+                if key != artist:
+                    renames.append((key, artist, rowid))
+                if key not in survivors:
+                    survivors[key] = rowid
+                elif id is None:
+                    merges.append((rowid, survivors[key]))
+
+            if not renames and not merges:
+                break
+
+            for i in range(0, len(renames), batch_size):
+                await self._atomic_write_op(_rename, renames[i:i + batch_size])
+            for i in range(0, len(merges), batch_size):
+                await self._atomic_write_op(_merge, merges[i:i + batch_size])
+            renamed += len(renames)
+            merged += len(merges)
+
+        def _mark():
+            with self.cursor() as cur:
+                write_meta(cur, "artist_compaction_version", G.ARTIST_COMPACTION_VERSION)
+
+        await self._atomic_write_op(_mark)
+
+        if renamed or merged:
+            self._invalidate_search_cache()
+            self.request_search_refresh()
+
+        print(f"[{self.name}] Compacted artists, {renamed} renamed, {merged} merged")
+        return {"renamed": renamed, "merged": merged}
+
+
+    async def ensure_artist_compaction(self) -> bool:
+        """Startup check, starts compact_artists in the background if this database was never compacted. Returns whether it started."""
+        def _marker():
+            with self.cursor() as cur:
+                return read_meta(cur, "artist_compaction_version")
+
+        if await self._atomic_db_op(_marker) == str(G.ARTIST_COMPACTION_VERSION):
+            return False
+
+        self._artist_compaction = asyncio.create_task(self._run_artist_compaction())
+        return True
+
+
+    async def _run_artist_compaction(self):
+        try:
+            await self.compact_artists()
+        except Exception as e:
+            print(f"[{self.name}] Artist compaction failed ({e}), will retry on the next startup\n{traceback.format_exc()}")
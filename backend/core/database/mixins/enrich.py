@@ -15,24 +15,14 @@ class EnrichMixin:
     
         def _logic():
             with self.cursor() as cur:
+                #only the titles are used, so there's nothing to group
                 cur.execute(f"""
-                    SELECT 
-                        t.rowid,
-                        t.id,
-                        t.title,
-                        COALESCE(t.title_display, t.title) AS title_display,
-                        GROUP_CONCAT(a.artist, ', ') AS artists
-                    FROM titles t
-                    JOIN title_artists ta ON t.rowid = ta.title_rowid
-                    JOIN artists a ON ta.artist_rowid = a.rowid
-                    WHERE t.rowid IN (
-                        SELECT title_rowid
-                        FROM title_artists
-                        WHERE artist_rowid IN (
-                            {subquery}
-                        )
-                    )
-                    GROUP BY t.rowid;
+                    SELECT DISTINCT t.title
+                    FROM title_artists ta
+                    JOIN titles t ON t.rowid = ta.title_rowid
+                    WHERE ta.artist_rowid IN (
+                        {subquery}
+                    );
                 """, params)
 
                 results = cur.fetchall()
@@ -101,7 +91,9 @@ class EnrichMixin:
                         """, (new_rowid, old_id))
             return artist_rowid_map
             
-        return await self._atomic_db_op(_logic)
+        artist_rowid_map = await self._atomic_write_op(_logic)
+        self._invalidate_search_cache()
+        return artist_rowid_map
 
 
     async def batch_update_titles(self, titles: list):
@@ -129,8 +121,9 @@ class EnrichMixin:
             title_rowid_map = {}
 
             with self.cursor() as cur:
-                #create temp table to extract id and rowid mapping
-                cur.execute("CREATE TEMP TABLE staging_ids(id TEXT);")
+                #create temp table to extract id and rowid mapping, connections are pooled so clear out leftovers from a previous call
+                cur.execute("CREATE TEMP TABLE IF NOT EXISTS staging_ids(id TEXT);")
+                cur.execute("DELETE FROM staging_ids;")
                 
                 id_list = [(t['new_id'],) for t in titles]
                 cur.executemany("INSERT INTO staging_ids VALUES (?);", id_list)
@@ -151,7 +144,9 @@ class EnrichMixin:
             
             return title_rowid_map
 
-        return await self._atomic_db_op(_logic)
+        title_rowid_map = await self._atomic_write_op(_logic)
+        self._invalidate_search_cache()
+        return title_rowid_map
 
 
 
@@ -171,6 +166,7 @@ class EnrichMixin:
                     VALUES (?, ?);
                 """, translated_junctions)
 
-        await self._atomic_db_op(_logic)
+        await self._atomic_write_op(_logic)
+        self._invalidate_search_cache()
         return True
 
@@ -1,5 +1,6 @@
 from typing import Optional
 from backend.core.models.enums import AudioDatabaseAction as ADA
+from backend.core.database.pagination import NUMBER, decode_cursor, encode_cursor, page
 import backend.globals as G
 
 class GetsetMixin:
@@ -39,17 +40,10 @@ class GetsetMixin:
         def _logic():
             with self.cursor() as cur:
                 cur.execute('''
-                    SELECT
-                        t.id,
-                        COALESCE(t.title_display, t.title) AS title,
-                        GROUP_CONCAT(COALESCE(a.artist_display, a.artist), ', ') AS artist,
-                        t.duration
-                    FROM titles t
-                    INNER JOIN downloads d ON t.id = d.id
-                    LEFT JOIN title_artists ta ON t.rowid = ta.title_rowid
-                    LEFT JOIN artists a ON ta.artist_rowid = a.rowid
-                    GROUP BY t.id
-                    ORDER BY d.downloaded_at DESC;
+                    SELECT td.id, td.title, td.artist, td.duration
+                    FROM downloads d
+                    INNER JOIN track_display td ON td.id = d.id
+                    ORDER BY d.downloaded_at DESC, d.rowid DESC;
                 ''')
                 return [dict(row) for row in cur.fetchall()]
             
@@ -59,6 +53,74 @@ class GetsetMixin:
         return content
 
 
+    async def get_downloads_page(self, limit: int, cursor: Optional[str] = None) -> dict:
+        """
+        One page of get_downloads_content, newest first.
+
+        Keyed on (downloaded_at, rowid) and served by idx_downloads_downloaded_at, so a page costs the
+        same at the end of the library as at the start, and downloads landing while a client pages
+        through don't shift the pages after its cursor. Doesn't emit ADA.GET_DOWNLOADS_CONTENT,
+        clients listening for it expect the whole library.
+
+        Args:
+            limit (int): Tracks per page.
+            cursor (str, optional): next_cursor of the previous page.
+
+        Returns:
+            dict: {"content": list[dict], "next_cursor": str | None, "total": int}, tracks in the
+                get_downloads_content shape.
+
+        Raises:
+            InvalidCursorError: Malformed cursor, or one from a different listing.
+        """
+        #downloaded_at is a CURRENT_TIMESTAMP string from register_download, or unixepoch() from the column default
+        after = decode_cursor(cursor, "downloads", (str, *NUMBER), int) if cursor else None
+
+        def _logic():
+            where = "WHERE (downloaded_at, rowid) < (?, ?)" if after else ""
+            with self.cursor() as cur:
+                cur.execute(f'''
+                    SELECT
+                        d.downloaded_at,
+                        d.rowid AS download_rowid,
+                        td.id,
+                        td.title,
+                        td.artist,
+                        td.duration
+                    FROM (
+                        SELECT rowid, id, downloaded_at
+                        FROM downloads
+                        {where}
+                        ORDER BY downloaded_at DESC, rowid DESC
+                        LIMIT ?
+                    ) AS d
+                    INNER JOIN track_display td ON td.id = d.id
+                    ORDER BY d.downloaded_at DESC, d.rowid DESC;
+                ''', (*(after or ()), limit + 1))
+                rows = cur.fetchall()
+
+                cur.execute('SELECT COUNT(*) FROM downloads;')
+                total = cur.fetchone()[0]
+
+            next_cursor = None
+            if len(rows) > limit:
+                last = rows[limit - 1]
+                next_cursor = encode_cursor("downloads", last["downloaded_at"], last["download_rowid"])
+
+            content = [
+                {
+                    "id": row["id"],
+                    "title": row["title"],
+                    "artist": row["artist"],
+                    "duration": row["duration"]
+                }
+                for row in rows[:limit]
+            ]
+            return page(content, next_cursor, total)
+
+        return await self._atomic_db_op(_logic)
+
+
     async def get_all_playlists(self):
         def _logic():
             with self.cursor() as cur:
@@ -91,16 +153,16 @@ class GetsetMixin:
                 
                 #get track ids in one go
                 cur.execute('''
-                    SELECT track_id
+                    SELECT title_id
                     FROM playlist_titles 
                     WHERE playlist_id = ?
-                    ORDER BY position ASC;
+                    ORDER BY position ASC, title_id ASC;
                 ''', (playlist_id,))
 
                 return {
                     "id": playlist_row["id"],
                     "name": playlist_row["name"],
-                    "trackIds": [r["track_id"] for r in cur.fetchall()]
+                    "trackIds": [r["title_id"] for r in cur.fetchall()]
                 }
             
         content = await self._atomic_db_op(_logic)
@@ -109,6 +171,61 @@ class GetsetMixin:
         return content
         
 
+    async def get_playlist_page(self, playlist_id: int, limit: int, cursor: Optional[str] = None) -> dict:
+        """
+        One page of get_playlist_content, keyed on (position, title_id) and served by idx_playlist_titles_position.
+        Doesn't emit ADA.GET_PLAYLIST_CONTENT, clients listening for it expect the whole playlist.
+
+        Args:
+            playlist_id (int): Playlist to page through.
+            limit (int): Track ids per page.
+            cursor (str, optional): next_cursor of the previous page.
+
+        Returns:
+            dict: {"content": {"id", "name", "trackIds"}, "next_cursor": str | None, "total": int}
+
+        Raises:
+            InvalidCursorError: Malformed cursor, or one from a different listing.
+        """
+        scope = f"playlist:{playlist_id}"
+        after = decode_cursor(cursor, scope, NUMBER, str) if cursor else None
+
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('SELECT id, name FROM playlists WHERE id = ?;', (playlist_id,))
+                playlist_row = cur.fetchone()
+
+                if not playlist_row:
+                    return page({"id": playlist_id, "name": None, "trackIds": []}, None, 0)
+
+                where = "AND (position, title_id) > (?, ?)" if after else ""
+                cur.execute(f'''
+                    SELECT title_id, position
+                    FROM playlist_titles
+                    WHERE playlist_id = ? {where}
+                    ORDER BY position ASC, title_id ASC
+                    LIMIT ?;
+                ''', (playlist_id, *(after or ()), limit + 1))
+                rows = cur.fetchall()
+
+                cur.execute('SELECT COUNT(*) FROM playlist_titles WHERE playlist_id = ?;', (playlist_id,))
+                total = cur.fetchone()[0]
+
+            next_cursor = None
+            if len(rows) > limit:
+                last = rows[limit - 1]
+                next_cursor = encode_cursor(scope, last["position"], last["title_id"])
+
+            content = {
+                "id": playlist_row["id"],
+                "name": playlist_row["name"],
+                "trackIds": [row["title_id"] for row in rows[:limit]]
+            }
+            return page(content, next_cursor, total)
+
+        return await self._atomic_db_op(_logic)
+
+
     async def get_metadata(self, id: str, artist_delim: str = G.UNIT_SEP, include_artists: bool = False):
         """
         Retrieves a track's metadata by ID.
@@ -131,17 +248,14 @@ class GetsetMixin:
         def _logic():
             with self.cursor() as cur:
                 track_id = id #id is a reserved sqlite function
-                cur.execute(f'''
+                cur.execute('''
                     SELECT
-                        t.rowid,
-                        COALESCE(t.title_display, t.title) AS title,
-                        GROUP_CONCAT(COALESCE(a.artist_display, a.artist), '{artist_delim} ') AS artist
-                    FROM titles t
-                    LEFT JOIN title_artists ta ON t.rowid = ta.title_rowid
-                    LEFT JOIN artists a ON ta.artist_rowid = a.rowid
-                    WHERE t.id = ?
-                    GROUP BY t.rowid;
-                ''', (track_id,))
+                        rowid,
+                        title,
+                        REPLACE(artist_list, char(31), ?) AS artist
+                    FROM track_display
+                    WHERE id = ?;
+                ''', (f"{artist_delim} ", track_id))
                 row = cur.fetchone()
 
                 if not row:
@@ -206,25 +320,28 @@ class GetsetMixin:
                 search_id = metadata.get("new_id", id)
                 cur.execute('''
                     SELECT
-                        t.id AS updated_id,
-                        COALESCE(t.title_display, t.title) AS updated_title,
-                        GROUP_CONCAT(COALESCE(a.artist_display, a.artist), ', ') AS updated_artist
-                    FROM titles t
-                    LEFT JOIN title_artists ta ON t.rowid = ta.title_rowid
-                    LEFT JOIN artists a ON ta.artist_rowid = a.rowid
-                    WHERE t.id = ?
-                    GROUP BY t.id;
+                        rowid,
+                        id AS updated_id,
+                        title AS updated_title,
+                        artist AS updated_artist
+                    FROM track_display
+                    WHERE id = ?;
                 ''', (search_id,))
 
                 row = cur.fetchone()
-                return {
+                return row["rowid"], {
                     "id": id,
                     "newId": row["updated_id"],
                     "title": row["updated_title"],
                     "artist": row["updated_artist"]
                 }
 
-        content = await self._atomic_db_op(_logic)
+        rowid, content = await self._atomic_write_op(_logic)
+        self._invalidate_search_cache()
+        if metadata.get("title"):
+            self.request_search_refresh() #trg_fts_update_titles queued the row for FTS
+        #the typeahead also holds the display title and id, which the FTS triggers don't track
+        await self._emit_event(action=ADA.REFRESH_SEARCH_INDEX, payload={"rowids": [rowid]})
         await self._emit_event(action=ADA.SET_METADATA, payload={"content": content})
 
         return content
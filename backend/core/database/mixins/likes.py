@@ -1,4 +1,7 @@
+import json
+from typing import List, Optional
 from backend.core.models.enums import AudioDatabaseAction as ADA
+from backend.core.database.pagination import NUMBER, decode_cursor, encode_cursor, page
 
 class LikesMixin:
     async def toggle_like(self, id: str):
@@ -35,10 +38,50 @@ class LikesMixin:
                     cur.execute('INSERT INTO likes (id, position) VALUES (?, ?);', (id, new_position))
                     return "liked"
                 
-        status = await self._atomic_db_op(_logic)
+        status = await self._atomic_write_op(_logic)
         return status
 
 
+    async def like_tracks(self, ids: List[str]) -> List[str]:
+        """
+        Like many tracks in one transaction, emits a single ADA.LIKE_TRACKS event.
+
+        The new likes go on top like toggle_like, MIN(position) is read once and they take the
+        positions just above it, keeping the order given, so ids[0] ends up first. Tracks already
+        liked, or not downloaded, are skipped.
+
+        Args:
+            ids (list[str]): Track IDs to like, duplicates are ignored.
+
+        Returns:
+            list[str]: The IDs actually liked.
+        """
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('''
+                    SELECT j.value AS id
+                    FROM json_each(?) j
+                    JOIN downloads d ON d.id = j.value
+                    WHERE NOT EXISTS (SELECT 1 FROM likes l WHERE l.id = j.value)
+                    ORDER BY j.key;
+                ''', (json.dumps(list(dict.fromkeys(ids))),))
+                liked = [row["id"] for row in cur.fetchall()]
+
+                cur.execute('SELECT MIN(position) AS min_pos FROM likes;')
+                top = cur.fetchone()["min_pos"] or 0.0
+
+                cur.executemany(
+                    'INSERT INTO likes (id, position) VALUES (?, ?);',
+                    [(id, top - len(liked) + i) for i, id in enumerate(liked)]
+                )
+                return liked
+
+        liked = await self._atomic_write_op(_logic)
+        await self._emit_event(action=ADA.LIKE_TRACKS, payload={"content": {"ids": liked}})
+
+        return liked
+
+
     async def fetch_liked_tracks(self):
         """
         Retrieve the list of track IDs in the likes playlist, ordered by position.
@@ -59,7 +102,7 @@ class LikesMixin:
                 cur.execute('''
                     SELECT id
                     FROM likes
-                    ORDER BY position ASC;
+                    ORDER BY position ASC, rowid ASC;
                 ''')
                 return [row["id"] for row in cur.fetchall()]
             
@@ -69,13 +112,55 @@ class LikesMixin:
         return track_ids
 
 
+    async def fetch_liked_page(self, limit: int, cursor: Optional[str] = None) -> dict:
+        """
+        One page of fetch_liked_tracks, keyed on (position, rowid) and served by idx_likes_position.
+        Doesn't emit ADA.FETCH_LIKES, clients listening for it expect the whole list.
+
+        Args:
+            limit (int): Track ids per page.
+            cursor (str, optional): next_cursor of the previous page.
+
+        Returns:
+            dict: {"content": list[str], "next_cursor": str | None, "total": int}
+
+        Raises:
+            InvalidCursorError: Malformed cursor, or one from a different listing.
+        """
+        after = decode_cursor(cursor, "likes", NUMBER, int) if cursor else None
+
+        def _logic():
+            where = "WHERE (position, rowid) > (?, ?)" if after else ""
+            with self.cursor() as cur:
+                cur.execute(f'''
+                    SELECT id, position, rowid
+                    FROM likes
+                    {where}
+                    ORDER BY position ASC, rowid ASC
+                    LIMIT ?;
+                ''', (*(after or ()), limit + 1))
+                rows = cur.fetchall()
+
+                cur.execute('SELECT COUNT(*) FROM likes;')
+                total = cur.fetchone()[0]
+
+            next_cursor = None
+            if len(rows) > limit:
+                last = rows[limit - 1]
+                next_cursor = encode_cursor("likes", last["position"], last["rowid"])
+
+            return page([row["id"] for row in rows[:limit]], next_cursor, total)
+
+        return await self._atomic_db_op(_logic)
+
+
     async def reorder_likes_track(self, from_index: int, to_index: int):
         """
         Reorder a track within the system likes playlist by moving it from one index to another.
 
-        This method updates the `position` column of the track to reflect its new order
-        in the playlist. It uses floating point indexing and sqlite3 indexes (see Build) 
-        to allow fast lookup and insertion without renumbering the entire playlist.
+        Only the moved track's `position` is written, the midpoint of its new neighbours, which are
+        looked up on idx_likes_position in (position, rowid) order instead of loading the list. See
+        PositionsMixin for how shrinking gaps get rebalanced.
 
         Args:
             from_index (int): The current 0-based index of the track to move.
@@ -84,29 +169,4 @@ class LikesMixin:
         Returns:
             bool: Success or failure
         """
-        def _logic():
-            with self.cursor() as cur:
-                #fetch tracks ordered by position
-                cur.execute('SELECT id, position FROM likes ORDER BY position ASC;')
-                rows = [dict(row) for row in cur.fetchall()]
-
-                n = len(rows) - 1 #have to account for removal of the element being reordered. to_index cannot be >= len(rows) - 1
-                if n == 0 or from_index < 0 or from_index > n or to_index < 0 or to_index > n:
-                    return False
-                
-                #remove the moved track so indices reflect post-removal state
-                moved_row = rows.pop(from_index)
-                track_id = moved_row["id"]
-
-                if to_index == 0:
-                    new_position = rows[0]["position"] - 1.0
-                elif to_index == n:                               #this is the last element
-                    new_position = rows[-1]["position"] + 1.0
-                else:
-                    new_position = (rows[to_index - 1]["position"] + rows[to_index]["position"]) / 2.0
-
-                cur.execute('UPDATE likes SET position = ? WHERE id = ?;', (new_position, track_id))
-                return True
-        
-        return await self._atomic_db_op(_logic)
-    
\ No newline at end of file
+        return await self._reorder_position("likes", from_index, to_index)
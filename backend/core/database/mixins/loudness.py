@@ -0,0 +1,78 @@
+from typing import Optional
+from backend.core.database.migrations import read_meta, write_meta
+import backend.globals as G
+
+
+class LoudnessMixin:
+    """
+    ReplayGain style loudness, for AudioProcessor's "gain" mode. Files keep the level they were
+    downloaded at, their measured integrated loudness and true peak are stored here with the gain that
+    brings them to the target, and playback applies the gain.
+
+    The gain is target - integrated, capped at LOUDNESS_TRUE_PEAK - true_peak so a quiet track with
+    loud peaks isn't pushed into clipping. The target lives in the meta table, retarget_loudness moves
+    every track to a new one with a single UPDATE and no file is touched.
+    """
+    def _loudness_target(self, cur) -> float:
+        target = read_meta(cur, "loudness_target")
+        return float(target) if target is not None else G.LOUDNESS_TARGET
+
+
+    async def set_loudness(self, id: str, loudness: dict):
+        """
+        Stores a downloaded track's measured loudness.
+
+        Args:
+            id (str): Track ID, must be downloaded.
+            loudness (dict): {"integrated" LUFS, "true_peak" dBTP, "lra" LU}, see AudioProcessor.measure_loudness.
+        """
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('''
+                    INSERT OR REPLACE INTO loudness (id, integrated, true_peak, lra, gain)
+                    VALUES (?1, ?2, ?3, ?4, MIN(?5 - ?2, ?6 - ?3));
+                ''', (
+                    id,
+                    loudness["integrated"],
+                    loudness["true_peak"],
+                    loudness.get("lra"),
+                    self._loudness_target(cur),
+                    G.LOUDNESS_TRUE_PEAK,
+                ))
+
+        await self._atomic_write_op(_logic)
+
+
+    async def get_loudness(self, id: str) -> Optional[dict]:
+        """
+        Returns:
+            dict | None: {"integrated", "true_peak", "lra", "gain", "target"}, None for a track that was
+                never measured, e.g. one normalized when it was downloaded.
+        """
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('SELECT integrated, true_peak, lra, gain FROM loudness WHERE id = ?;', (id,))
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                return {**dict(row), "target": self._loudness_target(cur)}
+
+        return await self._atomic_db_op(_logic)
+
+
+    async def retarget_loudness(self, target: float) -> int:
+        """
+        Moves playback loudness of every measured track to a new target in LUFS.
+
+        Returns:
+            int: Tracks whose gain was recomputed.
+        """
+        def _logic():
+            with self.cursor() as cur:
+                write_meta(cur, "loudness_target", float(target))
+                cur.execute('UPDATE loudness SET gain = MIN(? - integrated, ? - true_peak);', (float(target), G.LOUDNESS_TRUE_PEAK))
+                return cur.rowcount
+
+        count = await self._atomic_write_op(_logic)
+        print(f"[{self.name}] Loudness target now {target} LUFS, {count} tracks regained")
+        return count
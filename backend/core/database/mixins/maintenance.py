@@ -0,0 +1,126 @@
+import os
+import time
+from typing import Sequence
+import backend.globals as G
+
+
+MAINTENANCE_STEPS = ("resolve_prune", "analyze", "fts_merge", "incremental_vacuum", "checkpoint")
+
+
+class MaintenanceMixin:
+    """
+    Housekeeping nothing else does: dropping expired resolve_cache entries, planner statistics, FTS5
+    segment merging, returning free pages to the filesystem and truncating the WAL. Run by MaintenanceWorker, see backend/core/worker/maintenance.py.
+
+    Every step but the checkpoint goes through the writer like any other write, so foreground writes
+    wait at most one step. The checkpoint runs on a pooled connection, it can't truncate the WAL from
+    inside the writer's own transaction.
+    """
+    async def database_metrics(self) -> dict:
+        """File and WAL size, free pages and the fraction of the file they take up"""
+        def _logic():
+            with self.cursor() as cur:
+                pragmas = {}
+                for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum"):
+                    cur.execute(f"PRAGMA {pragma};")
+                    pragmas[pragma] = cur.fetchone()[0]
+                return pragmas
+
+        pragmas = await self._atomic_db_op(_logic)
+
+        wal = f"{self._filepath}-wal"
+        return {
+            **pragmas,
+            "file_bytes": os.path.getsize(self._filepath) if os.path.exists(self._filepath) else 0,
+            "wal_bytes": os.path.getsize(wal) if os.path.exists(wal) else 0,
+            "fragmentation": pragmas["freelist_count"] / pragmas["page_count"] if pragmas["page_count"] else 0.0,
+        }
+
+
+    def _analyze(self, cur):
+        #a database that was never analyzed gets the full pass once, after that optimize only redoes what drifted
+        cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1';")
+        if cur.fetchone() is None:
+            cur.execute("ANALYZE;")
+            return "full"
+        cur.execute("PRAGMA optimize;")
+        return "optimize"
+
+
+    def _fts_merge(self, cur):
+        cur.execute("INSERT INTO catalog_fts (catalog_fts, rank) VALUES ('merge', ?);", (G.MAINTENANCE_FTS_MERGE_PAGES,))
+        return G.MAINTENANCE_FTS_MERGE_PAGES
+
+
+    def _incremental_vacuum(self, cur):
+        cur.execute("PRAGMA auto_vacuum;")
+        if cur.fetchone()[0] != 2: #only databases created with auto_vacuum = INCREMENTAL, see _get_connection
+            return 0
+
+        cur.execute("PRAGMA freelist_count;")
+        pages = min(cur.fetchone()[0], G.MAINTENANCE_VACUUM_PAGES)
+        #the python driver steps a statement without result columns once, which frees one page
+        for _ in range(pages):
+            cur.execute("PRAGMA incremental_vacuum(1);")
+        return pages
+
+
+    async def checkpoint_wal(self) -> dict:
+        """Copies the WAL back into the database file and truncates it. busy is 1 if a reader kept it from finishing."""
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+                busy, log, checkpointed = cur.fetchone()
+                return {"busy": busy, "log_frames": log, "checkpointed_frames": checkpointed}
+
+        return await self._atomic_db_op(_logic)
+
+
+    async def run_maintenance(self, steps: Sequence[str] = MAINTENANCE_STEPS) -> dict:
+        """
+        Runs the given steps in order and times each one.
+
+        Returns:
+            dict: {"at", "steps": {step: {"ms", "result"} or {"ms", "error"}}, "before", "after"},
+                also kept for maintenance_stats.
+        """
+        write_steps = {
+            "resolve_prune": self._prune_resolve_cache,
+            "analyze": self._analyze,
+            "fts_merge": self._fts_merge,
+            "incremental_vacuum": self._incremental_vacuum,
+        }
+
+        before = await self.database_metrics()
+        report = {}
+        for step in steps:
+            start = time.perf_counter()
+            try:
+                if step == "checkpoint":
+                    result = await self.checkpoint_wal()
+                else:
+                    def _logic(step=step):
+                        with self.cursor() as cur:
+                            return write_steps[step](cur)
+                    result = await self._atomic_write_op(_logic)
+                report[step] = {"ms": (time.perf_counter() - start) * 1000, "result": result}
+            except Exception as e:
+                report[step] = {"ms": (time.perf_counter() - start) * 1000, "error": str(e)}
+                print(f"[{self.name}] Maintenance step {step} failed ({e})")
+
+        run = {"at": int(time.time()), "steps": report, "before": before, "after": await self.database_metrics()}
+        self._maintenance_runs += 1
+        self._maintenance_last = run
+
+        print(f"[{self.name}] Maintenance done, " + ", ".join(f"{step} {r['ms']:.1f}ms" for step, r in report.items()))
+        return run
+
+
+    def db_activity(self) -> int:
+        """Grows with every database operation, the maintenance worker treats an unchanged value as idle"""
+        writer = self._writer.stats()
+        return self._executor.stats()["submitted"] + writer["ops"] + writer["pending"]
+
+
+    def maintenance_stats(self) -> dict:
+        return {"runs": self._maintenance_runs, "last": self._maintenance_last}
@@ -1,3 +1,5 @@
+import json
+from typing import List, Optional
 from backend.core.models.enums import AudioDatabaseAction as ADA
 
 class PlaylistsMixin:
@@ -8,7 +10,7 @@ class PlaylistsMixin:
                 row = cur.fetchone()
                 return row["id"]
             
-        new_id = await self._atomic_db_op(_logic)
+        new_id = await self._atomic_write_op(_logic)
         content = {
             "temp_id": temp_id, 
             "id": new_id, 
@@ -37,33 +39,33 @@ class PlaylistsMixin:
                   - "id" (str): Playlist ID
                   - "checked" (bool | None): Desired membership state
         """
+        added = [p["id"] for p in playlist_updates if p["checked"] is True]
+        removed = [p["id"] for p in playlist_updates if p["checked"] is False]
+
+        #one statement per direction however many playlists there are
         def _logic():
             with self.cursor() as cur:
-                for playlist in playlist_updates:
-                    playlist_id, checked = playlist["id"], playlist["checked"]
-
-                    if checked is True:
-                        #insert new track at bottom of playlist (max+1) or keep existing
-                        cur.execute('''
-                            SELECT MAX(position) AS max_pos
-                            FROM playlist_titles
-                            WHERE playlist_id = ?;
-                        ''', (playlist_id,))
-                        result = cur.fetchone()["max_pos"]
-                        new_position = (result or 0.0) + 1.0
-
-                        #insert with position
-                        cur.execute('''
-                            INSERT INTO playlist_titles (playlist_id, title_id, position)
-                            VALUES (?, ?, ?)
-                            ON CONFLICT(playlist_id, title_id) DO NOTHING;
-                        ''', (playlist_id, track_id, new_position))
-                    
-                    else:
-                        cur.execute('DELETE FROM playlist_titles WHERE playlist_id = ? AND title_id = ?;', (playlist_id, track_id))
+                if added:
+                    #bottom of each playlist (its max+1), or kept where it is if already in it
+                    cur.execute('''
+                        INSERT INTO playlist_titles (playlist_id, title_id, position)
+                        SELECT
+                            j.value,
+                            ?,
+                            COALESCE((SELECT MAX(position) FROM playlist_titles WHERE playlist_id = j.value), 0.0) + 1.0
+                        FROM json_each(?) j
+                        WHERE true
+                        ON CONFLICT(playlist_id, title_id) DO NOTHING;
+                    ''', (track_id, json.dumps(added)))
+
+                if removed:
+                    cur.execute('''
+                        DELETE FROM playlist_titles
+                        WHERE title_id = ? AND playlist_id IN (SELECT value FROM json_each(?));
+                    ''', (track_id, json.dumps(removed)))
             return True
         
-        await self._atomic_db_op(_logic)
+        await self._atomic_write_op(_logic)
         content = {
             "id": track_id,
             "updates": playlist_updates
@@ -71,57 +73,183 @@ class PlaylistsMixin:
         await self._emit_event(ADA.UPDATE_PLAYLISTS, payload={"content": content})
 
 
+    async def add_tracks_to_playlist(self, playlist_id: int, track_ids: List[str]) -> Optional[dict]:
+        """
+        Append many tracks to a playlist in one transaction.
+
+        The playlist's MAX(position) is read once and the new tracks take the next positions in the
+        order given. Tracks already in the playlist, or not downloaded, are skipped. Emits a single
+        ADA.UPDATE_PLAYLIST_TRACKS event for the whole batch.
+
+        Args:
+            playlist_id (int): The playlist to add to.
+            track_ids (list[str]): Track IDs, duplicates are ignored.
+
+        Returns:
+            dict: {"id": playlist_id, "added": list[str], "removed": []}
+            None: if the playlist doesn't exist.
+        """
+        def _logic():
+            with self.cursor() as cur:
+                return self._append_tracks(cur, playlist_id, track_ids)
+
+        added = await self._atomic_write_op(_logic)
+        if added is None:
+            return None
+
+        content = {
+            "id": playlist_id,
+            "added": added,
+            "removed": []
+        }
+        await self._emit_event(action=ADA.UPDATE_PLAYLIST_TRACKS, payload={"content": content})
+
+        return content
+
+
+    def _append_tracks(self, cur, playlist_id: int, track_ids: List[str]) -> Optional[List[str]]:
+        """Appends the downloaded tracks not in the playlist yet, in order. Returns the ones added, None if there's no such playlist."""
+        ids = list(dict.fromkeys(track_ids)) #dedupe, keeps order
+
+        cur.execute('SELECT 1 FROM playlists WHERE id = ?;', (playlist_id,))
+        if cur.fetchone() is None:
+            return None
+
+        cur.execute('''
+            SELECT j.value AS id
+            FROM json_each(?) j
+            JOIN downloads d ON d.id = j.value
+            WHERE NOT EXISTS (
+                SELECT 1 FROM playlist_titles pt
+                WHERE pt.playlist_id = ? AND pt.title_id = j.value
+            )
+            ORDER BY j.key;
+        ''', (json.dumps(ids), playlist_id))
+        added = [row["id"] for row in cur.fetchall()]
+
+        #insert new tracks at bottom of playlist (max+1, max+2, ...)
+        cur.execute('''
+            SELECT MAX(position) AS max_pos
+            FROM playlist_titles
+            WHERE playlist_id = ?;
+        ''', (playlist_id,))
+        start = (cur.fetchone()["max_pos"] or 0.0) + 1.0
+
+        cur.executemany('''
+            INSERT INTO playlist_titles (playlist_id, title_id, position)
+            VALUES (?, ?, ?);
+        ''', [(playlist_id, id, start + i) for i, id in enumerate(added)])
+        return added
+
+
+    async def queue_playlist_updates(self, track_id: str, playlist_updates: list[dict]):
+        """
+        update_track_playlists for writers adding one track at a time, like a playlist import finishing
+        its downloads. Additions are held for the _playlist_adds scheduler, which appends everything
+        queued within the debounce window in one transaction with one event per playlist. Removals
+        aren't batched, they go straight to update_track_playlists.
+
+        Args:
+            track_id (str): A downloaded track.
+            playlist_updates (list[dict]): Same shape as update_track_playlists.
+        """
+        removals = [p for p in playlist_updates if p["checked"] is not True]
+        for playlist in playlist_updates:
+            if playlist["checked"] is True:
+                self._playlist_adds_pending.setdefault(playlist["id"], []).append(track_id)
+
+        if len(removals) < len(playlist_updates):
+            self._playlist_adds.request()
+        if removals:
+            await self.update_track_playlists(track_id, removals)
+
+
+    async def apply_playlist_adds(self) -> int:
+        """
+        Appends every track queued by queue_playlist_updates, run by the _playlist_adds scheduler.
+
+        Returns:
+            int: Tracks added.
+        """
+        pending, self._playlist_adds_pending = self._playlist_adds_pending, {}
+        if not pending:
+            return 0
+
+        def _logic():
+            with self.cursor() as cur:
+                return {playlist_id: self._append_tracks(cur, playlist_id, ids) for playlist_id, ids in pending.items()}
+
+        try:
+            added = await self._atomic_write_op(_logic)
+        except Exception:
+            for playlist_id, ids in pending.items():
+                self._playlist_adds_pending.setdefault(playlist_id, [])[:0] = ids #ahead of anything queued since
+            raise
+
+        for playlist_id, ids in added.items():
+            if ids:
+                content = {"id": playlist_id, "added": ids, "removed": []}
+                await self._emit_event(action=ADA.UPDATE_PLAYLIST_TRACKS, payload={"content": content})
+
+        return sum(len(ids or ()) for ids in added.values())
+
+
+    async def flush_playlist_adds(self) -> int:
+        return await self._playlist_adds.flush()
+
+
+    def playlist_adds_stats(self) -> dict:
+        return {**self._playlist_adds.stats(), "pending": sum(len(ids) for ids in self._playlist_adds_pending.values())}
+
+
+    async def remove_tracks_from_playlist(self, playlist_id: int, track_ids: List[str]) -> dict:
+        """
+        Remove many tracks from a playlist in one statement, emits a single ADA.UPDATE_PLAYLIST_TRACKS event.
+
+        Args:
+            playlist_id (int): The playlist to remove from.
+            track_ids (list[str]): Track IDs, ones not in the playlist are ignored.
+
+        Returns:
+            dict: {"id": playlist_id, "added": [], "removed": list[str]}
+        """
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('''
+                    DELETE FROM playlist_titles
+                    WHERE playlist_id = ? AND title_id IN (SELECT value FROM json_each(?))
+                    RETURNING title_id;
+                ''', (playlist_id, json.dumps(track_ids)))
+                return {row["title_id"] for row in cur.fetchall()}
+
+        removed = await self._atomic_write_op(_logic)
+        content = {
+            "id": playlist_id,
+            "added": [],
+            "removed": [id for id in dict.fromkeys(track_ids) if id in removed]
+        }
+        await self._emit_event(action=ADA.UPDATE_PLAYLIST_TRACKS, payload={"content": content})
+
+        return content
+
+
     async def reorder_playlist_track(self, playlist_id: int, from_index: int, to_index: int):
         """
         Reorder a track within a playlist by moving it from one index to another.
 
-        This method updates the `position` column of the track to reflect its new order
-        in the playlist. It uses floating point indexing and sqlite3 indexes (see Build) 
-        to allow fast lookup and insertion without renumbering the entire playlist.
+        Only the moved track's `position` is written, the midpoint of its new neighbours, which are
+        looked up on idx_playlist_titles_position in (position, title_id) order instead of loading the
+        playlist. See PositionsMixin for how shrinking gaps get rebalanced.
 
         Args:
-            playlist_id (int): The ID of the playlist to rename.
+            playlist_id (int): The ID of the playlist to reorder.
             from_index (int): The current 0-based index of the track to move.
             to_index (int): Target 0-based index to move the track to.
 
         Returns:
-            
+            bool: Success or failure
         """
-        def _logic():
-            with self.cursor() as cur:
-                #fetch playlist tracks ordered by position
-                cur.execute('''
-                    SELECT title_id, position
-                    FROM playlist_titles
-                    WHERE playlist_id = ?
-                    ORDER BY position ASC;
-                ''', (playlist_id,))
-                rows = [dict(row) for row in cur.fetchall()]
-
-                n = len(rows) - 1 #have to account for removal of the element being reordered. to_index cannot be >= len(rows) - 1
-                if n == 0 or from_index < 0 or from_index > n or to_index < 0 or to_index > n:
-                    return False #invalid
-
-                #remove the moved track so indices reflect post-removal state
-                moved_row = rows.pop(from_index)
-                track_id = moved_row["title_id"]
-
-                if to_index == 0:
-                    new_position = rows[0]["position"] - 1.0
-                elif to_index == n:                               #this is the last element
-                    new_position = rows[-1]["position"] + 1.0
-                else:
-                    new_position = (rows[to_index - 1]["position"] + rows[to_index]["position"]) / 2.0
-
-                #update
-                cur.execute('''
-                    UPDATE playlist_titles
-                    SET position = ?
-                    WHERE playlist_id = ? AND title_id = ?;                    
-                ''', (new_position, playlist_id, track_id))
-                return True
-        
-        return await self._atomic_db_op(_logic)
+        return await self._reorder_position(playlist_id, from_index, to_index)
 
 
     async def edit_playlist(self, playlist_id: int, name: str):
@@ -139,7 +267,7 @@ class PlaylistsMixin:
             with self.cursor() as cur:
                 cur.execute('UPDATE playlists SET name = ? WHERE id = ?;', (name, playlist_id))
 
-        await self._atomic_db_op(_logic)
+        await self._atomic_write_op(_logic)
         content = {
             "id": playlist_id,
             "name": name
@@ -163,7 +291,7 @@ class PlaylistsMixin:
             with self.cursor() as cur:
                 cur.execute('DELETE FROM playlists WHERE id = ?;', (playlist_id,))
 
-        await self._atomic_db_op(_logic)
+        await self._atomic_write_op(_logic)
         content = {
             "id": playlist_id
         }
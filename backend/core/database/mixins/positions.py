@@ -0,0 +1,144 @@
+from typing import Tuple, Union
+import backend.globals as G
+
+
+PositionList = Union[str, int] #"likes", or a playlist id
+
+
+class PositionsMixin:
+    """
+    Float positions for the ordered lists, likes and playlists.
+
+    A move writes one row, the midpoint of its new neighbours, and the neighbours are found by walking
+    the position index with LIMIT/OFFSET instead of loading the list. Every halving shrinks the gap, so
+    a move that leaves a gap under POSITION_MIN_GAP queues its list for rebalance_positions, which
+    renumbers it 1..n in the background. A gap too small to split at all is renumbered on the spot.
+    """
+    def _position_list(self, key: PositionList) -> Tuple[str, str, tuple, str]:
+        """Table, scope predicate and its params, and the column that breaks position ties and identifies a row"""
+        if key == "likes":
+            return "likes", "TRUE", (), "rowid"
+        return "playlist_titles", "playlist_id = ?", (key,), "title_id"
+
+
+    def _move_position(self, cur, key: PositionList, from_index: int, to_index: int) -> Tuple[bool, bool]:
+        """
+        Moves the row at from_index so it ends up at to_index, both 0-based and to_index counted
+        with the row already taken out, like list.insert(to_index, list.pop(from_index)).
+
+        Returns:
+            tuple[bool, bool]: Whether the row moved, and whether the gap it went into needs a rebalance.
+        """
+        if from_index < 0 or to_index < 0:
+            return False, False
+
+        table, scope, params, tie = self._position_list(key)
+        order = f"position ASC, {tie} ASC"
+
+        cur.execute(f'''
+            SELECT {tie} AS tie
+            FROM {table}
+            WHERE {scope}
+            ORDER BY {order}
+            LIMIT 1 OFFSET ?;
+        ''', (*params, from_index))
+        row = cur.fetchone()
+        if row is None:
+            return False, False
+        moved = row["tie"]
+
+        crowded = False
+        for _ in range(2):
+            #the rows at to_index - 1 and to_index once the moved one is out
+            cur.execute(f'''
+                SELECT position
+                FROM {table}
+                WHERE {scope} AND {tie} != ?
+                ORDER BY {order}
+                LIMIT ? OFFSET ?;
+            ''', (*params, moved, 1 if to_index == 0 else 2, max(to_index - 1, 0)))
+            neighbours = [row["position"] for row in cur.fetchall()]
+            if not neighbours:
+                return False, False #single row list, or to_index past the end
+
+            if to_index == 0:
+                new_position = neighbours[0] - 1.0
+            elif len(neighbours) == 1:                           #this is the last element
+                new_position = neighbours[0] + 1.0
+            else:
+                before, after = neighbours
+                new_position = (before + after) / 2.0
+                if not before < new_position < after:
+                    self._renumber_positions(cur, key) #nothing left between them, the renumbered list has room
+                    continue
+                crowded = after - before < 2 * G.POSITION_MIN_GAP
+            break
+
+        cur.execute(f'''
+            UPDATE {table}
+            SET position = ?
+            WHERE {scope} AND {tie} = ?;
+        ''', (new_position, *params, moved))
+        return True, crowded
+
+
+    def _renumber_positions(self, cur, key: PositionList) -> int:
+        """Positions back to 1..n in the current order. Returns the rows renumbered."""
+        table, scope, params, tie = self._position_list(key)
+        cur.execute(f'''
+            UPDATE {table}
+            SET position = ranked.n
+            FROM (
+                SELECT {tie} AS tie, ROW_NUMBER() OVER (ORDER BY position ASC, {tie} ASC) AS n
+                FROM {table}
+                WHERE {scope}
+            ) AS ranked
+            WHERE {scope} AND {table}.{tie} = ranked.tie;
+        ''', (*params, *params))
+        return cur.rowcount
+
+
+    async def _reorder_position(self, key: PositionList, from_index: int, to_index: int) -> bool:
+        def _logic():
+            with self.cursor() as cur:
+                return self._move_position(cur, key, from_index, to_index)
+
+        moved, crowded = await self._atomic_write_op(_logic)
+        if crowded:
+            self._rebalance_pending.add(key)
+            self._position_rebalance.request()
+        return moved
+
+
+    async def rebalance_positions(self) -> int:
+        """
+        Renumbers every list queued by a crowded move, run by the _position_rebalance scheduler.
+        Keyset page cursors taken before a renumber point at stale positions, the order itself is kept.
+
+        Returns:
+            int: Rows renumbered.
+        """
+        keys, self._rebalance_pending = self._rebalance_pending, set()
+        if not keys:
+            return 0
+
+        def _logic():
+            with self.cursor() as cur:
+                return sum(self._renumber_positions(cur, key) for key in keys)
+
+        try:
+            rows = await self._atomic_write_op(_logic)
+        except Exception:
+            self._rebalance_pending |= keys
+            raise
+
+        print(f"[{self.name}] Rebalanced {len(keys)} list(s), {rows} positions")
+        return rows
+
+
+    async def flush_position_rebalance(self) -> int:
+        return await self._position_rebalance.flush()
+
+
+    def position_rebalance_stats(self) -> dict:
+        return {**self._position_rebalance.stats(), "pending": len(self._rebalance_pending)}
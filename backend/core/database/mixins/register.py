@@ -1,3 +1,5 @@
+import json
+from typing import List
 from backend.core.models.track import Track
 from backend.core.models.enums import AudioDatabaseAction as ADA
 
@@ -20,7 +22,8 @@ class RegisterMixin:
             track (Track): A Track object containing at least:
                 - id (str): Unique track ID (primary key).
                 - title (str): Track title.
-                - artist (str|None): Track artist. Creates a new artist entry with blank id.
+                - artist (str|None): Track artist. Linked to the existing artist with the same normalized
+                  name, or a new artist entry with blank id. No artist links to the shared "" artist.
                 - duration (float|None): Track duration in seconds.
 
         Emits:
@@ -45,13 +48,8 @@ class RegisterMixin:
                 ''', (track.id, track.title, track.duration))
                 title_rowid = cur.fetchone()[0]
 
-                #insert artist
-                cur.execute('''
-                    INSERT INTO artists (artist) 
-                    VALUES (?) 
-                    RETURNING rowid;
-                ''', (track.artist,))
-                artist_rowid = cur.fetchone()[0]
+                #reuse the artist with the same normalized name, see ArtistsMixin
+                artist_rowid = self._resolve_artist(cur, track.artist)
 
                 #link
                 cur.execute('''
@@ -60,9 +58,11 @@ class RegisterMixin:
                 ''', (title_rowid, artist_rowid))
                 return True
         
-        registered = await self._atomic_db_op(_logic)
+        registered = await self._atomic_write_op(_logic)
         
         if registered:
+            self._invalidate_search_cache()
+
             content = {
                 "id": track.id,
                 "title": track.title,
@@ -103,7 +103,9 @@ class RegisterMixin:
             with self.cursor() as cur:
                 cur.execute('DELETE FROM titles WHERE id = ?;', (id,))
 
-        await self._atomic_db_op(_logic)
+        await self._atomic_write_op(_logic)
+        self._invalidate_search_cache()
+        self.request_search_refresh() #trg_fts_delete_titles queued the row for FTS
 
         content = {
             "id": id
@@ -172,16 +174,9 @@ class RegisterMixin:
 
                 #metadata
                 cur.execute('''
-                    SELECT 
-                        t.id,
-                        COALESCE(t.title_display, t.title) AS title,
-                        GROUP_CONCAT(COALESCE(a.artist_display, a.artist), ', ') AS artist,
-                        t.duration
-                    FROM titles t
-                    LEFT JOIN title_artists ta ON t.rowid = ta.title_rowid
-                    LEFT JOIN artists a ON ta.artist_rowid = a.rowid
-                    WHERE t.id = ?
-                    GROUP BY t.id;
+                    SELECT id, title, artist, duration
+                    FROM track_display
+                    WHERE id = ?;
                 ''', (id,))
 
                 row = cur.fetchone()
@@ -189,9 +184,10 @@ class RegisterMixin:
                     return None
                 return dict(row)
         
-        track = await self._atomic_db_op(_logic)
+        track = await self._atomic_write_op(_logic)
         if track is None:
             raise ValueError(f"Track with id {id} does not exist in TITLES")
+        self._invalidate_search_cache() #downloaded tracks rank higher
 
         #emit event with full track object
         await self._emit_event(action=ADA.REGISTER_DOWNLOAD, payload={"content": track})
@@ -230,13 +226,44 @@ class RegisterMixin:
             with self.cursor() as cur:
                 cur.execute('DELETE FROM downloads WHERE id = ?;', (id,))
 
-        await self._atomic_db_op(_logic)
+        await self._atomic_write_op(_logic)
+        self._invalidate_search_cache()
         content = {
             "id": id
         }
         await self._emit_event(action=ADA.UNREGISTER_DOWNLOAD, payload={"content": content})
             
 
+    async def unregister_downloads(self, ids: List[str]) -> List[str]:
+        """
+        Bulk unregister_download, one statement and a single ADA.UNREGISTER_DOWNLOADS event for the batch.
+
+        Args:
+            ids (list[str]): Track IDs whose download entries should be removed, ones that aren't downloaded are ignored.
+
+        Returns:
+            list[str]: The IDs actually removed, in the order given.
+        """
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('''
+                    DELETE FROM downloads
+                    WHERE id IN (SELECT value FROM json_each(?))
+                    RETURNING id;
+                ''', (json.dumps(ids),))
+                return {row["id"] for row in cur.fetchall()}
+
+        deleted = await self._atomic_write_op(_logic)
+        self._invalidate_search_cache()
+        removed = [id for id in dict.fromkeys(ids) if id in deleted]
+        content = {
+            "ids": removed
+        }
+        await self._emit_event(action=ADA.UNREGISTER_DOWNLOADS, payload={"content": content})
+
+        return removed
+
+
     async def is_downloaded(self, track_id: str) -> bool:
         """
         Check if a track exists in the DOWNLOADS table (i.e., is downloaded).
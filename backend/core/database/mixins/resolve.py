@@ -0,0 +1,81 @@
+import time
+from typing import Optional, Tuple
+from backend.core.lib.utils import normalize_for_search
+import backend.globals as G
+
+
+class ResolveMixin:
+    """
+    Remembers which video a search query resolved to, so DownloadWorker only spawns a yt-dlp search
+    for queries it hasn't seen. Keyed on the normalize_for_search form of the query, which covers
+    both typed queries and the "title artist" ones built for SEED___ tracks.
+
+    A query that found nothing is cached too, as a NULL video_id with a much shorter TTL, since
+    YouTubeClient.search also returns nothing when yt-dlp itself failed.
+    """
+    async def get_resolved(self, query: str) -> Tuple[bool, Optional[str]]:
+        """
+        Returns:
+            tuple[bool, str|None]: Whether the cache had a live entry, and the video id, None if the
+                query is known to find nothing.
+        """
+        key = normalize_for_search(query)
+        if not key:
+            return False, None
+
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('''
+                    SELECT video_id
+                    FROM resolve_cache
+                    WHERE query = ?
+                      AND resolved_at > unixepoch() - IIF(video_id IS NULL, ?, ?);
+                ''', (key, G.RESOLVE_CACHE_NEGATIVE_TTL, G.RESOLVE_CACHE_TTL))
+                return cur.fetchone()
+
+        row = await self._atomic_db_op(_logic)
+        if row is None:
+            self._resolve_stats["misses"] += 1
+            return False, None
+
+        self._resolve_stats["negative_hits" if row["video_id"] is None else "hits"] += 1
+        return True, row["video_id"]
+
+
+    async def cache_resolved(self, query: str, video_id: Optional[str]):
+        """Stores what a query resolved to, None if it found nothing"""
+        key = normalize_for_search(query)
+        if not key:
+            return
+
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('''
+                    INSERT OR REPLACE INTO resolve_cache (query, video_id, resolved_at)
+                    VALUES (?, ?, unixepoch());
+                ''', (key, video_id or None))
+
+        await self._atomic_write_op(_logic)
+
+
+    async def forget_resolved(self, video_id: str) -> int:
+        """Drops every query that resolved to this video, for ids that turned out not to download. Returns the rows dropped."""
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute('DELETE FROM resolve_cache WHERE video_id = ?;', (video_id,))
+                return cur.rowcount
+
+        return await self._atomic_write_op(_logic)
+
+
+    def _prune_resolve_cache(self, cur) -> int:
+        """Maintenance step, expired entries would never be read again"""
+        cur.execute('''
+            DELETE FROM resolve_cache
+            WHERE resolved_at <= unixepoch() - IIF(video_id IS NULL, ?, ?);
+        ''', (G.RESOLVE_CACHE_NEGATIVE_TTL, G.RESOLVE_CACHE_TTL))
+        return cur.rowcount
+
+
+    def resolve_cache_stats(self) -> dict:
+        return dict(self._resolve_stats)
@@ -1,82 +1,410 @@
+import json
 import time
 import sqlite3
 
-from typing import List
+from typing import List, Optional, Tuple
 
 from backend.core.models.track import Track
+from backend.core.lib.utils import normalize_for_search
 from backend.core.models.enums import AudioDatabaseAction as ADA
+from backend.core.search.typeahead import TypeaheadRow
+from backend.core.database.pagination import NUMBER, decode_cursor, encode_cursor, page
+from backend.exceptions import InvalidCursorError
+from backend.core.database.migrations import read_meta, write_meta
+import backend.globals as G
 
 class SearchMixin:
     async def search(self, q: str) -> List[Track]:
         """
         Search for tracks by title or artist, matching both original and custom values.
 
+        Results are cached per normalized query, so "Taylor  Swift" and "taylor swift" share an entry.
+        Any write that can change a result invalidates the cache, see _invalidate_search_cache.
+
+        A query that finds nothing is retried once with its misspelled tokens corrected against the
+        indexed vocabulary, so "beyonec" still finds Beyonce without falling back to /search/deep.
+
         Args:
             q (str): The search query string. If empty, returns all tracks.
 
         Returns:
             list[dict]: List of track objects with id, title, artist, duration.
         """
-        if not q:
-            content = []
+        key = normalize_for_search(q)
+        content = await self._search_normalized(key) if key else []
+
+        if not content and key and self._fuzzy:
+            for corrected in self._fuzzy.correct(key):
+                content = await self._search_normalized(corrected)
+                if content:
+                    break
+
+        await self._emit_event(action=ADA.SEARCH, payload={"content": content})    
+        return [track.to_json() for track in content]
+
+
+    async def _search_normalized(self, key: str) -> List[Track]:
+        #typeahead answers the first keystrokes from memory, the broad prefixes FTS is slowest at. anything longer
+        #gets the bm25 ranked FTS path below, the typeahead only ranks by static weight
+        content = self._typeahead.search(key) if self._use_typeahead(key) else None
+        if content is None:
+            content = self._search_cache.get(key)
+        if content is not None:
+            return content
+
+        generation = self._search_cache.generation #captured before the query, a write landing mid-query makes the put a no-op
+        rows = await self._search_fts(key, G.SEARCH_LIMIT)
+        content = [
+            Track(
+                id=row["id"], 
+                title=row["title"],
+                artist=row["artist"],
+                duration=row["duration"]
+            )
+            for row in rows
+        ]
+        self._search_cache.put(key, content, generation)
+        return content
+
+
+    def _use_typeahead(self, key: str) -> bool:
+        """Only a single token short enough that text relevance can't tell its matches apart, see SEARCH_TYPEAHEAD_MAX_CHARS"""
+        return bool(self._typeahead) and " " not in key and len(key) <= G.SEARCH_TYPEAHEAD_MAX_CHARS
+
+
+    async def _search_fts(self, key: str, limit: int, after: Optional[Tuple[float, int]] = None) -> list:
+        """
+        Args:
+            key (str): Normalized query.
+            limit (int): Max rows.
+            after (tuple, optional): (final_rank, rowid) of the last row of the previous page.
+
+        Returns:
+            list[sqlite3.Row]: id, title, artist, duration, plus rowid and final_rank for paging.
+        """
+        #tokens come from the normalized key so the cached result is exactly what this query returns, and punctuation can't break the MATCH syntax
+        fts_query = " ".join(f"{t}*" for t in key.split())
+        where = "WHERE (c.score * t.static_rank, t.rowid) > (?, ?)" if after else ""
+        params = (fts_query, G.SEARCH_CANDIDATE_POOL, *(after or ()), limit)
+
+        def _execute_search():
+            #two phases, the SEARCH_CANDIDATE_POOL best matches by bm25 are then ranked by bm25 * static_rank, the precomputed
+            #weights and download boost, so any query with fewer matches than the pool ranks exactly. the pool is fts5's own
+            #ORDER BY rank, with the column weights set through the rank MATCH, which scores every match but keeps only the top
+            #of them, so a broad prefix like "a*" still gets its best matches and not the oldest rows.
+            #ties go to the older row, so the same query always returns the same top k
+            query = f'''
+                WITH candidates AS (
+                    SELECT
+                        rowid,
+                        rank AS score
+                    FROM catalog_fts
+                    WHERE catalog_fts MATCH ?
+                      AND rank MATCH 'bm25(1.0, 1.5)'
+                    ORDER BY rank
+                    LIMIT ?
+                ),
+                ranked AS (
+                    SELECT
+                        t.rowid,
+                        c.score * t.static_rank AS final_rank
+                    FROM candidates c
+                    JOIN titles t ON t.rowid = c.rowid
+                    {where}
+                    ORDER BY final_rank ASC, t.rowid ASC
+                    LIMIT ?
+                )
+                SELECT
+                    r.rowid,
+                    r.final_rank,
+                    td.id,
+                    td.title,
+                    td.artist,
+                    td.duration
+                FROM ranked r
+                JOIN track_display td ON td.rowid = r.rowid
+                ORDER BY r.final_rank ASC, r.rowid ASC;
+            '''
+            with self.cursor() as cur:
+                cur.execute(query, params)
+                return cur.fetchall()
+
+        return await self._atomic_db_op(_execute_search)
+
+
+    async def search_page(self, q: Optional[str], limit: int, cursor: Optional[str] = None) -> dict:
+        """
+        One page of search results, same matching and ranking as search.
+
+        The cursor carries the query as it was actually run (after any typo correction), which index
+        answered it, and the rank of the last result, so later pages continue the same ranking. Unlike
+        search this doesn't emit ADA.SEARCH, clients listening for it expect the whole result.
+
+        Args:
+            q (str): The search query string, ignored when a cursor is given.
+            limit (int): Results per page.
+            cursor (str, optional): next_cursor of the previous page.
+
+        Returns:
+            dict: {"content": list[dict], "next_cursor": str | None, "total": int}, total counts the matches
+                paging can reach, every match from the typeahead, at most SEARCH_CANDIDATE_POOL from FTS.
+
+        Raises:
+            InvalidCursorError: Malformed cursor, or one from a typeahead index that has since been reloaded.
+        """
+        if cursor:
+            key, source, score, rowid = decode_cursor(cursor, "search", str, str, NUMBER, int)
+            if source not in ("typeahead", "fts"):
+                raise InvalidCursorError("Malformed cursor for search")
+            after = (score, rowid)
+            if source == "typeahead" and not (self._typeahead and self._typeahead.ready):
+                raise InvalidCursorError("Search index was reloaded, start from the first page")
+            keys = [key]
         else:
-            tokens = q.split()
-            fts_query = " ".join(f"{t}*" for t in tokens)
-            limit = 30            
-            params = (fts_query, limit)
+            key = normalize_for_search(q)
+            source = "typeahead" if self._use_typeahead(key) and self._typeahead.ready else "fts"
+            after = None
+            keys = [key] if key else []
+            if key and self._fuzzy:
+                keys.extend(self._fuzzy.correct(key)) #only tried if the ones before found nothing
+
+        content, next_cursor = [], None
+        for key in keys:
+            if source == "typeahead":
+                tracks = self._typeahead.search(key, limit=limit + 1, after=after)
+                last = lambda: self._typeahead.rank_key(tracks[limit - 1].id)
+            else:
+                rows = await self._search_fts(key, limit + 1, after=after)
+                tracks = [Track(id=row["id"], title=row["title"], artist=row["artist"], duration=row["duration"]) for row in rows]
+                last = lambda: (rows[limit - 1]["final_rank"], rows[limit - 1]["rowid"])
+
+            if tracks:
+                if len(tracks) > limit:
+                    next_cursor = encode_cursor("search", key, source, *last())
+                content = [track.to_json() for track in tracks[:limit]]
+                break
+
+        total = 0
+        if content or cursor: #a query that found nothing has no matches to count
+            #FTS pages stop at the candidate pool, don't promise pages past it
+            total = await self._count_matches(key, None if source == "typeahead" else G.SEARCH_CANDIDATE_POOL)
+        return page(content, next_cursor, total)
+
+
+    async def _count_matches(self, key: str, cap: Optional[int] = None) -> int:
+        fts_query = " ".join(f"{t}*" for t in key.split())
+
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute(
+                    "SELECT COUNT(*) FROM (SELECT 1 FROM catalog_fts WHERE catalog_fts MATCH ? LIMIT ?);",
+                    (fts_query, -1 if cap is None else cap)
+                )
+                return cur.fetchone()[0]
+
+        return await self._atomic_db_op(_logic)
+
+
+    def _invalidate_search_cache(self):
+        """Call after any committed write that can change a search result: titles, artists, their links, downloads, or the index itself"""
+        self._search_cache.invalidate()
+
 
-            def _execute_search():
-                query = '''
+    def search_cache_stats(self) -> dict:
+        """Hit and miss counters and current size, see SearchCache.stats"""
+        return self._search_cache.stats()
+
+
+    async def load_typeahead(self, rowids: Optional[List[int]] = None):
+        """
+        Loads the in-memory typeahead index from titles and artists, the same text the FTS index holds.
+
+        Args:
+            rowids (list[int], optional): Only reload these title rowids, rows that no longer exist are
+                dropped. Loads the whole catalog if None.
+        """
+        if not self._typeahead:
+            return
+        if rowids is not None and not self._typeahead.ready:
+            return #the full load picks these up
+
+        def _logic():
+            where = "WHERE t.rowid IN (SELECT value FROM json_each(?))" if rowids is not None else ""
+            params = (json.dumps(rowids),) if rowids is not None else ()
+            with self.cursor() as cur:
+                cur.execute(f'''
                     SELECT
+                        t.rowid,
                         t.id,
                         COALESCE(t.title_display, t.title) AS title,
                         GROUP_CONCAT(COALESCE(a.artist_display, a.artist), ', ') AS artist,
                         t.duration,
-
-                        sub.score * t.pref_weight * MAX(a.pref_weight) *
-                            CASE WHEN d.id IS NOT NULL THEN 1.0 ELSE 0.1
-                            END AS final_rank
-                    FROM (
-                        SELECT
-                            rowid,
-                            bm25(catalog_fts, 1.0, 1.5) AS score
-                        FROM catalog_fts
-                        WHERE catalog_fts MATCH ?
-                        LIMIT ?
-                    ) AS sub
-                    JOIN titles t ON t.rowid = sub.rowid
+                        t.title || ' ' || GROUP_CONCAT(a.artist, ' ') AS search_text,
+                        t.pref_weight * MAX(a.pref_weight) AS weight,
+                        EXISTS (SELECT 1 FROM downloads d WHERE d.id = t.id) AS downloaded
+                    FROM titles t
                     JOIN title_artists ta ON ta.title_rowid = t.rowid
                     JOIN artists a ON a.rowid = ta.artist_rowid
-                    LEFT JOIN downloads d ON d.id = t.id
-                    GROUP BY sub.rowid
-                    ORDER BY final_rank ASC;
-                '''
-                with self.cursor() as cur:
-                    cur.execute(query, params)
-                    return cur.fetchall()
-                
-            rows = await self._atomic_db_op(_execute_search)
-            content = [
-                Track(
-                    id=row["id"], 
-                    title=row["title"],
-                    artist=row["artist"],
-                    duration=row["duration"]
-                )
-                for row in rows
-            ]
+                    {where}
+                    GROUP BY t.rowid;
+                ''', params)
+                return [TypeaheadRow(*row) for row in cur.fetchall()]
+
+        rows = await self._atomic_db_op(_logic)
+
+        if rowids is None:
+            self._typeahead.load(rows)
+            print(f"[{self.name}] Typeahead index loaded {len(rows)} rows. ({self._typeahead.stats()['build_duration']:.3f}s)")
+        else:
+            found = {row.rowid for row in rows}
+            self._typeahead.remove(rowid for rowid in rowids if rowid not in found)
+            self._typeahead.upsert(rows)
 
-        await self._emit_event(action=ADA.SEARCH, payload={"content": content})    
-        return [track.to_json() for track in content]
+
+    def typeahead_remove(self, id: str):
+        if self._typeahead:
+            self._typeahead.remove_id(id)
+
+
+    def typeahead_set_downloaded(self, id: str, downloaded: bool):
+        if self._typeahead:
+            self._typeahead.set_downloaded(id, downloaded)
+
+
+    def typeahead_stats(self) -> Optional[dict]:
+        """Size and query counters, see TypeaheadIndex.stats. None if the typeahead is disabled"""
+        return self._typeahead.stats() if self._typeahead else None
+
+
+    async def load_fuzzy(self):
+        """Loads the typo correction vocabulary from the FTS index, refresh_search_index adds to it from then on"""
+        if not self._fuzzy:
+            return
+
+        def _logic():
+            with self.cursor() as cur:
+                cur.execute("SELECT title || ' ' || artists FROM catalog_fts;")
+                return [row[0] for row in cur.fetchall()]
+
+        texts = await self._atomic_db_op(_logic)
+        self._fuzzy.load(texts)
+        print(f"[{self.name}] Fuzzy index loaded {self._fuzzy.stats()['tokens']} tokens.")
+
+
+    def fuzzy_stats(self) -> Optional[dict]:
+        """Vocabulary size and correction counters, see FuzzyIndex.stats. None if typo correction is disabled"""
+        return self._fuzzy.stats() if self._fuzzy else None
+
+
+    async def refresh_search_index(self) -> int:
+        """
+        Brings the FTS5 index up to date with the titles and artists tables, touching only the rows
+        that changed since the last refresh.
+
+        Triggers on titles, artists and title_artists record affected title rowids in catalog_fts_pending,
+        this drains that table with a per-rowid delete and re-insert, so the cost follows the size of the
+        change instead of the size of the catalog.
+
+        Returns:
+            int: Number of title rowids that were refreshed.
+        """
+        def _refresh():
+            refresh_start_time = time.perf_counter()
+
+            with self.cursor() as cur:
+                cur.execute("SELECT rowid FROM catalog_fts_pending;")
+                rowids = [row[0] for row in cur.fetchall()]
+                if not rowids:
+                    return rowids, []
+
+                cur.execute("""
+                    DELETE FROM catalog_fts
+                    WHERE rowid IN (SELECT rowid FROM catalog_fts_pending);
+                """)
+
+                #same shape as title_artist_search_view, joined from the pending rows so sqlite doesn't group the whole catalog
+                cur.execute("""
+                    INSERT INTO catalog_fts (rowid, title, artists)
+                    SELECT
+                        t.rowid,
+                        t.title,
+                        GROUP_CONCAT(a.artist, ' ')
+                    FROM catalog_fts_pending p
+                    JOIN titles t ON t.rowid = p.rowid
+                    JOIN title_artists ta ON t.rowid = ta.title_rowid
+                    JOIN artists a ON ta.artist_rowid = a.rowid
+                    GROUP BY t.rowid;
+                """)
+
+                #new vocabulary for typo correction
+                texts = []
+                if self._fuzzy:
+                    cur.execute("""
+                        SELECT title || ' ' || artists FROM catalog_fts
+                        WHERE rowid IN (SELECT rowid FROM catalog_fts_pending);
+                    """)
+                    texts = [row[0] for row in cur.fetchall()]
+
+                cur.execute("DELETE FROM catalog_fts_pending;")
+
+            refresh_duration = time.perf_counter() - refresh_start_time
+            print(f"[{self.name}] Refreshed {len(rowids)} search index rows. ({refresh_duration:.3f}s)")
+            return rowids, texts
+
+        rowids, texts = await self._atomic_write_op(_refresh)
+        if self._fuzzy:
+            self._fuzzy.add(texts)
+        if rowids:
+            self._invalidate_search_cache()
+            await self._emit_event(action=ADA.REFRESH_SEARCH_INDEX, payload={"rowids": rowids})
+        return len(rowids)
+
+
+    def request_search_refresh(self):
+        """
+        Schedules a refresh_search_index, coalesced with every other request in the debounce window.
+        Use after writes that don't need to be searchable immediately.
+        """
+        self._search_refresh.request()
+
+
+    async def flush_search_refresh(self) -> int:
+        """
+        Runs refresh_search_index now, for callers that need to read their own writes.
+
+        Returns:
+            int: Number of title rowids that were refreshed.
+        """
+        return await self._search_refresh.flush()
+
+
+    def search_refresh_stats(self) -> dict:
+        """Requested vs executed refresh counts and timings, see RefreshScheduler.stats"""
+        return self._search_refresh.stats()
+
+
+    async def ensure_search_index(self):
+        """
+        Startup check. Rebuilds the index if it was built by a different SEARCH_INDEX_VERSION, or never
+        marked at all, otherwise only drains whatever refreshes were pending at shutdown.
+        """
+        def _marker():
+            with self.cursor() as cur:
+                return read_meta(cur, "search_index_version")
+
+        if await self._atomic_db_op(_marker) != str(G.SEARCH_INDEX_VERSION):
+            print(f"[{self.name}] Search index is out of date")
+            await self.rebuild_search_index()
+        else:
+            await self.refresh_search_index()
 
 
     async def rebuild_search_index(self):
         """
-        Manually synchronizes the FTS5 index with the current state of the
-        titles and artists tables. Only necessary when names are changed for titles or artists.
-        
-        This should only be used for batch changes, but for now keep it. 
-        Refactoring into faster updates will be important for future performance (currently 0.04s-0.06s)
+        Repair command, throws away the whole FTS5 index and rebuilds it from title_artist_search_view.
+
+        Day to day changes go through refresh_search_index, this is only needed if check_search_index
+        reports drift or the tokenizer changes.
         """
         print("Synchronizing search index with database...")
 
@@ -84,15 +412,99 @@ class SearchMixin:
             search_rebuild_start_time = time.perf_counter()
 
             with self.cursor() as cursor:
-                # 1. Clear the current index
-                cursor.execute("INSERT INTO catalog_fts(catalog_fts) VALUES('delete-all')")
+                # 1. Clear the current index and anything waiting on a refresh
+                cursor.execute("DELETE FROM catalog_fts;")
+                cursor.execute("DELETE FROM catalog_fts_pending;")
 
                 # 2. Re-populate from the view
-                cursor.execute("INSERT INTO catalog_fts(catalog_fts) VALUES('rebuild')")
+                cursor.execute("""
+                    INSERT INTO catalog_fts (rowid, title, artists)
+                    SELECT rowid, title, artists FROM title_artist_search_view;
+                """)
+                write_meta(cursor, "search_index_version", G.SEARCH_INDEX_VERSION)
 
             search_rebuild_duration = time.perf_counter() - search_rebuild_start_time
             print(f"[{self.name}] Success: FTS5 index is up to date. ({search_rebuild_duration:.3f}s)")
 
-        await self._atomic_db_op(_rebuild)
+        await self._atomic_write_op(_rebuild)
+        self._invalidate_search_cache()
+        await self.load_fuzzy()
+        await self._emit_event(action=ADA.REFRESH_SEARCH_INDEX, payload={"rowids": None})
+
+
+    async def check_search_index(self, sample_limit: int = 20) -> dict:
+        """
+        Consistency check between the FTS5 index and title_artist_search_view.
+
+        Rows still waiting in catalog_fts_pending are expected to differ and are reported separately,
+        anything else that differs is drift and means the index needs a rebuild_search_index.
+
+        Args:
+            sample_limit (int): Max rowids listed per problem category.
+
+        Returns:
+            dict:
+                {
+                    "ok": bool,             # no drift and fts5 integrity-check passed
+                    "indexed": int,         # rows in catalog_fts
+                    "expected": int,        # rows in title_artist_search_view
+                    "pending": int,         # rows waiting on refresh_search_index
+                    "missing": list[int],   # in the view, not in the index
+                    "orphaned": list[int],  # in the index, not in the view
+                    "stale": list[int],     # in both, with different text
+                    "integrity_error": str | None
+                }
+        """
+        def _check():
+            with self.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM catalog_fts;")
+                indexed = cur.fetchone()[0]
+                cur.execute("SELECT COUNT(*) FROM title_artist_search_view;")
+                expected = cur.fetchone()[0]
+                cur.execute("SELECT COUNT(*) FROM catalog_fts_pending;")
+                pending = cur.fetchone()[0]
+
+                cur.execute("""
+                    SELECT v.rowid FROM title_artist_search_view v
+                    WHERE v.rowid NOT IN (SELECT rowid FROM catalog_fts)
+                    AND v.rowid NOT IN (SELECT rowid FROM catalog_fts_pending)
+                    LIMIT ?;
+                """, (sample_limit,))
+                missing = [row[0] for row in cur.fetchall()]
+
+                cur.execute("""
+                    SELECT f.rowid FROM catalog_fts f
+                    WHERE f.rowid NOT IN (SELECT rowid FROM title_artist_search_view)
+                    AND f.rowid NOT IN (SELECT rowid FROM catalog_fts_pending)
+                    LIMIT ?;
+                """, (sample_limit,))
+                orphaned = [row[0] for row in cur.fetchall()]
+
+                cur.execute("""
+                    SELECT f.rowid FROM catalog_fts f
+                    JOIN title_artist_search_view v ON v.rowid = f.rowid
+                    WHERE (f.title IS NOT v.title OR f.artists IS NOT v.artists)
+                    AND f.rowid NOT IN (SELECT rowid FROM catalog_fts_pending)
+                    LIMIT ?;
+                """, (sample_limit,))
+                stale = [row[0] for row in cur.fetchall()]
+
+                integrity_error = None
+                try:
+                    cur.execute("INSERT INTO catalog_fts (catalog_fts) VALUES ('integrity-check');")
+                except sqlite3.DatabaseError as e:
+                    integrity_error = str(e)
 
+            return {
+                "ok": not (missing or orphaned or stale or integrity_error),
+                "indexed": indexed,
+                "expected": expected,
+                "pending": pending,
+                "missing": missing,
+                "orphaned": orphaned,
+                "stale": stale,
+                "integrity_error": integrity_error
+            }
 
+        #through the writer, integrity-check is issued as an INSERT and the counts should come from one consistent snapshot
+        return await self._atomic_write_op(_check)
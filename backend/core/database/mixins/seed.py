@@ -1,21 +1,58 @@
 import csv
+from itertools import islice
 from pathlib import Path
-import math
+import shutil
+import sqlite3
 import time
 from backend.core.lib.utils import normalize_for_search
+from backend.core.database.migrations import write_meta
+import backend.globals as G
+
+
+#tables written by the seed, their triggers are suspended while it runs and everything they maintain is derived once afterwards
+_SEED_TABLES = ("titles", "artists", "title_artists")
 
 
 class SeedMixin:
+    def restore_seed_snapshot(self) -> bool:
+        """
+        Copies a prebuilt, already seeded and indexed database into place on first boot.
+
+        Only runs while the database file doesn't exist yet, so before any connection is opened,
+        and only for a snapshot that is a readable sqlite database with a seeded catalog. Anything
+        else leaves the CSV seed to do the work. Build one with `cli.py seed-snapshot`.
+
+        Returns:
+            bool: True if the snapshot was copied.
+        """
+        snapshot = self._seed_snapshot
+        if snapshot is None or not snapshot.exists() or self._filepath.exists():
+            return False
+
+        try:
+            with sqlite3.connect(f"file:{snapshot}?mode=ro", uri=True) as conn:
+                seeded = conn.execute("SELECT EXISTS (SELECT 1 FROM titles);").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"[{self.name}] Ignoring seed snapshot {snapshot}: {e}")
+            return False
+        if not seeded:
+            return False
+
+        start = time.perf_counter()
+        shutil.copyfile(snapshot, self._filepath)
+        print(f"[{self.name}] Restored seed snapshot {snapshot.name}. ({time.perf_counter() - start:.3f}s)")
+        return True
+
+
     async def seed(self):
         csv_path = Path(__file__).parent.parent / "seed.csv"
 
         #check if seeding already done
         def _is_seeded():
             with self.cursor() as cur:
-                cur.execute("SELECT COUNT(*) as count FROM titles")
-                row = cur.fetchone()
-                return row["count"] > 0 if row else False
-            
+                cur.execute("SELECT EXISTS (SELECT 1 FROM titles);") #COUNT(*) would scan the whole catalog every boot
+                return bool(cur.fetchone()[0])
+
         seeded = await self._atomic_db_op(_is_seeded)
         if seeded:
             return
@@ -25,80 +62,155 @@ class SeedMixin:
             if not csv_path.exists():
                 print(f"[{self.name}] Couldn't find seed csv path")
                 return
-            
-            seed_start_time = time.perf_counter()
 
-            with open(csv_path, mode='r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                data = list(reader)
-
-            pops = [float(row['popularity']) for row in data if row.get('popularity')]
-            min_pop = min(pops) if pops else 0
-            
-            #calculate artist frequency for the 'pref' boost
-            #we'll use a simple dict counter to avoid Pandas value_counts() or explode()
-            artist_counts = {}
-            for row in data:
-                for a_id in str(row.get("artist_ids", "")).split("|"):
-                    a_id = a_id.strip()
-                    if a_id:
-                        artist_counts[a_id] = artist_counts.get(a_id, 0) + 1
-            
-            max_freq = max(artist_counts.values()) if artist_counts else 1.0
-
-            print(f"[Seed] Starting seed of {len(data)} tracks...")
+            seed_start_time = time.perf_counter()
+            print(f"[Seed] Starting seed from {csv_path.name}...")
 
             with self.cursor() as cur:
-                for row in data:
-                    title = str(row.get("track_name", "UNKNOWN_TITLE"))
-                    title_id = f'SEED___{str(row.get("track_id", "UNKNOWN_TITLE"))}'
+                #suspend the maintenance triggers, a failure rolls back the write op and brings them back with it
+                cur.execute(f'''
+                    SELECT name, sql FROM sqlite_master
+                    WHERE type = 'trigger' AND tbl_name IN ({", ".join("?" * len(_SEED_TABLES))});
+                ''', _SEED_TABLES)
+                triggers = [tuple(row) for row in cur.fetchall()]
+                for name, _ in triggers:
+                    cur.execute(f"DROP TRIGGER {name};")
+
+                #stage the csv as is, popularity is only turned into pref once its minimum is known
+                cur.execute('''
+                    CREATE TEMP TABLE seed_titles (
+                        id TEXT,
+                        title TEXT,
+                        title_display TEXT,
+                        duration REAL,
+                        popularity REAL
+                    );
+                ''')
+                cur.execute('''
+                    CREATE TEMP TABLE seed_credits (
+                        title_id TEXT,
+                        artist_id TEXT,
+                        artist TEXT,
+                        artist_display TEXT
+                    );
+                ''')
+
+                count = self._stage_seed_rows(cur, csv_path)
+
+                #same formulas as the trg_pref_* triggers
+                cur.execute('''
+                    INSERT INTO titles (id, title, title_display, duration, pref, pref_weight)
+                    SELECT id, title, title_display, duration, pref, 1 + ln(pref + 1.0)
+                    FROM (
+                        SELECT
+                            rowid,
+                            id,
+                            title,
+                            title_display,
+                            duration,
+                            (COALESCE(popularity, MIN(popularity) OVER ()) - MIN(popularity) OVER ()) / 50.0 AS pref
+                        FROM seed_titles
+                    )
+                    ORDER BY rowid;
+                ''')
+
+                #first credit wins for an artist id, like the per row INSERT OR IGNORE did
+                cur.execute('''
+                    INSERT OR IGNORE INTO artists (id, artist, artist_display, enriched_at)
+                    SELECT artist_id, artist, artist_display, 0
+                    FROM seed_credits
+                    ORDER BY rowid;
+                ''')
+
+                cur.execute('''
+                    INSERT OR IGNORE INTO title_artists (title_rowid, artist_rowid)
+                    SELECT t.rowid, a.rowid
+                    FROM seed_credits c
+                    JOIN titles t ON t.id = c.title_id
+                    JOIN artists a ON a.id = c.artist_id
+                    ORDER BY c.rowid;
+                ''')
+
+                #artist preferences based on frequency
+                cur.execute('''
+                    WITH freq AS (
+                        SELECT artist_rowid, COUNT(*) AS n
+                        FROM title_artists
+                        GROUP BY artist_rowid
+                    )
+                    UPDATE artists
+                    SET pref = freq.n / (2.0 * (SELECT MAX(n) FROM freq)),
+                        pref_weight = 1 + ln(freq.n / (2.0 * (SELECT MAX(n) FROM freq)) + 1.0)
+                    FROM freq
+                    WHERE freq.artist_rowid = artists.rowid;
+                ''')
+
+                #same formula as the trg_rank_* triggers
+                cur.execute('''
+                    UPDATE titles
+                    SET static_rank = pref_weight
+                        * COALESCE((SELECT MAX(a.pref_weight) FROM title_artists ta JOIN artists a ON a.rowid = ta.artist_rowid WHERE ta.title_rowid = titles.rowid), 1.0)
+                        * CASE WHEN EXISTS (SELECT 1 FROM downloads d WHERE d.id = titles.id) THEN 1.0 ELSE 0.1 END;
+                ''')
+
+                cur.execute('''
+                    INSERT OR REPLACE INTO track_display (rowid, id, title, artist, artist_list, duration)
+                    SELECT rowid, id, title, REPLACE(artist_list, char(31), ', '), artist_list, duration
+                    FROM track_display_view;
+                ''')
+
+                #built once here instead of queueing every title for refresh_search_index
+                cur.execute('''
+                    INSERT INTO catalog_fts (rowid, title, artists)
+                    SELECT rowid, title, artists FROM title_artist_search_view;
+                ''')
+                write_meta(cur, "search_index_version", G.SEARCH_INDEX_VERSION)
+
+                cur.execute("DROP TABLE temp.seed_titles;")
+                cur.execute("DROP TABLE temp.seed_credits;")
+                for _, sql in triggers:
+                    cur.execute(sql)
+
+            seed_end_time = time.perf_counter()
+            seed_duration = seed_end_time - seed_start_time
+            print(f"[Seed] Success. Took {seed_duration:.2f} seconds ({count / seed_duration:.1f} tracks/sec).")
+
+        print(f"[{self.name}] Starting data seed...")
+        await self._atomic_write_op(_run_seed_logic)
+        self._invalidate_search_cache()
+
 
-                    #custom scoring math based on the seeding csv values
-                    pref = (float(row.get("popularity", min_pop)) - min_pop) / 50.0
-                    duration = float(row.get("duration", 0.0))
+    def _stage_seed_rows(self, cur, csv_path: Path, batch_size: int = G.SEED_BATCH_SIZE) -> int:
+        """Streams the csv into the seed_* temp tables, batch_size rows per executemany. Returns the row count."""
+        normalized = {} #artist names repeat a lot across the catalog
+        count = 0
 
-                    #insertion into titles
-                    cur.execute('''
-                        INSERT INTO titles (id, title, title_display, duration, pref)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (title_id, normalize_for_search(title), title, duration, pref))
+        with open(csv_path, mode='r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            while batch := list(islice(reader, batch_size)):
+                titles, credits = [], []
+                for row in batch:
+                    title = str(row.get("track_name", "UNKNOWN_TITLE"))
+                    title_id = f'SEED___{str(row.get("track_id", "UNKNOWN_TITLE"))}'
+                    popularity = row.get("popularity")
+                    titles.append((
+                        title_id,
+                        normalize_for_search(title),
+                        title,
+                        float(row.get("duration", 0.0)),
+                        float(popularity) if popularity else None
+                    ))
 
-                    #process artists
                     names = str(row.get("artist_names", "")).split("|")
                     ids = str(row.get("artist_ids", "")).split("|")
-
                     for artist, artist_id in zip(names, ids):
                         artist, artist_id = artist.strip(), artist_id.strip()
+                        if artist not in normalized:
+                            normalized[artist] = normalize_for_search(artist)
+                        credits.append((title_id, artist_id, normalized[artist], artist))
 
-                        #insert artists and junctions
-                        cur.execute('''
-                            INSERT OR IGNORE INTO artists (id, artist, artist_display, enriched_at)
-                            VALUES (?, ?, ?, 0)
-                        ''', (artist_id, normalize_for_search(artist), artist))
-
-                        cur.execute('''
-                            INSERT OR IGNORE INTO title_artists (title_rowid, artist_rowid)
-                            SELECT t.rowid, a.rowid
-                            FROM titles t, artists a
-                            WHERE t.id = ? AND a.id = ?
-                        ''', (title_id, artist_id))
-
-                #recalculate artist preferences based on frequency
-                cur.execute(f"""
-                    UPDATE artists
-                    SET pref = (
-                        SELECT CAST(COUNT(*) AS REAL) / {2.0 * max_freq}
-                        FROM title_artists
-                        WHERE title_artists.artist_rowid = artists.rowid
-                    )
-                    WHERE EXISTS (SELECT 1 FROM title_artists WHERE artist_rowid = artists.rowid);
-                """)
-        
-            seed_end_time = time.perf_counter()
-            seed_duration = seed_end_time - seed_start_time
-            print(f"[Seed] Success. Took {seed_duration:.2f} seconds ({len(data) / seed_duration:.1f} tracks/sec).")
-
-        print(f"[{self.name}] Starting data seed...")
-        await self._atomic_db_op(_run_seed_logic)
-
+                cur.executemany("INSERT INTO seed_titles VALUES (?, ?, ?, ?, ?);", titles)
+                cur.executemany("INSERT INTO seed_credits VALUES (?, ?, ?, ?);", credits)
+                count += len(batch)
 
+        return count
@@ -0,0 +1,64 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional
+
+from backend.exceptions import InvalidCursorError
+
+
+NUMBER = (int, float) #a REAL sort key that happens to be whole comes back from JSON as an int
+
+
+def encode_cursor(scope: str, *key: Any) -> str:
+    """
+    Opaque keyset cursor, the sort key of the last row on a page.
+
+    The next page is everything strictly after that key, so rows inserted or deleted elsewhere in the
+    listing don't shift it the way an offset would.
+
+    Args:
+        scope (str): Listing the cursor belongs to, e.g. "downloads" or "playlist:3".
+        *key: JSON serializable sort key values.
+    """
+    raw = json.dumps([scope, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, scope: str, *types: Any) -> List[Any]:
+    """
+    Args:
+        cursor (str): Cursor from encode_cursor.
+        scope (str): Listing it has to belong to.
+        *types: isinstance type (or tuple of types) for each sort key value, the key has to match them
+            one for one before it gets anywhere near a query.
+
+    Returns:
+        list: The sort key passed to encode_cursor.
+
+    Raises:
+        InvalidCursorError: Malformed cursor, or one from a different listing.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursorError(f"Malformed cursor: {e}")
+
+    if not isinstance(decoded, list) or not decoded or decoded[0] != scope:
+        raise InvalidCursorError(f"Cursor does not belong to {scope}")
+
+    key = decoded[1:]
+    if len(key) != len(types) or not all(
+        isinstance(value, expected) and not isinstance(value, bool) for value, expected in zip(key, types)
+    ):
+        raise InvalidCursorError(f"Malformed cursor for {scope}")
+    return key
+
+
+def page(content: Any, next_cursor: Optional[str], total: int) -> dict:
+    """Shape every paginated database read returns, see the *_page methods"""
+    return {
+        "content": content,
+        "next_cursor": next_cursor,
+        "total": total
+    }
@@ -0,0 +1,92 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, List
+
+
+class ConnectionPool:
+    def __init__(self, factory: Callable[[], sqlite3.Connection], size: int = 4):
+        """
+        Bounded pool of long-lived sqlite3 connections.
+
+        Connections are created lazily through `factory` (up to `size` of them) and then
+        checked out and returned through a queue, so PRAGMAs and UDFs are only applied once
+        per connection instead of once per operation.
+
+        Args:
+            factory: Callable returning a fully configured connection. Must be safe to use
+                from any thread (check_same_thread=False), the pool guarantees only one
+                thread holds a connection at a time.
+            size: Maximum number of open connections.
+        """
+        if size < 1:
+            raise ValueError("ConnectionPool size must be at least 1")
+
+        self._factory = factory
+        self._size = size
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size) #lifo keeps the warmest connection in use
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+
+    def _acquire(self, timeout: float = None) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("ConnectionPool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        #grow lazily if there's still room
+        with self._lock:
+            if len(self._all) < self._size:
+                conn = self._factory()
+                self._all.append(conn)
+                return conn
+
+        #otherwise wait for someone to give one back
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection became available within {timeout}s")
+
+
+    def _release(self, conn: sqlite3.Connection):
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Check out a connection for the duration of the with block"""
+        conn = self._acquire(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+
+    def size(self) -> int:
+        return self._size
+
+    def open_count(self) -> int:
+        return len(self._all)
+
+
+    def close(self):
+        """Closes every connection, including ones that are checked out once they are released"""
+        with self._lock:
+            self._closed = True
+            conns, self._all = self._all, []
+
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass #in use by another thread, it gets closed on release
@@ -0,0 +1,196 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+
+class SingleWriter:
+    def __init__(
+        self,
+        factory: Callable[[], sqlite3.Connection],
+        name: str = "db-writer",
+        max_batch: int = 64,
+        group_window: float = 0.0,
+    ):
+        """
+        Dedicated writer thread that owns the only write connection and commits queued
+        write closures in groups.
+
+        Every submitted closure runs inside its own SAVEPOINT so a failure only rolls back
+        that closure, and the whole group shares one COMMIT (one fsync). Each caller gets
+        its own result or exception back through a Future once the group has committed.
+
+        Args:
+            factory: Callable returning a configured connection. The writer switches it to
+                manual transaction control (isolation_level=None).
+            name: Thread name, shows up in debuggers and thread dumps.
+            max_batch: Maximum number of closures committed together.
+            group_window: Seconds to wait for more closures after the first one arrives.
+                0 only groups what is already queued, which is what bursts produce anyway
+                since they pile up while the previous group commits.
+        """
+        self._factory = factory
+        self._name = name
+        self.max_batch = max_batch
+        self.group_window = group_window
+
+        self._queue: "queue.Queue[Optional[Tuple[Callable, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self._ops = 0
+        self._groups = 0
+
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+
+    def submit(self, func: Callable) -> Future:
+        """Queue a write closure, the returned future resolves after its group commits"""
+        if self._closed:
+            raise RuntimeError(f"{self._name} is closed")
+
+        self._ensure_started()
+        future = Future()
+        self._queue.put((func, future))
+        return future
+
+
+    def active_connection(self) -> Optional[sqlite3.Connection]:
+        """The writer connection if called from inside a write closure, otherwise None"""
+        if threading.current_thread() is self._thread:
+            return self._conn
+        return None
+
+
+    def _collect(self, first) -> Tuple[List[Tuple[Callable, Future]], bool]:
+        batch = [first]
+        stop = False
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=self.group_window) if self.group_window else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+
+    def _fail(self, futures: List[Future], error: Exception):
+        for future in futures:
+            if future.running() or future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+
+    def _rollback(self):
+        """Rolls back the open transaction, if sqlite hasn't already"""
+        if not self._conn.in_transaction:
+            return
+        try:
+            self._conn.execute("ROLLBACK;")
+        except Exception as e:
+            print(f"[ERROR] {self._name} rollback failed ({e})")
+
+
+    def _commit_group(self, batch: List[Tuple[Callable, Future]]):
+        conn = self._conn
+        done = []
+
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+        except Exception as e:
+            self._fail([future for _, future in batch], e)
+            return
+
+        for i, (func, future) in enumerate(batch):
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                conn.execute("SAVEPOINT write_op;")
+                result = func()
+                conn.execute("RELEASE write_op;")
+                done.append((future, result))
+                continue
+            except Exception as e:
+                error = e
+
+            try:
+                conn.execute("ROLLBACK TO write_op;")
+                conn.execute("RELEASE write_op;")
+            except Exception:
+                #SQLITE_FULL, IOERR, BUSY and NOMEM can roll back the whole transaction, savepoint included,
+                #which takes the closures already run in this group with it
+                self._rollback()
+                self._fail([future] + [f for f, _ in done] + [f for _, f in batch[i + 1:]], error)
+                return
+            future.set_exception(error)
+
+        try:
+            conn.execute("COMMIT;")
+        except Exception as e:
+            self._rollback()
+            self._fail([future for future, _ in done], e)
+            return
+
+        self._ops += len(batch)
+        self._groups += 1
+
+        #results only go out once they're durable
+        for future, result in done:
+            future.set_result(result)
+
+
+    def _run(self):
+        self._conn = self._factory()
+        self._conn.isolation_level = None #transactions are managed by hand here
+
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+
+                batch, stop = self._collect(item)
+                try:
+                    self._commit_group(batch)
+                except Exception as e:
+                    #never let the thread die, every later write would wait on it forever
+                    print(f"[ERROR] {self._name} group failed ({e})")
+                    self._rollback()
+                    self._fail([future for _, future in batch if not future.done()], e)
+
+                if stop:
+                    break
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+    def stats(self) -> dict:
+        return {
+            "ops": self._ops,
+            "groups": self._groups,
+            "pending": self._queue.qsize(),
+            "avg_group_size": (self._ops / self._groups) if self._groups else 0.0,
+        }
+
+
+    def close(self, timeout: float = 10.0):
+        """Drains everything already queued, then stops the thread"""
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
@@ -4,6 +4,8 @@ from .websocket.manager import WebsocketManager
 from .websocket.message import WebsocketMessage
 
 from backend.core.models.event import Event
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.audio.index import DownloadIndex
 
 import backend.globals as G
 
@@ -41,6 +43,7 @@ def register_event_handlers(event_bus: EventBus, websocket_manager: WebsocketMan
 
         (G.AUDIO_DATABASE_NAME, ADA.CREATE_PLAYLIST),
         (G.AUDIO_DATABASE_NAME, ADA.UPDATE_PLAYLISTS),
+        (G.AUDIO_DATABASE_NAME, ADA.UPDATE_PLAYLIST_TRACKS),
         (G.AUDIO_DATABASE_NAME, ADA.EDIT_PLAYLIST),
         (G.AUDIO_DATABASE_NAME, ADA.DELETE_PLAYLIST),
 
@@ -48,11 +51,13 @@ def register_event_handlers(event_bus: EventBus, websocket_manager: WebsocketMan
         (G.AUDIO_DATABASE_NAME, ADA.UNREGISTER_TRACK),
         (G.AUDIO_DATABASE_NAME, ADA.REGISTER_DOWNLOAD),
         (G.AUDIO_DATABASE_NAME, ADA.UNREGISTER_DOWNLOAD),
+        (G.AUDIO_DATABASE_NAME, ADA.UNREGISTER_DOWNLOADS),
 
         (G.AUDIO_DATABASE_NAME, ADA.GET_DOWNLOADS_CONTENT),
 
         (G.AUDIO_DATABASE_NAME, ADA.SEARCH),
         (G.AUDIO_DATABASE_NAME, ADA.FETCH_LIKES),
+        (G.AUDIO_DATABASE_NAME, ADA.LIKE_TRACKS),
         
         (G.YOUTUBE_CLIENT_NAME, YTCA.SEARCH),
         (G.YOUTUBE_CLIENT_NAME, YTCA.DOWNLOAD),
@@ -86,4 +91,66 @@ def make_basic_handler(websocket_manager: WebsocketManager):
             await websocket_manager.broadcast(message)
         except Exception as e:
             print(f"Error broadcasting event {event}: {e}")
-    return handler
\ No newline at end of file
+    return handler
+
+def register_typeahead_handlers(event_bus: EventBus, db: AudioDatabase):
+    """
+    Keeps the database's in-memory typeahead index in step with its own events.
+
+    Search index refreshes carry the title rowids that changed (None after a full rebuild), those rows
+    are reloaded from SQLite. Download state only changes the ranking boost and a deleted track only
+    drops its row, so those are applied directly.
+
+    Args:
+        event_bus (EventBus): The event bus the database publishes on.
+        db (AudioDatabase): The database owning the typeahead index.
+    """
+    async def on_refresh(event: Event):
+        await db.load_typeahead(event.payload.get("rowids"))
+
+    def on_download(event: Event):
+        db.typeahead_set_downloaded(event.payload["content"]["id"], True)
+
+    def on_undownload(event: Event):
+        db.typeahead_set_downloaded(event.payload["content"]["id"], False)
+
+    def on_undownload_many(event: Event):
+        for id in event.payload["content"]["ids"]:
+            db.typeahead_set_downloaded(id, False)
+
+    def on_unregister(event: Event):
+        db.typeahead_remove(event.payload["content"]["id"])
+
+    event_bus.subscribe(source=db.name, action=ADA.REFRESH_SEARCH_INDEX, handler=on_refresh)
+    event_bus.subscribe(source=db.name, action=ADA.UNREGISTER_TRACK, handler=on_unregister)
+    event_bus.subscribe(source=db.name, action=ADA.REGISTER_DOWNLOAD, handler=on_download)
+    event_bus.subscribe(source=db.name, action=ADA.UNREGISTER_DOWNLOAD, handler=on_undownload)
+    event_bus.subscribe(source=db.name, action=ADA.UNREGISTER_DOWNLOADS, handler=on_undownload_many)
+
+
+def register_download_index_handlers(event_bus: EventBus, db: AudioDatabase, index: DownloadIndex):
+    """
+    Keeps the in-memory download index in step with the database's download events.
+
+    A new download is looked up on disk once, deletes only drop the entry. Deleting a track's
+    metadata cascades to its download, so that drops it too.
+
+    Args:
+        event_bus (EventBus): The event bus the database publishes on.
+        db (AudioDatabase): The database whose downloads are indexed.
+        index (DownloadIndex): The index to update.
+    """
+    def on_download(event: Event):
+        index.add(event.payload["content"]["id"])
+
+    def on_undownload(event: Event):
+        index.remove(event.payload["content"]["id"])
+
+    def on_undownload_many(event: Event):
+        for id in event.payload["content"]["ids"]:
+            index.remove(id)
+
+    event_bus.subscribe(source=db.name, action=ADA.REGISTER_DOWNLOAD, handler=on_download)
+    event_bus.subscribe(source=db.name, action=ADA.UNREGISTER_DOWNLOAD, handler=on_undownload)
+    event_bus.subscribe(source=db.name, action=ADA.UNREGISTER_DOWNLOADS, handler=on_undownload_many)
+    event_bus.subscribe(source=db.name, action=ADA.UNREGISTER_TRACK, handler=on_undownload)
@@ -1,10 +1,35 @@
 import traceback
 
 
+import hashlib
+import os
 from pathlib import Path
 from backend.core.models.track import Track
 import backend.globals as G
-from typing import Union
+from typing import Iterator, Union
+
+def get_audio_dir(id: str, base_dir: Path = None) -> Path:
+    """
+    Shard folder a track's files live in, DOWNLOAD_SHARD_DEPTH levels of DOWNLOAD_SHARD_WIDTH hex
+    characters from the sha1 of its id, ex. downloads/3f/a2/. Keeps every folder small no matter
+    how big the library gets.
+    """
+    if base_dir is None:
+        base_dir = G.DOWNLOAD_DIR
+
+    digest = hashlib.sha1(id.encode("utf-8")).hexdigest()
+    width = G.DOWNLOAD_SHARD_WIDTH
+    return base_dir.joinpath(*(digest[i * width:(i + 1) * width] for i in range(G.DOWNLOAD_SHARD_DEPTH)))
+
+def audio_path_candidates(id: str, base_dir: Path = None) -> Iterator[Path]:
+    """Where a track's audio may be, in order of preference: each extension sharded, then flat from before sharding"""
+    if base_dir is None:
+        base_dir = G.DOWNLOAD_DIR
+
+    shard = get_audio_dir(id, base_dir)
+    for ext in G.AUDIO_EXTENSIONS:
+        yield shard / f"{id}.{ext}"
+        yield base_dir / f"{id}.{ext}" #not migrated yet, see backend/core/audio/layout.py
 
 #handles both Track and Track.id
 def get_audio_path(
@@ -16,18 +41,34 @@ def get_audio_path(
     if base_dir is None:
         base_dir = G.DOWNLOAD_DIR
 
-    #if asked for specific format, use it
+    #if asked for specific format, use it. new files always go to the shard folder
     if audio_format:
-        return base_dir / f"{id}.{audio_format}"
+        return get_audio_dir(id, base_dir) / f"{id}.{audio_format}"
 
     #otherwise detect automatically
-    for ext in G.AUDIO_EXTENSIONS:
-        candidate = base_dir / f"{id}.{ext}"
+    for candidate in audio_path_candidates(id, base_dir):
         if candidate.exists():
             return candidate
 
     #fallback to mp3
-    return base_dir / f"{id}.mp3"
+    return get_audio_dir(id, base_dir) / f"{id}.mp3"
+
+def iter_download_files(base_dir: Path = None) -> Iterator[os.DirEntry]:
+    """Every file in the download folder, flat ones from before sharding and the ones in shard folders"""
+    if base_dir is None:
+        base_dir = G.DOWNLOAD_DIR
+
+    def _walk(path: Path, depth: int):
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file():
+                    if depth == 0 or depth == G.DOWNLOAD_SHARD_DEPTH:
+                        yield entry
+                elif depth < G.DOWNLOAD_SHARD_DEPTH and entry.is_dir() and len(entry.name) == G.DOWNLOAD_SHARD_WIDTH:
+                    yield from _walk(Path(entry.path), depth + 1)
+
+    if base_dir.exists():
+        yield from _walk(base_dir, 0)
         
 def is_downloaded(
     id: str, 
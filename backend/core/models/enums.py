@@ -40,6 +40,7 @@ class AudioDatabaseAction(str, Enum):
 
     CREATE_PLAYLIST = "create_playlist"
     UPDATE_PLAYLISTS = "update_playlists"
+    UPDATE_PLAYLIST_TRACKS = "update_playlist_tracks" #bulk, many tracks added to or removed from one playlist
     EDIT_PLAYLIST = "edit_playlist"
     DELETE_PLAYLIST = "delete_playlist"
 
@@ -49,12 +50,15 @@ class AudioDatabaseAction(str, Enum):
     
     REGISTER_DOWNLOAD = "log_download"
     UNREGISTER_DOWNLOAD = "unlog_download"
+    UNREGISTER_DOWNLOADS = "unlog_downloads" #bulk
 
 
     GET_DOWNLOADS_CONTENT = "get_downloads_content"
 
     SEARCH = "search"
+    REFRESH_SEARCH_INDEX = "refresh_search_index" #internal, payload rowids are the titles that changed, None after a full rebuild
     FETCH_LIKES = "fetch_likes"
+    LIKE_TRACKS = "like_tracks" #bulk
 
     GET_ALL_PLAYLISTS = "get_all_playlists"
     GET_PLAYLIST_CONTENT = "get_playlist_content"
@@ -68,6 +68,10 @@ class DownloadJob:
     def get_queue_last_status(self) -> bool | None:
         return self.queue_last
 
+    def get_background_status(self) -> bool:
+        """Nobody is waiting to play it, like a playlist import, so it's post-processed at background priority"""
+        return not (self.queue_first or self.queue_last)
+
     def get_identifier(self) -> str:
         """
         Return a string uniquely identifying this job.
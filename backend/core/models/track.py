@@ -1,10 +1,12 @@
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, Field
 
 class Track(BaseModel):
     id: str
     title: str
     artist: str
     duration: float
+    loudness: Optional[dict] = Field(default=None, exclude=True) #measured by the post processor, stored by LoudnessMixin, never serialized
 
     def to_json(self):
         return self.model_dump() #pydantic v2
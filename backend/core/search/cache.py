@@ -0,0 +1,114 @@
+import sys
+from collections import OrderedDict
+from typing import Hashable, Optional, Sequence, Tuple
+
+from backend.core.models.track import Track
+
+
+_TRACK_OVERHEAD = 400 #pydantic model, its __dict__ and the float, rough but stable
+
+
+def approx_size(tracks: Sequence[Track]) -> int:
+    """Rough memory footprint of a cached result, only used to keep the cache within its byte budget"""
+    size = sys.getsizeof(tracks)
+    for track in tracks:
+        size += _TRACK_OVERHEAD
+        for value in (track.id, track.title, track.artist):
+            if value:
+                size += sys.getsizeof(value)
+    return size
+
+
+class SearchCache:
+    def __init__(self, max_entries: int = 512, max_bytes: int = 4 * 1024 * 1024):
+        """
+        LRU cache of search results, bounded by entry count and approximate size.
+
+        Invalidation is generation based. Anything that can change a search result calls
+        invalidate(), which bumps the generation and drops every entry. Callers capture the
+        generation before querying and pass it to put(), so a result computed while a write
+        landed is never stored.
+
+        Lives on the event loop thread, no locking.
+
+        Args:
+            max_entries: Maximum number of cached queries.
+            max_bytes: Approximate memory budget for all cached results.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[Track, ...], int]]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+
+        #metrics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._stale_puts = 0
+
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+
+    def get(self, key: Hashable) -> Optional[Tuple[Track, ...]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[0]
+
+
+    def put(self, key: Hashable, tracks: Sequence[Track], generation: int):
+        """Stores a result computed at `generation`, ignored if a write has landed since"""
+        if generation != self._generation:
+            self._stale_puts += 1
+            return
+
+        tracks = tuple(tracks)
+        size = approx_size(tracks)
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+
+        self._entries[key] = (tracks, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
+
+
+    def invalidate(self):
+        self._generation += 1
+        self._invalidations += 1
+        self._entries.clear()
+        self._bytes = 0
+
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": (self._hits / lookups) if lookups else 0.0,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+            "stale_puts": self._stale_puts,
+            "generation": self._generation,
+        }
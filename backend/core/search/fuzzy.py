@@ -0,0 +1,162 @@
+import heapq
+import math
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.core.lib.utils import dice_coefficient, normalize_for_search
+
+
+_POPULARITY = 0.05 #added per 10x more indexed occurrences, between two close candidates the common one is the likelier meaning
+
+
+def trigrams(token: str) -> List[str]:
+    padded = f" {token} " #padding lets the first and last letters count on their own
+    return [padded[i:i+3] for i in range(len(padded) - 2)]
+
+
+def letters(token: str) -> str:
+    """First letter, then the rest sorted. Typos rarely hit the first letter, so "smyle" stays away from "myles"."""
+    return token[:1] + "".join(sorted(token[1:]))
+
+
+def similarity(token: str, candidate: str, prefix: bool = False) -> float:
+    """
+    dice_coefficient over the padded tokens, averaged with dice_coefficient over their `letters`.
+    A swapped pair of letters breaks up to three bigrams but keeps every letter, so the second half
+    keeps "beyonec" closer to "beyonce" than to "beyond". With prefix, candidate is a cut off word
+    and isn't padded at the end.
+    """
+    end = "" if prefix else " "
+    return (
+        dice_coefficient(f" {token} ", f" {candidate}{end}")
+        + dice_coefficient(letters(token), letters(candidate))
+    ) / 2
+
+
+class FuzzyIndex:
+    def __init__(self, min_similarity: float = 0.5, max_candidates: int = 64, min_length: int = 3):
+        """
+        Trigram index over the searchable vocabulary, used to rewrite misspelled query tokens.
+
+        A token gets rewritten only if no vocabulary token starts with it, so a half typed word is
+        never "corrected". Candidates are the vocabulary tokens sharing the most trigrams with it,
+        plus its anagrams since a transposition shares few trigrams, re-scored with `similarity`
+        against both the whole candidate and the candidate cut to the query token's length, so
+        "beyonec" finds "beyonce" and a half typed "bilie eil" finds "billie eilish".
+
+        Args:
+            min_similarity: Lowest dice score accepted as a correction.
+            max_candidates: Trigram matches re-scored per token.
+            min_length: Shorter tokens are too ambiguous to correct.
+        """
+        self.min_similarity = min_similarity
+        self.max_candidates = max_candidates
+        self.min_length = min_length
+
+        self._counts: Counter = Counter() #token: number of times it was indexed
+        self._vocab: List[str] = [] #sorted, for prefix checks
+        self._grams: Dict[str, List[str]] = {}
+        self._anagrams: Dict[str, List[str]] = {} #letters(token): tokens
+
+        #metrics
+        self._corrections = 0
+        self._misses = 0
+
+
+    def load(self, texts: Iterable[str]):
+        self._counts = Counter()
+        self._vocab = []
+        self._grams = {}
+        self._anagrams = {}
+        self._add(texts, sort=False)
+        self._vocab = sorted(self._counts)
+
+
+    def add(self, texts: Iterable[str]):
+        """New tokens from freshly indexed rows, tokens that disappear are left in, they just never match"""
+        self._add(texts, sort=True)
+
+
+    def _add(self, texts: Iterable[str], sort: bool):
+        for text in texts:
+            for token in normalize_for_search(text).split():
+                if token not in self._counts:
+                    if sort:
+                        insort(self._vocab, token)
+                    for gram in trigrams(token):
+                        self._grams.setdefault(gram, []).append(token)
+                    self._anagrams.setdefault(letters(token), []).append(token)
+                self._counts[token] += 1
+
+
+    def has_prefix(self, token: str) -> bool:
+        i = bisect_left(self._vocab, token)
+        return i < len(self._vocab) and self._vocab[i].startswith(token)
+
+
+    def suggest(self, token: str) -> Optional[str]:
+        """Closest vocabulary token, or None if nothing is similar enough"""
+        suggestions = self._suggestions(token, 1)
+        return suggestions[0][1] if suggestions else None
+
+
+    def _suggestions(self, token: str, n: int) -> List[Tuple[float, str]]:
+        if len(token) < self.min_length:
+            return []
+
+        shared = Counter()
+        for gram in set(trigrams(token)):
+            shared.update(self._grams.get(gram, ()))
+        candidates = {candidate for candidate, _ in shared.most_common(self.max_candidates)}
+        candidates.update(self._anagrams.get(letters(token), ()))
+
+        scored = []
+        for candidate in candidates:
+            score = similarity(token, candidate)
+            if len(candidate) > len(token):
+                score = max(score, similarity(token, candidate[:len(token)], prefix=True))
+            if score >= self.min_similarity:
+                scored.append((score + _POPULARITY * math.log10(self._counts[candidate]), candidate))
+        return heapq.nlargest(n, scored)
+
+
+    def correct(self, query: str, n: int = 4) -> List[str]:
+        """
+        Args:
+            query (str): Normalized query.
+            n (int): Max rewrites returned.
+
+        Returns:
+            list[str]: The query with its unmatched tokens swapped for close vocabulary tokens, best
+                first. The best guess per token can still miss as a whole ("tayler swfit" -> "tyler swift"),
+                so callers try them in order. Empty if every token matches or one has no close token.
+        """
+        options = []
+        for token in query.split():
+            if self.has_prefix(token):
+                options.append([(0.0, token)])
+                continue
+
+            suggestions = self._suggestions(token, n)
+            if not suggestions:
+                self._misses += 1
+                return []
+            options.append(suggestions)
+
+        if all(len(o) == 1 and o[0][0] == 0.0 for o in options):
+            return []
+        self._corrections += 1
+
+        rewrites = heapq.nlargest(n, product(*options), key=lambda combo: sum(key for key, _ in combo))
+        return [" ".join(token for _, token in combo) for combo in rewrites]
+
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._vocab),
+            "trigrams": len(self._grams),
+            "corrections": self._corrections,
+            "misses": self._misses,
+        }
@@ -0,0 +1,119 @@
+import asyncio
+import time
+import traceback
+from typing import Awaitable, Callable, Optional
+
+
+class RefreshScheduler:
+    def __init__(
+        self,
+        refresh: Callable[[], Awaitable[int]],
+        name: str = "refresh_scheduler",
+        debounce: float = 0.5,
+    ):
+        """
+        Coalesces refresh requests, for the search index and for position rebalancing.
+
+        request() only marks the index dirty and arms a timer, every other request that lands
+        before the timer fires rides along with it, so a burst of N writes costs one refresh.
+        flush() skips the timer for callers that need to read their own writes.
+
+        Only one refresh runs at a time. A request that arrives while a refresh is running
+        arms a new timer, so nothing written after a refresh started is missed.
+
+        Args:
+            refresh: Coroutine function doing the actual refresh, returns the number of rows refreshed.
+            name: Used in log lines.
+            debounce: Seconds to wait after the first request before refreshing.
+        """
+        self._refresh = refresh
+        self.name = name
+        self.debounce = debounce
+
+        self._dirty = False
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+        #metrics
+        self._requested = 0
+        self._coalesced = 0
+        self._flushed = 0
+        self._executed = 0
+        self._failed = 0
+        self._rows = 0
+        self._last_duration = 0.0
+
+
+    def request(self):
+        """Marks the index dirty, the refresh happens at most `debounce` seconds later"""
+        self._requested += 1
+        self._dirty = True
+
+        if self._timer is not None and not self._timer.done():
+            self._coalesced += 1
+            return
+
+        self._timer = asyncio.create_task(self._run_later())
+
+
+    async def flush(self) -> int:
+        """Refreshes right away, once this returns every write made before the call is searchable"""
+        self._flushed += 1
+        self._dirty = True #the caller may not have requested, and refreshing a clean index is cheap anyway
+        self._cancel_timer()
+        return await self._run()
+
+
+    async def _run_later(self):
+        await asyncio.sleep(self.debounce)
+        self._timer = None #requests from here on need their own timer, this run may already be past their writes
+
+        try:
+            await self._run()
+        except Exception as e:
+            print(f"[{self.name}] Scheduled refresh failed ({e}), will retry on the next request\n{traceback.format_exc()}")
+
+
+    async def _run(self) -> int:
+        async with self._lock:
+            if not self._dirty:
+                return 0
+            self._dirty = False
+
+            start = time.perf_counter()
+            try:
+                rows = await self._refresh()
+            except Exception:
+                self._dirty = True
+                self._failed += 1
+                raise
+
+            self._executed += 1
+            self._rows += rows or 0
+            self._last_duration = time.perf_counter() - start
+            return rows
+
+
+    def _cancel_timer(self):
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+
+
+    def close(self):
+        """Drops any armed timer, whatever it would have refreshed is picked up by the next refresh"""
+        self._cancel_timer()
+
+
+    def stats(self) -> dict:
+        return {
+            "requested": self._requested,
+            "coalesced": self._coalesced,
+            "flushed": self._flushed,
+            "executed": self._executed,
+            "failed": self._failed,
+            "rows_refreshed": self._rows,
+            "dirty": self._dirty,
+            "debounce": self.debounce,
+            "last_duration": self._last_duration,
+        }
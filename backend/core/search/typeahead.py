@@ -0,0 +1,363 @@
+import heapq
+import time
+from array import array
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.core.lib.utils import normalize_for_search
+from backend.core.models.track import Track
+
+
+_PREFIX_END = "\U0010ffff" #sorts after every token sharing the prefix
+_NOT_DOWNLOADED = 0.1 #same boost as the FTS ranking
+_REORDER_MIN = 1000 #docs out of rank order before it's rebuilt, or 1% of the index if that's larger
+
+
+class TypeaheadRow:
+    """One catalog row as loaded from SQLite, see SearchMixin.load_typeahead"""
+    __slots__ = ("rowid", "id", "title", "artist", "duration", "search_text", "weight", "downloaded")
+
+    def __init__(self, rowid, id, title, artist, duration, search_text, weight, downloaded):
+        self.rowid = rowid
+        self.id = id
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+        self.search_text = search_text
+        self.weight = weight
+        self.downloaded = downloaded
+
+
+class TypeaheadIndex:
+    def __init__(self, limit: int = 30):
+        """
+        In-memory prefix index answering search-as-you-type without touching SQLite.
+
+        Every title is a document with its normalized title and artist tokens. Documents live
+        in parallel arrays indexed by a dense doc number, each vocabulary token maps to an
+        array('I') of doc numbers, and the sorted vocabulary gives every token sharing a prefix
+        as one contiguous bisect range. A query matches the same rows as the FTS `token*` query,
+        every query token has to prefix some title or artist token, and the top `limit` are
+        picked by static weight (title weight * artist weight * download boost).
+
+        Narrow queries gather their candidates from the postings of the rarest token. Broad ones,
+        the first keystroke or two, instead walk all docs in rank order and stop at `limit` matches,
+        which for a prefix like "a" is a few dozen docs instead of a third of the catalog.
+
+        Updates are append-only. Changing a row tombstones its old doc and appends a new one,
+        so posting lists stay sorted, and the index compacts itself once a quarter of it is dead.
+
+        Args:
+            limit: Default number of results per query.
+        """
+        self.limit = limit
+        self._clear()
+
+        self.ready = False
+
+        #metrics
+        self._queries = 0
+        self._rank_scans = 0
+        self._build_duration = 0.0
+
+
+    def _clear(self):
+        #per doc
+        self._rowids = array("q")
+        self._ids: List[Optional[str]] = []
+        self._titles: List[str] = []
+        self._artists: List[str] = []
+        self._durations = array("d")
+        self._weights = array("d") #before the download boost
+        self._downloaded = bytearray()
+        self._alive = bytearray()
+        self._texts: List[str] = [] #" tok1 tok2 ...", a token prefix check is then one substring test for " " + prefix
+
+        #lookups
+        self._doc_by_rowid: Dict[int, int] = {}
+        self._doc_by_id: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._vocab: List[str] = []
+
+        #rank order, docs appended or reweighted since it was built sit in _side until the next _reorder
+        self._order = array("I")
+        self._unordered = bytearray()
+        self._side: List[int] = []
+
+        #posting counts summed along the vocab as of the last _reorder, sizes any prefix range in two bisects
+        self._sized_vocab: List[str] = []
+        self._sized_cum = array("Q")
+
+        self._dead = 0
+
+
+    #build and update
+    def load(self, rows: Iterable[TypeaheadRow]):
+        """Replaces the whole index"""
+        start = time.perf_counter()
+
+        self.ready = False
+        self._clear()
+        for row in rows:
+            self._append(row, sort_vocab=False)
+        self._vocab = sorted(self._postings)
+        self._reorder()
+
+        self._build_duration = time.perf_counter() - start
+        self.ready = True
+
+
+    def upsert(self, rows: Iterable[TypeaheadRow]):
+        for row in rows:
+            self._tombstone(self._doc_by_rowid.get(row.rowid))
+            self._append(row, sort_vocab=True)
+        self._maybe_compact()
+
+
+    def remove(self, rowids: Iterable[int]):
+        for rowid in rowids:
+            self._tombstone(self._doc_by_rowid.get(rowid))
+        self._maybe_compact()
+
+
+    def remove_id(self, id: str):
+        self._tombstone(self._doc_by_id.get(id))
+        self._maybe_compact()
+
+
+    def set_downloaded(self, id: str, downloaded: bool):
+        doc = self._doc_by_id.get(id)
+        if doc is None:
+            return
+        self._downloaded[doc] = 1 if downloaded else 0
+        self._mark_unordered(doc)
+
+
+    def _append(self, row: TypeaheadRow, sort_vocab: bool):
+        doc = len(self._rowids)
+        tokens = dict.fromkeys(normalize_for_search(row.search_text).split()) #deduped, order kept
+
+        self._rowids.append(row.rowid)
+        self._ids.append(row.id)
+        self._titles.append(row.title)
+        self._artists.append(row.artist)
+        self._durations.append(row.duration or 0.0)
+        self._weights.append(row.weight or 0.0)
+        self._downloaded.append(1 if row.downloaded else 0)
+        self._alive.append(1)
+        self._texts.append(" " + " ".join(tokens))
+        self._unordered.append(0)
+        self._mark_unordered(doc)
+
+        self._doc_by_rowid[row.rowid] = doc
+        self._doc_by_id[row.id] = doc
+
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = array("I")
+                if sort_vocab:
+                    insort(self._vocab, token)
+            postings.append(doc)
+
+
+    def _tombstone(self, doc: Optional[int]):
+        if doc is None or not self._alive[doc]:
+            return
+        self._alive[doc] = 0
+        self._dead += 1
+
+        del self._doc_by_rowid[self._rowids[doc]]
+        if self._doc_by_id.get(self._ids[doc]) == doc:
+            del self._doc_by_id[self._ids[doc]]
+
+
+    def _mark_unordered(self, doc: int):
+        if not self.ready or self._unordered[doc]:
+            return #mid load the order is built at the end anyway
+        self._unordered[doc] = 1
+        self._side.append(doc)
+
+        if len(self._side) > max(_REORDER_MIN, len(self._rowids) // 100):
+            self._reorder()
+
+
+    def _reorder(self):
+        alive = self._alive
+        self._order = array("I", sorted((doc for doc in range(len(self._rowids)) if alive[doc]), key=self._rank, reverse=True))
+        self._unordered = bytearray(len(self._rowids))
+        self._side = []
+
+        self._sized_vocab = list(self._vocab)
+        self._sized_cum = array("Q", [0])
+        total = 0
+        for token in self._sized_vocab:
+            total += len(self._postings[token])
+            self._sized_cum.append(total)
+
+
+    def _maybe_compact(self):
+        if self._dead * 4 < len(self._rowids):
+            return
+
+        live = [
+            TypeaheadRow(
+                self._rowids[doc], self._ids[doc], self._titles[doc], self._artists[doc],
+                self._durations[doc], self._texts[doc], self._weights[doc], self._downloaded[doc]
+            )
+            for doc in range(len(self._rowids)) if self._alive[doc]
+        ]
+        self.load(live)
+
+
+    #query
+    def _prefix_range(self, prefix: str, vocab: Optional[List[str]] = None) -> Tuple[int, int]:
+        vocab = self._vocab if vocab is None else vocab
+        return bisect_left(vocab, prefix), bisect_left(vocab, prefix + _PREFIX_END)
+
+
+    def _prefix_size(self, prefix: str) -> int:
+        """Postings under a prefix, as of the last _reorder. Only steers the query plan, so slightly stale is fine"""
+        lo, hi = self._prefix_range(prefix, self._sized_vocab)
+        return self._sized_cum[hi] - self._sized_cum[lo]
+
+
+    def _rank(self, doc: int) -> Tuple[float, int]:
+        boost = 1.0 if self._downloaded[doc] else _NOT_DOWNLOADED
+        return (self._weights[doc] * boost, -self._rowids[doc]) #ties go to the older row, keeps the order stable across reloads
+
+
+    def rank_key(self, id: str) -> Optional[Tuple[float, int]]:
+        """(score, rowid) of a track, pass it back as `after` to continue a result list below it"""
+        doc = self._doc_by_id.get(id)
+        if doc is None:
+            return None
+        score, neg_rowid = self._rank(doc)
+        return score, -neg_rowid
+
+
+    def search(self, q: str, limit: Optional[int] = None, after: Optional[Tuple[float, int]] = None) -> Optional[List[Track]]:
+        """
+        Args:
+            q (str): Query, normalized the same way as the indexed text.
+            limit (int, optional): Max results, defaults to the index limit.
+            after (tuple, optional): rank_key of the last track of the previous page, only tracks ranked below it are returned.
+
+        Returns:
+            list[Track] | None: Best matches first, or None if the index isn't loaded yet.
+        """
+        if not self.ready:
+            return None
+        self._queries += 1
+
+        limit = limit or self.limit
+        query_tokens = list(dict.fromkeys(normalize_for_search(q).split()))
+        if not query_tokens:
+            return []
+
+        below = None
+        if after is not None:
+            after_rank = (after[0], -after[1])
+            below = lambda doc: self._rank(doc) < after_rank
+
+        #size each token's prefix range
+        live = len(self._rowids) - self._dead
+        ranges = []
+        for token in query_tokens:
+            lo, hi = self._prefix_range(token)
+            if lo == hi:
+                return []
+            ranges.append((max(self._prefix_size(token), 1), token, lo, hi)) #tokens added since the last _reorder count as tiny
+        ranges.sort()
+
+        #expected matches if the tokens were independent, a rank scan reads about limit * live / expected docs
+        expected = live
+        for size, _, _, _ in ranges:
+            expected *= min(size, live) / live
+        if expected * ranges[0][0] > limit * live:
+            #gives up once it has read as many docs as the postings path would, so a bad guess costs at most 2x
+            top = self._scan_by_rank(query_tokens, limit, budget=ranges[0][0], below=below)
+            if top is not None:
+                self._rank_scans += 1
+                return self._to_tracks(top)
+
+        #narrow query, the smallest range drives and the rest are checked per doc
+        _, _, lo, hi = ranges[0]
+        others = [" " + token for _, token, _, _ in ranges[1:]]
+
+        if hi - lo == 1:
+            candidates = self._postings[self._vocab[lo]]
+        else:
+            candidates = set()
+            for i in range(lo, hi):
+                candidates.update(self._postings[self._vocab[i]])
+
+        alive = self._alive
+        texts = self._texts
+        if not others:
+            matches = [doc for doc in candidates if alive[doc]]
+        elif len(others) == 1:
+            other = others[0]
+            matches = [doc for doc in candidates if other in texts[doc] and alive[doc]]
+        else:
+            matches = [doc for doc in candidates if alive[doc] and all(o in texts[doc] for o in others)]
+        if below is not None:
+            matches = [doc for doc in matches if below(doc)]
+        return self._to_tracks(heapq.nlargest(limit, matches, key=self._rank))
+
+
+    def _scan_by_rank(self, query_tokens: List[str], limit: int, budget: int, below=None) -> Optional[List[int]]:
+        """Walks docs best first and stops at `limit` matches. None if `budget` docs weren't enough, the postings path is cheaper then"""
+        alive = self._alive
+        unordered = self._unordered
+        texts = self._texts
+        needles = [" " + token for token in query_tokens]
+
+        if len(needles) == 1:
+            needle = needles[0]
+            matches = lambda doc: needle in texts[doc]
+        else:
+            matches = lambda doc: all(n in texts[doc] for n in needles)
+        if below is not None:
+            text_matches = matches
+            matches = lambda doc: text_matches(doc) and below(doc)
+
+        found = []
+        for doc in islice(self._order, budget):
+            if matches(doc) and alive[doc] and not unordered[doc]:
+                found.append(doc)
+                if len(found) == limit:
+                    break
+        else:
+            if len(self._order) > budget:
+                return None
+
+        #docs that moved since the order was built can land anywhere, so they're always checked
+        found.extend(doc for doc in self._side if alive[doc] and matches(doc))
+        return heapq.nlargest(limit, found, key=self._rank)
+
+
+    def _to_tracks(self, docs: Sequence[int]) -> List[Track]:
+        return [
+            Track(
+                id=self._ids[doc],
+                title=self._titles[doc],
+                artist=self._artists[doc],
+                duration=self._durations[doc]
+            )
+            for doc in docs
+        ]
+
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "rows": len(self._rowids) - self._dead,
+            "tombstones": self._dead,
+            "tokens": len(self._vocab),
+            "postings": sum(len(p) for p in self._postings.values()),
+            "queries": self._queries,
+            "rank_scans": self._rank_scans,
+            "build_duration": self._build_duration,
+        }
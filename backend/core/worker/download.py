@@ -1,12 +1,15 @@
 
 import asyncio
 import traceback
+from typing import Dict, Optional, Set, Tuple
+from backend.core.audio.index import DownloadIndex
 from backend.core.database.audio_database import AudioDatabase
 from backend.core.models.jobs import DownloadJob, EnrichJob
 from backend.core.queue.implementations.play_queue import PlayQueue
 from backend.core.queue.implementations.download_queue import DownloadQueue
 from backend.core.queue.implementations.enrich_queue import EnrichQueue
 from backend.core.youtube.client import YouTubeClient
+import backend.globals as G
 
 
 class DownloadWorker:
@@ -16,119 +19,224 @@ class DownloadWorker:
         download_queue: DownloadQueue,
         enrich_queue: EnrichQueue,
         youtube_client: YouTubeClient,
-        audio_database: AudioDatabase
+        audio_database: AudioDatabase,
+        download_index: DownloadIndex
     ):
         self.play_queue = play_queue
         self.download_queue = download_queue
         self.enrich_queue = enrich_queue
         self.youtube_client = youtube_client #supports retry handling
         self.audio_database = audio_database
+        self.download_index = download_index #in-memory downloaded check, kept current by the download events
+
+        #jobs run as their own tasks, the youtube client and post-processing scheduler bound what runs at once
+        self._slots = asyncio.Semaphore(G.DOWNLOAD_PIPELINE_DEPTH)
+        self._tasks: Set[asyncio.Task] = set()
+        self._in_flight: Dict[str, asyncio.Event] = {} #resolved ids being downloaded, set once their download is done
+
+        #jobs finish in any order, play queue insertions still go out in the order their jobs were popped
+        self._next_seq = 0
+        self._queue_next = 0
+        self._queue_ready: Dict[int, Tuple[DownloadJob, Optional[str]]] = {}
+        self._queue_lock = asyncio.Lock()
 
     async def run(self):
         try:
             while True:
-                #potentially rename to job and define a custom DownloadJob wrapper for track with fields like requested_by
-                job: DownloadJob = await self.download_queue.pop() #thank you to async condition
-                track = None #null this out
+                #a slot per job in flight, so the next download starts while earlier ones are post-processed
+                await self._slots.acquire()
+                try:
+                    #potentially rename to job and define a custom DownloadJob wrapper for track with fields like requested_by
+                    job: DownloadJob = await self.download_queue.pop() #thank you to async condition
+                except BaseException:
+                    self._slots.release()
+                    raise
+
+                seq = None
+                if job.get_queue_first_status() or job.get_queue_last_status():
+                    seq, self._next_seq = self._next_seq, self._next_seq + 1
+
+                task = asyncio.create_task(self._handle(job, seq))
+                self._tasks.add(task)
+                task.add_done_callback(self._job_done)
+        
+        except asyncio.CancelledError:
+            for task in self._tasks:
+                task.cancel()
+            raise
 
-                #these can get overwritten based on the different kinds of executions that are required, consider refactoring with more variables if it gets confusing
-                job_query = job.get_query()
-                job_id = job.get_id()
-                job_type = job.get_type()
-                job_metadata = job.get_metadata()
+        except Exception as e:
+            print(f"[CRITICAL] {self.__class__.__name__} crashed: {e}")
+            print(traceback.format_exc())
 
-                #resolve to downloadable id (yt_id)
-                try:
-                    print(f"[DEBUG] DownloadWorker handling {job_type} type")
-
-                    match job_type:
-                        case "query":
-                            job_id = await self.youtube_client.id_by_query(
-                                q=job_query
-                            )
-                        case "yt_id":
-                            pass
-                        case "seed_id":
-                            job_metadata = await self.audio_database.get_metadata(job_id, artist_delim=",", include_artists=False) #need searchable display for metadata so use , as delimiter
-
-                            #re-queued under old seed_id, and now it is a completed yt_id. without this, duplicate queueing is possible which causes errors
-                            if not job_metadata:
-                                continue
-
-                            print(f"[DEBUG] seed_metadata/job_metadata: {job_metadata}")
-                            
-                            job_query = f'{job_metadata.get("title", "Never Gonna Give You Up")} {job_metadata.get("artist", "Rick Astley")}'
-                            job_id = await self.youtube_client.id_by_query(
-                                q=job_query
-                            )
-                        case _:
-                            print(f"[WARN] Unknown DownloadJob id ({job_id}), query ({job_query}), or type ({job_type})")
-                except Exception as e:
-                    print(f"[ERROR] DownloadWorker error ({e}) resolving id while handling DownloadJob: {job}\n{traceback.format_exc()}")
+        finally:
+            print(f"[INFO] {self.__class__.__name__} shutdown.")
 
-                #attempt download of file
-                try:
-                    already_downloaded = await self.audio_database.is_downloaded(job_id)
 
-                    #downloaded audio already exists
-                    if already_downloaded:
-                        print(f"[DEBUG] file download status: {already_downloaded} file: {job_id}")
-                        continue
+    def _job_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._slots.release()
+        if not task.cancelled() and task.exception():
+            print(f"[ERROR] DownloadWorker job crashed: {task.exception()}")
 
-                    track = await self.youtube_client.download_by_id(
-                        id=job_id,
-                        custom_metadata=job_metadata
-                    )
-                except Exception as e:
-                    print(f"[ERROR] DownloadWorker error ({e}) downloading file while handling DownloadJob: {job}\n{traceback.format_exc()}")
 
-                #post processing
+    async def _handle(self, job: DownloadJob, seq: Optional[int]):
+        track_id = None
+        try:
+            track_id = await self._resolve_and_download(job)
+        finally:
+            if seq is not None:
+                await self._queue_in_order(seq, job, track_id)
+
+
+    async def _queue_in_order(self, seq: int, job: DownloadJob, track_id: Optional[str]):
+        """Hands out play queue insertions in pop order, a job that downloaded nothing still passes its turn on"""
+        self._queue_ready[seq] = (job, track_id)
+
+        async with self._queue_lock:
+            while self._queue_next in self._queue_ready:
+                job, track_id = self._queue_ready.pop(self._queue_next)
+                self._queue_next += 1
+                if not track_id:
+                    continue
+
                 try:
-                    #client should return the classic Track metadata with {id, title, artist, dur} 
-                    if track:
-                        print(f"[DEBUG] DownloadWorker found track: {track}")
-
-                        #seeded entry downloads require database changes
-                        if job_type == "seed_id":
-                            print(f"[DEBUG] DownloadWorker seed_id set_metadata")
-                            await self.audio_database.set_metadata(job.get_id(), metadata={ #little bit jank here now but this must send the old id first, then the new id in the metadata
-                                "new_id": track.id,
-                                "title": track.title,
-                                "title_display": job_metadata.get("title"),
-                                "duration": track.duration
-                            })
-
-                        else:
-                            print(f"[DEBUG] DownloadWorker NON-seed_id register_track")
-                            await self.audio_database.register_track(track)
-                            await self.audio_database.rebuild_search_index()
-
-                        await self.audio_database.register_download(track.id)
-
-                        #automatically attempt enrichment upon a new download
-                        enrich_job = EnrichJob(id=track.id)
-                        await self.enrich_queue.push(enrich_job)
-
-                        #put into a playlist right away? in the case of importing a playlist then yes
-                        if job.get_updates():
-                            await self.audio_database.update_track_playlists(track.id, job.get_updates())
-
-                        #push into play queue? in most cases yes
-                        if job.get_queue_first_status():
-                            await self.play_queue.insert_next(track.id)
-                        
-                        if job.get_queue_last_status():
-                            await self.play_queue.push(track.id)
+                    if job.get_queue_first_status():
+                        await self.play_queue.insert_next(track_id)
 
+                    if job.get_queue_last_status():
+                        await self.play_queue.push(track_id)
                 except Exception as e:
-                    print(f"[ERROR] DownloadWorker error ({e}) database and/or system processing file while handling DownloadJob: {job}\n{traceback.format_exc()}")
-        
-        except asyncio.CancelledError:
-            raise
+                    print(f"[ERROR] DownloadWorker error ({e}) queueing {track_id} for DownloadJob: {job}\n{traceback.format_exc()}")
 
+
+    async def _resolve_and_download(self, job: DownloadJob) -> Optional[str]:
+        """Returns the id of the track downloaded for the job, None if nothing was"""
+        #these can get overwritten based on the different kinds of executions that are required, consider refactoring with more variables if it gets confusing
+        job_query = job.get_query()
+        job_id = job.get_id()
+        job_type = job.get_type()
+        job_metadata = job.get_metadata()
+
+        #resolve to downloadable id (yt_id)
+        try:
+            print(f"[DEBUG] DownloadWorker handling {job_type} type")
+
+            match job_type:
+                case "query":
+                    job_id = await self._resolve_query(job_query)
+                case "yt_id":
+                    pass
+                case "seed_id":
+                    job_metadata = await self.audio_database.get_metadata(job_id, artist_delim=",", include_artists=False) #need searchable display for metadata so use , as delimiter
+
+                    #re-queued under old seed_id, and now it is a completed yt_id. without this, duplicate queueing is possible which causes errors
+                    if not job_metadata:
+                        return
+
+                    print(f"[DEBUG] seed_metadata/job_metadata: {job_metadata}")
+                    
+                    job_query = f'{job_metadata.get("title", "Never Gonna Give You Up")} {job_metadata.get("artist", "Rick Astley")}'
+                    job_id = await self._resolve_query(job_query)
+                case _:
+                    print(f"[WARN] Unknown DownloadJob id ({job_id}), query ({job_query}), or type ({job_type})")
         except Exception as e:
-            print(f"[CRITICAL] {self.__class__.__name__} crashed: {e}")
-            print(traceback.format_exc())
+            print(f"[ERROR] DownloadWorker error ({e}) resolving id while handling DownloadJob: {job}\n{traceback.format_exc()}")
+
+        if not job_id:
+            return await self._download(job, job_id, job_type, job_metadata)
+
+        #a second download of the same track would write the same file, wait for the running one instead,
+        #then this job finds it downloaded and only applies its own playlist updates
+        while job_id in self._in_flight:
+            await self._in_flight[job_id].wait()
 
+        done = self._in_flight[job_id] = asyncio.Event()
+        try:
+            return await self._download(job, job_id, job_type, job_metadata)
         finally:
-            print(f"[INFO] {self.__class__.__name__} shutdown.")
\ No newline at end of file
+            del self._in_flight[job_id]
+            done.set()
+
+
+    async def _download(self, job: DownloadJob, job_id: str, job_type: str, job_metadata: Optional[dict]) -> Optional[str]:
+        track = None
+
+        #attempt download of file
+        try:
+            already_downloaded = self.download_index.has(job_id)
+
+            #downloaded audio already exists, an imported playlist still gets it
+            if already_downloaded:
+                print(f"[DEBUG] file download status: {already_downloaded} file: {job_id}")
+                if job.get_updates():
+                    await self.audio_database.queue_playlist_updates(job_id, job.get_updates())
+                return
+
+            track = await self.youtube_client.download_by_id(
+                id=job_id,
+                custom_metadata=job_metadata,
+                background=job.get_background_status()
+            )
+        except Exception as e:
+            print(f"[ERROR] DownloadWorker error ({e}) downloading file while handling DownloadJob: {job}\n{traceback.format_exc()}")
+
+        #a resolved id that doesn't download shouldn't be handed out again
+        if not track and job_id and job_type in ("query", "seed_id"):
+            await self.audio_database.forget_resolved(job_id)
+
+        #post processing
+        try:
+            #client should return the classic Track metadata with {id, title, artist, dur} 
+            if track:
+                print(f"[DEBUG] DownloadWorker found track: {track}")
+
+                #seeded entry downloads require database changes
+                if job_type == "seed_id":
+                    print(f"[DEBUG] DownloadWorker seed_id set_metadata")
+                    await self.audio_database.set_metadata(job.get_id(), metadata={ #little bit jank here now but this must send the old id first, then the new id in the metadata
+                        "new_id": track.id,
+                        "title": track.title,
+                        "title_display": job_metadata.get("title"),
+                        "duration": track.duration
+                    })
+
+                else:
+                    print(f"[DEBUG] DownloadWorker NON-seed_id register_track")
+                    await self.audio_database.register_track(track)
+
+                #only the rows touched above get re-indexed, and a burst of downloads shares one refresh
+                self.audio_database.request_search_refresh()
+
+                await self.audio_database.register_download(track.id)
+
+                #playback gain instead of a normalized file, see LoudnessMixin
+                if track.loudness:
+                    await self.audio_database.set_loudness(track.id, track.loudness)
+
+                #automatically attempt enrichment upon a new download
+                enrich_job = EnrichJob(id=track.id)
+                await self.enrich_queue.push(enrich_job)
+
+                #put into a playlist? in the case of importing a playlist then yes, batched with the rest of the import
+                if job.get_updates():
+                    await self.audio_database.queue_playlist_updates(track.id, job.get_updates())
+
+                #push into play queue? in most cases yes, _queue_in_order does once earlier jobs have
+                return track.id
+
+        except Exception as e:
+            print(f"[ERROR] DownloadWorker error ({e}) database and/or system processing file while handling DownloadJob: {job}\n{traceback.format_exc()}")
+        return None
+
+
+    async def _resolve_query(self, q: str):
+        """id_by_query behind the database's resolve cache, only a cache miss spawns a yt-dlp search"""
+        hit, video_id = await self.audio_database.get_resolved(q)
+        if hit:
+            print(f"[DEBUG] DownloadWorker resolved '{q}' from cache: {video_id}")
+            return video_id or False
+
+        video_id = await self.youtube_client.id_by_query(q=q)
+        await self.audio_database.cache_resolved(q, video_id or None)
+        return video_id
\ No newline at end of file
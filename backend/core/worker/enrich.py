@@ -73,7 +73,7 @@ class EnrichWorker:
                     title_rowid_map = await self.audio_database.batch_update_titles(titles)
                     await self.audio_database.batch_update_junctions(junctions, title_rowid_map=title_rowid_map, artist_rowid_map=artist_rowid_map)
 
-                    await self.audio_database.rebuild_search_index()
+                    self.audio_database.request_search_refresh()
 
                     print("[DEBUG] Success, hopefully")
 
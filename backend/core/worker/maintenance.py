@@ -0,0 +1,75 @@
+import traceback
+import asyncio
+import time
+from backend.core.database.audio_database import AudioDatabase
+
+import backend.globals as G
+
+class MaintenanceWorker:
+    def __init__(self, audio_database: AudioDatabase):
+        """
+        Runs AudioDatabase.run_maintenance every MAINTENANCE_INTERVAL seconds, and the WAL checkpoint on
+        its own whenever the WAL outgrows MAINTENANCE_WAL_BYTES.
+
+        Both wait for an idle tick, one where no database operation ran since the previous one, so
+        maintenance doesn't compete with a download burst or an enrichment pass. A full run that has
+        been waiting on idle for another whole interval runs anyway.
+        """
+        self.audio_database = audio_database
+
+        self._last_run = time.time() - G.MAINTENANCE_INTERVAL #due right away, so the first idle tick after startup runs
+        self._last_activity = None
+
+        #metrics
+        self._ticks = 0
+        self._busy_ticks = 0
+        self._checkpoints = 0
+
+
+    async def run(self):
+        try:
+            while True:
+                await asyncio.sleep(G.MAINTENANCE_TICK)
+
+                try:
+                    await self.tick()
+                except Exception as e:
+                    print(f"[ERROR] MaintenanceWorker error ({e})\n{traceback.format_exc()}")
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            print(f"[CRITICAL] {self.__class__.__name__} crashed: {e}")
+            print(traceback.format_exc())
+
+
+    async def tick(self):
+        self._ticks += 1
+        db = self.audio_database
+
+        activity = db.db_activity()
+        idle = activity == self._last_activity
+        if not idle:
+            self._busy_ticks += 1
+
+        waited = time.time() - self._last_run
+        if (idle and waited >= G.MAINTENANCE_INTERVAL) or waited >= 2 * G.MAINTENANCE_INTERVAL:
+            await db.run_maintenance()
+            self._last_run = time.time()
+        elif idle and (await db.database_metrics())["wal_bytes"] > G.MAINTENANCE_WAL_BYTES:
+            await db.checkpoint_wal()
+            self._checkpoints += 1
+
+        #taken after our own operations so they don't count as activity on the next tick
+        self._last_activity = db.db_activity()
+
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self._ticks,
+            "busy_ticks": self._busy_ticks,
+            "wal_checkpoints": self._checkpoints,
+            "last_run": int(self._last_run),
+            "next_run_after": int(self._last_run + G.MAINTENANCE_INTERVAL),
+        }
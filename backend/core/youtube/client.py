@@ -1,6 +1,7 @@
 #backend/core/audio/youtube_client.py
 
 import asyncio
+from collections import deque
 from pathlib import Path
 import sys
 import time
@@ -8,6 +9,7 @@ import os
 from typing import Callable, List, Optional
 
 from backend.core.audio.processor import AudioProcessor 
+from backend.core.audio.scheduler import PostProcessScheduler
 
 from backend.core.lib.utils import get_audio_path
 from backend.core.events.event_bus import EventBus
@@ -38,6 +40,7 @@ class YouTubeClient:
         ffmpeg_location: Optional[str] = None,
 
         post_processor: Optional[AudioProcessor] = None,
+        post_scheduler: Optional[PostProcessScheduler] = None,
     ):
         self.name = name
         self.base_dir = base_dir
@@ -47,7 +50,7 @@ class YouTubeClient:
         self.YT_PREFIX = "YT___" #source for id's, so that it'll be like YT___#######...
 
         self.dl_format_filter = dl_format_filter or "bestaudio/best"
-        self.dl_format = dl_format or "wav"
+        self.dl_format = dl_format or G.DOWNLOAD_FORMAT #"source" keeps the downloaded stream's own codec, no PCM intermediate
         self.dl_quality = dl_quality or "0"
         self.dl_user_agent = dl_user_agent or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
         #self.dl_user_agent = dl_user_agent or "Mozilla/5.0" #"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
@@ -65,6 +68,14 @@ class YouTubeClient:
 
         #post processing
         self.post_processor = post_processor #handles finding ffmpeg and ffprobe on its own
+        self.post_scheduler = post_scheduler #runs post_processor's work off the download path when set
+
+        #yt-dlp runs for the download worker, downloads and query resolutions, hold a slot only while yt-dlp runs,
+        #post-processing happens after it's released. /search/deep isn't bounded, someone is waiting on it
+        self._download_slots = asyncio.Semaphore(G.DOWNLOAD_CONCURRENCY)
+
+        #metrics, see download_stats
+        self._download_reports = deque(maxlen=G.DOWNLOAD_REPORTS)
 
         #system check, not needed if python version >= 3.8
         if sys.platform == "win32": 
@@ -279,6 +290,7 @@ class YouTubeClient:
         id: str, 
         timeout: int = 60,
         custom_metadata: Optional[dict] = None,
+        background: bool = False,
         _retry: bool = True
     ) -> bool:
         """
@@ -300,6 +312,8 @@ class YouTubeClient:
                 - Any other attribute present on the 'Track' class.
                 Values that are None or empty strings will be ignored.
                 Duration is overwritten by the post-processing output value.
+            background (bool): Nobody is waiting to play it, post-processing runs at background
+                priority, see PostProcessScheduler.
             _retry (bool): Internal safety flag. If True and the download fails, 
                 the method will attempt to self-update yt-dlp and try exactly 
                 one more time. Defaults to True.
@@ -316,9 +330,12 @@ class YouTubeClient:
         #send task start notification
         await self._emit_event(action=YTCA.START, payload={})
 
+        #yt-dlp writes the audio to stdout and the post processor encodes it as it arrives, see AudioProcessor.process_pipe
+        streamed = self.post_processor is not None and self.post_processor.pipeline == "stream"
+
         #prepares cmd line arguments
-        output_path = get_audio_path(id=id, base_dir=self.base_dir, audio_format=self.dl_format)
         temp_path = get_audio_path(id=id, base_dir=self.base_dir, audio_format=self.dl_temp_format)
+        stream_path = get_audio_path(id=id, base_dir=self.base_dir, audio_format="webm")
 
         if id.startswith(self.YT_PREFIX):
             id = id[len(self.YT_PREFIX):]
@@ -326,13 +343,13 @@ class YouTubeClient:
         url = f"https://www.youtube.com/watch?v={id}"
 
         #cmd line download
-        cmd = [
+        cmd = self._stream_cmd(url) if streamed else [
             self.python_bin,
             "-m",
             "yt_dlp",
             "-x", #audio only
             "-f", self.dl_format_filter, #defeat SABR fragmentation potentially
-            "--audio-format", self.dl_format,
+            *(["--audio-format", self.dl_format] if self.dl_format != "source" else []), #-x alone extracts without converting
             "--audio-quality", self.dl_quality,
             "--user-agent", self.dl_user_agent,
             "--quiet",
@@ -345,7 +362,7 @@ class YouTubeClient:
             "--extractor-args", "youtube:player_client=default,-android_sdkless",
             "--js-runtimes", f"deno:{self.js_runtime_bin}", #jsruntime
             "--ffmpeg-location", self.ffmpeg_location, #explicitly provide ffmpeg location
-            "--print", f"after_move:%(id)s{G.UNIT_SEP}%(title)s{G.UNIT_SEP}%(uploader)s{G.UNIT_SEP}%(duration)s", #complete print after download
+            "--print", f"after_move:%(id)s{G.UNIT_SEP}%(title)s{G.UNIT_SEP}%(uploader)s{G.UNIT_SEP}%(duration)s{G.UNIT_SEP}%(filepath)s{G.UNIT_SEP}%(filesize,filesize_approx)s", #complete print after download
             url
         ]
         print(f"Running command: {' '.join(cmd)}")
@@ -353,18 +370,24 @@ class YouTubeClient:
         track = None
         try:
             start_time = time.time()
-            code, out, err = await self._run_subprocess(cmd, timeout=timeout)
-
-            if code != 0:
-                raise RuntimeError(f"[download_by_id] yt-dlp exited with code {code}: {err.strip()}")
+            async with self._download_slots:
+                if streamed:
+                    #with -o - yt-dlp prints to stderr, stdout is the audio
+                    processed, out = await self.post_processor.process_pipe(cmd, stream_path, "webm", timeout=timeout)
+                else:
+                    code, out, err = await self._run_subprocess(cmd, timeout=timeout)
+
+                    if code != 0:
+                        raise RuntimeError(f"[download_by_id] yt-dlp exited with code {code}: {err.strip()}")
         
             elapsed = time.time() - start_time
             print(f"[INFO] Downloaded {id} in {elapsed:.2f}s")
 
             # Parse metadata from stdout
             try:
-                line = out.strip().splitlines()[0]  # first line
-                id, title, artist, duration = line.split(G.UNIT_SEP)
+                line = next(line for line in out.strip().splitlines() if line.count(G.UNIT_SEP) == 5) #stderr may carry warnings too
+                id, title, artist, duration, filepath, filesize = line.split(G.UNIT_SEP)
+                output_path = Path(filepath)
             except Exception as e:
                 raise ValueError(f"[download_by_id] Failed to parse metadata: {e}, Output was: {out}")
 
@@ -383,16 +406,25 @@ class YouTubeClient:
                     if v not in (None, "") and hasattr(track, k):
                         setattr(track, k, v)
 
-            if self.post_processor:
-                #postprocess audio file
-                await self.post_processor.trim_silence(output_path)
-                await self.post_processor.apply_loudnorm(output_path)
-
-                done_path = await self.post_processor.compress(output_path, "webm")
-
-                #override raw duration with trimmed duration
-                trimmed_duration = await self.post_processor.get_duration(done_path)
-                setattr(track, "duration", trimmed_duration)
+            if streamed:
+                #download and encode overlap, both are in download_seconds and only the final file was written
+                report = {
+                    "id": true_id,
+                    "format": "stream",
+                    "download_bytes": 0,
+                    "process_bytes": processed.bytes_written,
+                    "download_seconds": elapsed,
+                    "process_seconds": 0.0,
+                }
+                setattr(track, "duration", processed.duration)
+                setattr(track, "loudness", processed.loudness)
+            else:
+                report = await self._process_download(track, output_path, filesize, elapsed, background)
+
+            report["bytes_written"] = report["download_bytes"] + report["process_bytes"]
+            report["time_to_playable"] = time.time() - start_time
+            self._download_reports.append(report)
+            print(f"[INFO] {true_id} playable after {report['time_to_playable']:.2f}s, {report['bytes_written'] / 1e6:.1f}MB written ({report['format']} download)")
 
             await self._emit_event(action=YTCA.DOWNLOAD, payload={"content": track})
             return track
@@ -408,7 +440,7 @@ class YouTubeClient:
                 success = await self.update()
                 if success:
                     print(f"[INFO] Retrying download after yt-dlp update")
-                    return await self.download_by_id(id, timeout, custom_metadata, _retry=False) #try again without retry flag
+                    return await self.download_by_id(id, timeout, custom_metadata, background, _retry=False) #try again without retry flag
 
             #if update fails or retry fails, raise original exception
             raise
@@ -418,6 +450,83 @@ class YouTubeClient:
             await self._emit_event(action=YTCA.FINISH, payload={})
                 
 
+    def _stream_cmd(self, url: str) -> List[str]:
+        """yt-dlp writing the raw audio stream to stdout for AudioProcessor.process_pipe, nothing is extracted or converted"""
+        return [
+            self.python_bin,
+            "-m",
+            "yt_dlp",
+            "-f", f"bestaudio[ext=webm]/{self.dl_format_filter}", #webm is streamable, an m4a may need to seek for its index
+            "--user-agent", self.dl_user_agent,
+            "--quiet",
+            "--no-playlist",
+            "--no-cache-dir", #prevents using stale cached DASH fragments
+            "--retries", "10",
+            "--fragment-retries", "3", #network robustness for missing packets
+            "--retry-sleep", "linear=1::5",
+            "-o", "-",
+            "--extractor-args", "youtube:player_client=default,-android_sdkless",
+            "--js-runtimes", f"deno:{self.js_runtime_bin}", #jsruntime
+            "--no-simulate", #--print would skip the download otherwise
+            "--print", f"before_dl:%(id)s{G.UNIT_SEP}%(title)s{G.UNIT_SEP}%(uploader)s{G.UNIT_SEP}%(duration)s{G.UNIT_SEP}-{G.UNIT_SEP}%(filesize,filesize_approx)s",
+            url
+        ]
+
+
+    async def _process_download(self, track: Track, output_path: Path, filesize: str, elapsed: float, background: bool = False) -> dict:
+        """Post-processes a file yt-dlp finished downloading, returns the download's report without the totals"""
+        #the stream yt-dlp fetched, plus its extracted copy unless extraction left the file as it was
+        download_bytes = output_path.stat().st_size
+        if filesize.isdigit() and int(filesize) != download_bytes:
+            download_bytes += int(filesize)
+
+        report = {
+            "id": track.id,
+            "format": output_path.suffix.lstrip("."),
+            "download_bytes": download_bytes,
+            "process_bytes": 0,
+            "download_seconds": elapsed,
+            "process_seconds": 0.0,
+        }
+
+        if self.post_processor:
+            #postprocess audio file
+            process_start = time.time()
+            if self.post_scheduler:
+                processed = await self.post_scheduler.submit(output_path, "webm", background=background)
+            else:
+                processed = await self.post_processor.process(output_path, "webm")
+            report["process_seconds"] = time.time() - process_start
+            report["process_bytes"] = processed.bytes_written
+
+            #override raw duration with trimmed duration
+            setattr(track, "duration", processed.duration)
+            setattr(track, "loudness", processed.loudness)
+
+        return report
+
+
+    def download_stats(self) -> dict:
+        """
+        Per download disk writes and time to playable, for the last DOWNLOAD_REPORTS downloads.
+
+        Returns:
+            dict: Download format and post-processing pipeline, averages over the recent downloads and
+                the downloads themselves, newest last.
+        """
+        reports = list(self._download_reports)
+        averages = {}
+        for key in ("download_bytes", "process_bytes", "bytes_written", "download_seconds", "process_seconds", "time_to_playable"):
+            averages[key] = sum(r[key] for r in reports) / len(reports) if reports else 0
+
+        return {
+            "dl_format": self.dl_format,
+            "pipeline": self.post_processor.pipeline if self.post_processor else None,
+            "average": averages,
+            "recent": reports,
+        }
+
+
     async def id_by_query(
         self,
         q: str,
@@ -425,7 +534,8 @@ class YouTubeClient:
         custom_metadata: Optional[dict] = None
     ) -> bool:
         
-        result = await self.search(q=q, limit=1, timeout=timeout) #doesnt emit when searching 1 item
+        async with self._download_slots: #download jobs resolve in parallel, a playlist import would start a search per job at once
+            result = await self.search(q=q, limit=1, timeout=timeout) #doesnt emit when searching 1 item
 
         if not result:
             print(f"[WARN]: No results found for query: {q}")
@@ -24,3 +24,12 @@ class DownloadLogFailError(Exception):
     """Raised when a sql download logging attempt fails."""
     pass
 
+#/core/database/pagination.py
+class InvalidCursorError(Exception):
+    """Raised when a pagination cursor can't be decoded or belongs to a different listing."""
+    pass
+
+#/core/database/migrations.py
+class SchemaVersionError(Exception):
+    """Raised when a database's schema version is newer than the running build knows about."""
+    pass
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from enum import Enum
 
@@ -17,11 +18,67 @@ MUSICBRAINZ_CLIENT_NAME = "musicbrainz_client"
 ROOT_DIR = Path(__file__).resolve().parent.parent
 DB_FILE = ROOT_DIR / "backend" / "data" / "audio.db"
 DOWNLOAD_DIR = ROOT_DIR / "backend" / "data" / "downloads"
+DOWNLOAD_SHARD_DEPTH = 2 #folder levels under DOWNLOAD_DIR, see lib/utils.get_audio_dir
+DOWNLOAD_SHARD_WIDTH = 2 #hex characters of the id's sha1 per level, 256 folders per level
+DOWNLOAD_MIGRATION_BATCH = 500 #files moved from the flat folder per step, see audio/layout.py
+DOWNLOAD_MIGRATION_GRACE = 1.0 #seconds a moved file keeps its flat name for requests that already looked it up
+SEED_SNAPSHOT = ROOT_DIR / "backend" / "core" / "database" / "seed.db" #prebuilt seeded database copied on first boot if present, see cli.py seed-snapshot
 
 
 UNIT_SEP = "\x1f"
 
+SEARCH_REFRESH_DEBOUNCE = 0.5 #seconds, search index refresh requests within this window are coalesced
+SEARCH_CACHE_MAX_ENTRIES = 512
+SEARCH_CACHE_MAX_BYTES = 4 * 1024 * 1024 #4MB, approximate
+SEARCH_LIMIT = 30 #results per /search/ query
+SEARCH_CANDIDATE_POOL = 1000 #best bm25 matches reranked by static weight per FTS query, see SearchMixin._search_fts and tests/benchmarks/bench_ranking.py
+SEARCH_INDEX_VERSION = 1 #bump when what catalog_fts indexes or how it tokenizes changes, startup rebuilds an index built by another version
+SEARCH_TYPEAHEAD = True #answer /search/ from the in-memory prefix index, FTS is the fallback
+SEARCH_TYPEAHEAD_MAX_CHARS = 3 #longest single-token query the typeahead answers, longer ones get the bm25 ranked FTS path
+SEARCH_FUZZY = True #retry queries that found nothing with misspelled tokens corrected against the indexed vocabulary
+SEARCH_FUZZY_MIN_SIMILARITY = 0.5 #dice coefficient a correction needs
+
+SEED_BATCH_SIZE = 2000 #csv rows staged per executemany
+
+POSITION_MIN_GAP = 1e-6 #a reorder leaving a smaller gap between neighbours queues its list for renumbering
+POSITION_REBALANCE_DEBOUNCE = 5.0 #seconds, crowded lists queued within this window are renumbered together
+PLAYLIST_ADD_DEBOUNCE = 2.0 #seconds, imported tracks finishing within this window are appended to their playlists in one write
+
+ARTIST_COMPACTION_VERSION = 1 #bump when how artist names are normalized changes, startup compacts again
+ARTIST_COMPACTION_BATCH = 500 #artists renamed or merged per write op
+
+DB_STATS_SAMPLES = 1024 #most recent operations per method kept for the /stats/db percentiles
+
+MAINTENANCE_TICK = 30.0 #seconds between MaintenanceWorker checks, a tick with no database operations since the last one counts as idle
+MAINTENANCE_INTERVAL = 6 * 60 * 60 #seconds between full maintenance runs, one waiting twice this long runs even if busy
+MAINTENANCE_WAL_BYTES = 64 * 1024 * 1024 #64MB, an idle tick with a bigger WAL checkpoints it
+MAINTENANCE_FTS_MERGE_PAGES = 500 #leaf pages of catalog_fts segments merged per run
+MAINTENANCE_VACUUM_PAGES = 10000 #free pages returned to the filesystem per run
+
+RESOLVE_CACHE_TTL = 30 * 24 * 60 * 60 #seconds a query keeps resolving to the same video without searching again
+RESOLVE_CACHE_NEGATIVE_TTL = 6 * 60 * 60 #seconds a query that found nothing isn't searched again, short because a failed yt-dlp run looks the same
+
+BULK_MAX_IDS = 10000 #track ids per bulk playlist, like or delete request
+
+PAGE_DEFAULT_LIMIT = 100 #rows per page when a paginated listing is asked for a cursor without a limit
+PAGE_MAX_LIMIT = 1000
+
 STREAM_CHUNK_SIZE = 1024 * 1024 #1MB
 
-AUDIO_EXTENSIONS = ["wav", "webm", "opus", "mp3"] #order matters because it will look for best quality first
+DOWNLOAD_FORMAT = "source" #yt-dlp --audio-format, "source" keeps the stream as downloaded (opus/m4a) instead of converting it to e.g. "wav"
+DOWNLOAD_REPORTS = 100 #recent downloads kept for /stats/downloads
+AUDIO_PIPELINE = "fused" #post-processing per download, "stream" (yt-dlp piped into one ffmpeg encode), "fused" (analyze, then trim, loudnorm and encode in one pass) or "steps", see AudioProcessor.process
+AUDIO_LOUDNESS = "gain" #"gain" measures loudness and stores the playback gain, see LoudnessMixin, "normalize" re-encodes with loudnorm
+LOUDNESS_TARGET = -16.0 #LUFS playback gain aims for until retargeted, the value in use is kept in the meta table
+LOUDNESS_TRUE_PEAK = -1.5 #dBTP ceiling, caps the gain of tracks that would clip at the target
+POSTPROCESS_WORKERS = os.cpu_count() or 1 #post-processing jobs at once, see PostProcessScheduler
+POSTPROCESS_FFMPEG_THREADS = max(1, (os.cpu_count() or 1) // POSTPROCESS_WORKERS) #per ffmpeg run, fewer workers get more threads each
+POSTPROCESS_QUEUE = 8 #downloaded files waiting for a post-processing slot before downloads wait too
+POSTPROCESS_NICE = 10 #nice for background post-processing, playlist imports and other downloads nobody is waiting on
+POSTPROCESS_IONICE = True #lowest best-effort io priority for background post-processing, linux only
+DOWNLOAD_CONCURRENCY = 1 #yt-dlp processes the download worker runs at once, downloads and query searches, post-processing overlaps with them
+DOWNLOAD_PIPELINE_DEPTH = POSTPROCESS_WORKERS + 1 #download jobs in flight, enough to keep every post-processing slot fed
+AUDIO_PIPE_BUFFER_BYTES = 1024 * 1024 #kernel pipe buffer between yt-dlp and ffmpeg in the "stream" pipeline, linux only
+
+AUDIO_EXTENSIONS = ["wav", "webm", "opus", "m4a", "mp3"] #order matters because it will look for best quality first
 
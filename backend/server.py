@@ -8,6 +8,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from backend.core.database.cleanup import cleanup_download_folder
 from backend.core.audio.processor import AudioProcessor
+from backend.core.audio.scheduler import PostProcessScheduler
 from backend.core.youtube.client import YouTubeClient
 
 from backend.core.musicbrainz.client import MusicBrainzClient
@@ -16,7 +17,9 @@ from backend.core.database.audio_database import AudioDatabase
 
 from backend.core.events.event_bus import EventBus
 from backend.core.events.websocket.manager import WebsocketManager
-from backend.core.events.handlers import register_event_handlers
+from backend.core.events.handlers import register_event_handlers, register_typeahead_handlers, register_download_index_handlers
+from backend.core.audio.index import DownloadIndex
+from backend.core.audio.layout import run_download_migration
 
 from backend.core.queue.manager import QueueManager
 from backend.core.queue.implementations.play_queue import PlayQueue
@@ -25,6 +28,7 @@ from backend.core.queue.implementations.enrich_queue import EnrichQueue
 
 from backend.core.worker.download import DownloadWorker
 from backend.core.worker.enrich import EnrichWorker
+from backend.core.worker.maintenance import MaintenanceWorker
 
 from backend.core.playlists.manager import PlaylistExtractorManager
 
@@ -35,6 +39,7 @@ from backend.api.routers import audio_router
 from backend.api.routers import playlists_router
 from backend.api.routers import queue_router
 from backend.api.routers import search_router
+from backend.api.routers import stats_router
 from backend.api.routers import websocket_router
 
 
@@ -53,11 +58,21 @@ async def lifespan(app: FastAPI):
     await db.initialize()
     await cleanup_download_folder(db, G.DOWNLOAD_DIR)
 
+    #download state in memory, one folder scan here and download events after that
+    download_index = DownloadIndex(base_dir=G.DOWNLOAD_DIR)
+    download_index.load(item["id"] for item in await db.get_downloads_content())
+
+    #moves files from before sharding into their shard folders while serving, a no-op once they're all moved
+    layout_task = asyncio.create_task(run_download_migration(G.DOWNLOAD_DIR, download_index))
+
     print(await db.search(""))
 
     # ytdlp
-    pp = AudioProcessor()
-    yt = YouTubeClient(name=G.YOUTUBE_CLIENT_NAME, base_dir=G.DOWNLOAD_DIR, event_bus=event_bus, post_processor=pp)
+    pp = AudioProcessor(threads=G.POSTPROCESS_FFMPEG_THREADS)
+    background_pp = AudioProcessor(threads=G.POSTPROCESS_FFMPEG_THREADS, niceness=G.POSTPROCESS_NICE, ionice=G.POSTPROCESS_IONICE)
+    post_scheduler = PostProcessScheduler(pp, background_processor=background_pp)
+    postprocess_task = asyncio.create_task(post_scheduler.run())
+    yt = YouTubeClient(name=G.YOUTUBE_CLIENT_NAME, base_dir=G.DOWNLOAD_DIR, event_bus=event_bus, post_processor=pp, post_scheduler=post_scheduler)
 
     # musicbrainz
     mb = MusicBrainzClient(name=G.MUSICBRAINZ_CLIENT_NAME)
@@ -75,12 +90,15 @@ async def lifespan(app: FastAPI):
     playlist_ext_manager = PlaylistExtractorManager()
 
     # workers
-    download_worker = DownloadWorker(play_queue=play_queue, download_queue=download_queue, enrich_queue=enrich_queue, youtube_client=yt, audio_database=db)
+    download_worker = DownloadWorker(play_queue=play_queue, download_queue=download_queue, enrich_queue=enrich_queue, youtube_client=yt, audio_database=db, download_index=download_index)
     download_task = asyncio.create_task(download_worker.run())
 
     enrich_worker = EnrichWorker(enrich_queue=enrich_queue, musicbrainz_client=mb, audio_database=db)
     enrich_task = asyncio.create_task(enrich_worker.run())
 
+    maintenance_worker = MaintenanceWorker(audio_database=db)
+    maintenance_task = asyncio.create_task(maintenance_worker.run())
+
     # Assign to app.state for global access
     app.state.websocket_manager = websocket_manager
     app.state.event_bus = event_bus
@@ -89,12 +107,17 @@ async def lifespan(app: FastAPI):
     app.state.playlist_ext_manager = playlist_ext_manager
 
     app.state.db = db
+    app.state.download_index = download_index
+    app.state.maintenance_worker = maintenance_worker
     app.state.yt = yt
+    app.state.post_scheduler = post_scheduler
 
 
     
     # triggers
     register_event_handlers(event_bus=event_bus, websocket_manager=websocket_manager)
+    register_typeahead_handlers(event_bus=event_bus, db=db)
+    register_download_index_handlers(event_bus=event_bus, db=db, index=download_index)
 
     try:
         yield #app runs
@@ -104,10 +127,15 @@ async def lifespan(app: FastAPI):
 
         download_task.cancel()
         enrich_task.cancel()
+        maintenance_task.cancel()
+        layout_task.cancel()
+        postprocess_task.cancel()
 
-        await asyncio.gather(download_task, enrich_task, return_exceptions=True)
+        await asyncio.gather(download_task, enrich_task, maintenance_task, layout_task, postprocess_task, return_exceptions=True)
 
         await mb.close()
+        await db.flush_playlist_adds()
+        db.close()
 
         print("Cleanup complete.")
 
@@ -119,6 +147,7 @@ app.add_middleware(
     allow_origins=["*"],  # or your ngrok URL for production
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"], #paginated listings, see get_downloads_page
 )
 
 app.mount("/frontend", StaticFiles(directory="frontend"), name="frontend")
@@ -127,6 +156,7 @@ app.include_router(audio_router.router)
 app.include_router(playlists_router.router)
 app.include_router(queue_router.router)
 app.include_router(search_router.router)
+app.include_router(stats_router.router)
 
 app.include_router(websocket_router.router)
 
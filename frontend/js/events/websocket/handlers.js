@@ -39,6 +39,7 @@ export const handlers = {
 
         create_playlist: handleADCreatePlaylist,
         update_playlists: handleADUpdatePlaylists,
+        update_playlist_tracks: handleADUpdatePlaylistTracks,
         edit_playlist: handleADEditPlaylist,
         delete_playlist: handleADDeletePlaylist,
 
@@ -46,9 +47,11 @@ export const handlers = {
         //unlog_track: handleADUnlogTrack,
         log_download: handleADLogDownload,
         unlog_download: handleADUnlogDownload,
+        unlog_downloads: handleADUnlogDownloads,
 
         search: handleADSearch,
         fetch_likes: handleADFetchLikes,
+        like_tracks: handleADLikeTracks,
     },
     youtube_client: {
         //search: handleYTSE,
@@ -181,6 +184,21 @@ function handleADUpdatePlaylists(payload) {
     //ignore notif because frontend handles optimistically
 }
 
+function handleADUpdatePlaylistTracks(payload) {
+    //see backend/core/database/mixins/playlists.py, one event for a whole bulk add or remove
+    const playlistId = payload.content.id;
+    const { added, removed } = payload.content;
+
+    for (const trackId of added) {
+        if (!PlaylistStore.hasTrack(playlistId, trackId)) PlaylistStore.addTrackId(playlistId, trackId);
+    }
+    for (const trackId of removed) {
+        PlaylistStore.removeTrack(playlistId, trackId);
+    }
+
+    renderPlaylistById(playlistId);
+}
+
 function handleADEditPlaylist(payload) {
     //see backend/core/database/audio_database.py
     console.log("[handleADEditPlaylist] payload:", payload);
@@ -238,6 +256,28 @@ function handleADUnlogDownload(payload) {
 }
 
 
+function handleADUnlogDownloads(payload) {
+    console.log("[handleADUnlogDownloads] payload content:", payload.content);
+
+    //update every store first, then render each view once
+    const trackIds = payload.content.ids;
+    if (trackIds.length === 0) return;
+
+    const allPlaylists = PlaylistStore.getAll();
+    for (const trackId of trackIds) {
+        TrackStore.remove(trackId);
+        LikeStore.remove(trackId);
+        Object.keys(allPlaylists).forEach(playlistId => PlaylistStore.removeTrack(playlistId, trackId));
+    }
+
+    renderLibrary();
+    renderLiked();
+    Object.keys(allPlaylists).forEach(playlistId => renderPlaylistById(playlistId));
+
+    //notif
+    showToast(`Deleted ${trackIds.length}`);
+}
+
 
 function handleADSearch(payload) {
     //do something with RecentStore.js here
@@ -255,6 +295,13 @@ function handleADFetchLikes(payload) {
     renderLiked();
 }
 
+function handleADLikeTracks(payload) {
+    for (const trackId of payload.content.ids) {
+        if (!LikeStore.has(trackId)) LikeStore.toggle(trackId);
+    }
+    renderLiked();
+}
+
 
 
 
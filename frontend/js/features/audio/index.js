@@ -61,10 +61,25 @@ export {
     trackState,
     cleanupCurrentAudio
 } from "./lib/streamTrick.js";
-import { loadTrack as rawLoadTrack } from "./lib/streamTrick.js";
+import { loadTrack as rawLoadTrack, setPlaybackGain } from "./lib/streamTrick.js";
+import { getTrackGain } from "./lib/api.js";
+
+let loadingTrackId = null; //latest loadTrack call, an earlier one still resolving mustn't apply its gain
 
 export async function loadTrack(trackId) {
-    await rawLoadTrack(audioEl, trackId);
+    loadingTrackId = trackId;
+
+    //fetched while the track loads, a failed lookup just plays it as is
+    const gain = getTrackGain(trackId).catch(() => null);
+
+    const loaded = await rawLoadTrack(audioEl, trackId);
+    const gainDb = await gain;
+
+    //skipped past before it finished loading, the newer load sets its own gain
+    if (loadingTrackId !== trackId) return loaded;
+
+    setPlaybackGain(gainDb);
+    return loaded;
 }
 
 
@@ -16,4 +16,17 @@ export async function getAudioStream(trackId) {
     }
 
     return response;
-}
\ No newline at end of file
+}
+
+
+/**
+ * Playback gain of a track in dB, null if it was never measured and plays as is
+ * @param {string} trackId
+ * @returns {Promise<number|null>}
+ */
+export async function getTrackGain(trackId) {
+    const response = await getResponse(`/audio/gain/${trackId}`);
+    const data = await response.json();
+
+    return data.content?.gain ?? null;
+}
@@ -2,6 +2,10 @@ import { logDebug } from "../../../utils/debug.js";
 
 let audioCtx, dest;
 
+let trackGain = null; //GainNode of the current ios track element, see setPlaybackGain
+
+let elementGain = null; //GainNode behind the visible element (non-ios), built once since an element can only be a source once
+
 let currentPlayer = null; //either audioEl (non-ios) or trackEl (ios)
 
 let savedState = null; //to save the state of the audio graph if AudioContext is interrupted (ios)
@@ -153,7 +157,8 @@ async function ensureAudioContext(audioEl, srcUrl = null) {
         trackEl.crossOrigin = "anonymous";
 
         const node = audioCtx.createMediaElementSource(trackEl);
-        node.connect(dest);
+        trackGain = audioCtx.createGain(); //ios ignores element volume, playback gain goes through the graph
+        node.connect(trackGain).connect(dest);
 
         logDebug("loadTrack node connected.");
 
@@ -209,6 +214,8 @@ export async function loadTrack(audioEl, trackId) {
             return Promise.resolve(true);
         }        
         
+        ensureElementGain(audioEl);
+
         audioEl.src = fullUrl;
         audioEl.load();
         currentPlayer = audioEl;
@@ -219,6 +226,52 @@ export async function loadTrack(audioEl, trackId) {
     }
 }
 
+/**
+ * Routes the visible element through a GainNode (non-iOS), so playback gain can also boost a track
+ * quieter than the target, which element volume capped at 1 can't
+ * - the context starts suspended without a user gesture, playLoadedTrack resumes it
+ * - without Web Audio, setPlaybackGain falls back to element volume
+ *
+ * @param {HTMLAudioElement} audioEl - visible <audio> element
+ */
+function ensureElementGain(audioEl) {
+    if (elementGain || typeof AudioContext === "undefined") return;
+
+    try {
+        audioCtx = audioCtx || new AudioContext();
+        const node = audioCtx.createMediaElementSource(audioEl);
+        elementGain = audioCtx.createGain();
+        node.connect(elementGain).connect(audioCtx.destination);
+        logDebug("[ensureElementGain] Element routed through gain node");
+    } catch (e) {
+        logDebug("[ensureElementGain] Falling back to element volume:", e);
+    }
+}
+
+/**
+ * Applies a track's playback gain, the loudness normalization the backend stores instead of re-encoding
+ * - the gain is already capped by the track's true peak on the backend, so boosting doesn't clip
+ * - non-iOS: the element's GainNode, or element volume (which can't go above 1) without Web Audio
+ * - iOS: the track's GainNode, element volume is read only there
+ *
+ * @param {number|null} gainDb - gain from /audio/gain, null for unmeasured tracks
+ */
+export function setPlaybackGain(gainDb) {
+    const linear = gainDb == null ? 1 : Math.pow(10, gainDb / 20);
+
+    if (IS_IOS_SAFARI) {
+        if (trackGain) trackGain.gain.value = linear;
+        return;
+    }
+
+    if (elementGain) {
+        elementGain.gain.value = linear;
+        return;
+    }
+
+    if (currentPlayer) currentPlayer.volume = Math.min(1, linear);
+}
+
 export async function playLoadedTrack() {
     if (!currentPlayer) return;
 
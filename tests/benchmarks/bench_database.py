@@ -0,0 +1,103 @@
+"""
+Benchmarks AudioDatabase mixin methods, ops/sec with pooled connections vs the old connect-per-operation cursor.
+
+Usage:
+    python -m tests.benchmarks.bench_database [--ops 2000] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.models.track import Track
+
+
+class ConnectPerOperationDatabase(AudioDatabase):
+    """The pre-pool behaviour, a fresh sqlite3.connect (and UDF registration) for every cursor and one transaction per write"""
+    async def _atomic_write_op(self, func, *args, **kwargs):
+        return await self._atomic_db_op(func, *args, **kwargs)
+
+    @contextmanager
+    def cursor(self):
+        conn = self._get_connection()
+        cur = conn.cursor()
+        try:
+            yield cur
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            cur.close()
+            conn.close()
+
+
+async def _prepare(db_path: Path):
+    db = AudioDatabase(name="bench_setup", filepath=db_path)
+    await db.initialize()
+
+    #a handful of downloads so the lookups hit real rows
+    def _sample_ids():
+        with db.cursor() as cur:
+            cur.execute("SELECT id FROM titles ORDER BY rowid LIMIT 100;")
+            return [row["id"] for row in cur.fetchall()]
+    ids = await db._atomic_db_op(_sample_ids)
+    for id in ids[:50]:
+        await db.register_download(id)
+
+    db.close()
+    return ids
+
+
+async def _measure(db: AudioDatabase, name: str, make_call, ops: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(i):
+        async with sem:
+            await make_call(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_one(i) for i in range(ops)])
+    elapsed = time.perf_counter() - start
+    return ops / elapsed
+
+
+async def main(ops: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        ids = await _prepare(db_path)
+
+        cases = {
+            "is_downloaded": lambda db, i: db.is_downloaded(ids[i % len(ids)]),
+            "is_registered": lambda db, i: db.is_registered(ids[i % len(ids)]),
+            "get_metadata": lambda db, i: db.get_metadata(ids[i % len(ids)]),
+            "search": lambda db, i: db.search(["love", "die with", "bad bun", "taylor"][i % 4]),
+            "register_track": lambda db, i: db.register_track(Track(id=f"YT___{db.name}_{i}", title=f"bench {i}", artist="bench", duration=1.0)),
+        }
+
+        results = {}
+        for label, cls in (("before", ConnectPerOperationDatabase), ("after", AudioDatabase)):
+            db = cls(name=f"bench_{label}", filepath=db_path)
+            for name, call in cases.items():
+                await call(db, 0) #warm up
+                results.setdefault(name, {})[label] = await _measure(db, name, lambda i: call(db, i), ops, concurrency)
+
+            if label == "after":
+                print(f"[bench] writer stats: {db._writer.stats()}")
+            db.close()
+
+        print(f"\n{'method':<16}{'before ops/s':>16}{'after ops/s':>16}{'speedup':>10}")
+        for name, r in results.items():
+            print(f"{name:<16}{r['before']:>16.0f}{r['after']:>16.0f}{r['after'] / r['before']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AudioDatabase connection benchmark")
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.ops, args.concurrency))
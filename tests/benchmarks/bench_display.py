@@ -0,0 +1,149 @@
+"""
+Benchmarks the track read paths on the seed catalog, grouping artists per read vs reading track_display.
+
+Three read paths, each run both ways:
+    downloads   the whole downloads listing (get_downloads_content), --downloaded of the catalog marked downloaded
+    metadata    one track by id (get_metadata, register_download, set_metadata)
+    search      the final join of a search result page, --results random titles
+
+The grouped queries are the ones these paths ran before track_display existed. Both sides are checked to
+return the same rows, artist order aside.
+
+Usage:
+    python -m tests.benchmarks.bench_display [--iterations 300] [--downloaded 0.1] [--results 30]
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from statistics import quantiles
+
+from backend.core.database.audio_database import AudioDatabase
+
+
+GROUPED = {
+    "downloads": '''
+        SELECT
+            t.id,
+            COALESCE(t.title_display, t.title) AS title,
+            GROUP_CONCAT(COALESCE(a.artist_display, a.artist), ', ') AS artist,
+            t.duration
+        FROM titles t
+        INNER JOIN downloads d ON t.id = d.id
+        LEFT JOIN title_artists ta ON t.rowid = ta.title_rowid
+        LEFT JOIN artists a ON ta.artist_rowid = a.rowid
+        GROUP BY t.id
+        ORDER BY d.downloaded_at DESC, d.rowid DESC;
+    ''',
+    "metadata": '''
+        SELECT
+            t.id,
+            COALESCE(t.title_display, t.title) AS title,
+            GROUP_CONCAT(COALESCE(a.artist_display, a.artist), ', ') AS artist,
+            t.duration
+        FROM titles t
+        LEFT JOIN title_artists ta ON t.rowid = ta.title_rowid
+        LEFT JOIN artists a ON ta.artist_rowid = a.rowid
+        WHERE t.id = ?
+        GROUP BY t.id;
+    ''',
+    "search": '''
+        SELECT
+            t.id,
+            COALESCE(t.title_display, t.title) AS title,
+            GROUP_CONCAT(COALESCE(a.artist_display, a.artist), ', ') AS artist,
+            t.duration
+        FROM (SELECT value AS rowid, key AS position FROM json_each(?)) AS r
+        JOIN titles t ON t.rowid = r.rowid
+        JOIN title_artists ta ON ta.title_rowid = t.rowid
+        JOIN artists a ON a.rowid = ta.artist_rowid
+        GROUP BY r.rowid
+        ORDER BY r.position;
+    ''',
+}
+
+DISPLAY = {
+    "downloads": '''
+        SELECT td.id, td.title, td.artist, td.duration
+        FROM downloads d
+        INNER JOIN track_display td ON td.id = d.id
+        ORDER BY d.downloaded_at DESC, d.rowid DESC;
+    ''',
+    "metadata": '''
+        SELECT id, title, artist, duration
+        FROM track_display
+        WHERE id = ?;
+    ''',
+    "search": '''
+        SELECT td.id, td.title, td.artist, td.duration
+        FROM (SELECT value AS rowid, key AS position FROM json_each(?)) AS r
+        JOIN track_display td ON td.rowid = r.rowid
+        ORDER BY r.position;
+    ''',
+}
+
+
+def _comparable(rows):
+    """The grouped queries join artists in index order, track_display in credit order"""
+    return [(id, title, sorted((artist or "").split(", ")), duration) for id, title, artist, duration in rows]
+
+
+def _report(label, grouped, display):
+    g = quantiles(sorted(t * 1000 for t in grouped), n=100)
+    d = quantiles(sorted(t * 1000 for t in display), n=100)
+    print(f"{label:<12}{g[49]:>12.3f}{g[94]:>12.3f}{d[49]:>12.3f}{d[94]:>12.3f}{g[49] / d[49]:>10.1f}x")
+
+
+async def main(iterations: int, downloaded: float, results: int):
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AudioDatabase(name="bench", filepath=Path(tmp) / "bench.db", typeahead=False, fuzzy=False, search_cache_entries=0)
+        await db.initialize()
+
+        def _setup():
+            with db.cursor() as cur:
+                cur.execute("SELECT rowid, id FROM titles;")
+                rows = [tuple(row) for row in cur.fetchall()]
+                cur.executemany("INSERT INTO downloads (id) VALUES (?);", [(row[1],) for row in rng.sample(rows, int(len(rows) * downloaded))])
+                return rows
+        titles = await db._atomic_write_op(_setup)
+
+        params = {
+            "downloads": [()] * max(iterations // 10, 10),
+            "metadata": [(rng.choice(titles)[1],) for _ in range(iterations)],
+            "search": [(json.dumps([row[0] for row in rng.sample(titles, results)]),) for _ in range(iterations)],
+        }
+
+        def _run(sql, args):
+            with db.cursor() as cur:
+                start = time.perf_counter()
+                cur.execute(sql, args)
+                rows = [tuple(row) for row in cur.fetchall()]
+                return rows, time.perf_counter() - start
+
+        print(f"\nseed catalog, {len(titles)} titles, {int(len(titles) * downloaded)} downloaded")
+        print(f"{'read path':<12}{'grouped p50':>12}{'p95':>12}{'display p50':>12}{'p95':>12}{'speedup':>11}")
+        for label in GROUPED:
+            grouped, display = [], []
+            for args in params[label]:
+                expected, elapsed = await db._atomic_db_op(_run, GROUPED[label], args)
+                grouped.append(elapsed)
+                actual, elapsed = await db._atomic_db_op(_run, DISPLAY[label], args)
+                display.append(elapsed)
+                assert _comparable(actual) == _comparable(expected), f"{label} rows differ"
+            _report(label, grouped, display)
+
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Track read path latency, grouped artists vs track_display")
+    parser.add_argument("--iterations", type=int, default=300, help="lookups per read path, the downloads listing runs a tenth as often")
+    parser.add_argument("--downloaded", type=float, default=0.1, help="fraction of the catalog marked downloaded")
+    parser.add_argument("--results", type=int, default=30, help="titles per search result page")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.iterations, args.downloaded, args.results))
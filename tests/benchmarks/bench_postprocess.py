@@ -0,0 +1,96 @@
+"""
+Benchmarks AudioProcessor pipelines per track, wall time and bytes written by ffmpeg for the step-by-step
+pipeline vs the fused one. Tracks are generated with ffmpeg's sine source, padded with silence on both ends,
+either as the WAV yt-dlp leaves with dl_format "wav" or as the opus stream it keeps with dl_format "source".
+
+Bytes written come from the wchar counter in /proc/self/io, which includes reaped child processes, on
+Linux, and from ProcessedAudio.bytes_written elsewhere.
+
+Usage:
+    python -m tests.benchmarks.bench_postprocess [--tracks 3] [--seconds 180] [--source wav|opus] [--loudness normalize|gain]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from backend.core.audio.processor import AudioProcessor
+
+
+def _bytes_written() -> Optional[int]:
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _make_track(ffmpeg: str, path: Path, seconds: int):
+    #stereo 48kHz with some silence to trim, PCM or opus going by the suffix
+    subprocess.run([
+        ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds},adelay=1500|1500,apad=pad_dur=2",
+        "-ac", "2", "-ar", "48000", str(path)
+    ], check=True)
+
+
+async def main(tracks: int, seconds: int, source_format: str, loudness: str):
+    ffmpeg = os.getenv("FFMPEG_BIN_PATH") or shutil.which("ffmpeg")
+    ffprobe = os.getenv("FFPROBE_BIN_PATH") or shutil.which("ffprobe")
+    if not ffmpeg or not ffprobe:
+        print("[bench] ffmpeg/ffprobe not found, set FFMPEG_BIN_PATH and FFPROBE_BIN_PATH, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / f"source.{source_format}"
+        _make_track(ffmpeg, source, seconds)
+        print(f"[bench] {tracks} tracks of {seconds}s, source {source.stat().st_size / 1e6:.1f}MB, loudness {loudness}")
+
+        results = {}
+        for pipeline in ("steps", "fused"):
+            processor = AudioProcessor(ffmpeg_bin=ffmpeg, ffprobe_bin=ffprobe, pipeline=pipeline, loudness=loudness)
+            wall, written, durations = 0.0, 0, []
+            for i in range(tracks):
+                path = tmp / f"{pipeline}_{i}.{source_format}"
+                shutil.copyfile(source, path)
+
+                before = _bytes_written()
+                start = time.perf_counter()
+                processed = await processor.process(path, "webm")
+                wall += time.perf_counter() - start
+                after = _bytes_written()
+
+                #the pipeline's own file size accounting where /proc isn't available
+                written += after - before if before is not None and after is not None else processed.bytes_written
+                durations.append(processed.duration)
+                processed.path.unlink()
+
+            results[pipeline] = {
+                "seconds": wall / tracks,
+                "bytes": written / tracks,
+                "duration": sum(durations) / len(durations),
+            }
+
+        print(f"\n{'pipeline':<10}{'s/track':>10}{'MB written/track':>20}{'duration':>10}")
+        for name, r in results.items():
+            print(f"{name:<10}{r['seconds']:>10.2f}{r['bytes'] / 1e6:>20.1f}{r['duration']:>10.2f}")
+        print(f"\nfused is {results['steps']['seconds'] / results['fused']['seconds']:.1f}x faster per track")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audio post-processing pipeline benchmark")
+    parser.add_argument("--tracks", type=int, default=3)
+    parser.add_argument("--seconds", type=int, default=180)
+    parser.add_argument("--source", choices=["wav", "opus"], default="wav")
+    parser.add_argument("--loudness", choices=["normalize", "gain"], default="normalize")
+    args = parser.parse_args()
+    asyncio.run(main(args.tracks, args.seconds, args.source, args.loudness))
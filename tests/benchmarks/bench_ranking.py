@@ -0,0 +1,158 @@
+"""
+Benchmarks FTS search ranking on the seed catalog, quality and latency.
+
+Three rankings of the same `token*` matches:
+    single-phase  the old query, the first 30 matches in index order, re-ranked by weights and download state
+    two-phase     the SearchMixin query, the --pool best matches by bm25, ranked by bm25 * static_rank
+    exhaustive    every match ranked by bm25 * static_rank, the reference the other two are scored against
+
+Quality is overlap@30 with the exhaustive top 30, and the share of the downloaded titles in the exhaustive
+top 30 that each ranking shows. A random --downloaded fraction of the catalog is marked downloaded first,
+so the download boost has something to reorder.
+
+Usage:
+    python -m tests.benchmarks.bench_ranking [--queries 300] [--pool 1000] [--downloaded 0.03]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean, quantiles
+
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.lib.utils import normalize_for_search
+import backend.globals as G
+
+
+LIMIT = 30
+
+SINGLE_PHASE = '''
+    SELECT t.id
+    FROM (
+        SELECT rowid, bm25(catalog_fts, 1.0, 1.5) AS score
+        FROM catalog_fts
+        WHERE catalog_fts MATCH ?
+        LIMIT ?
+    ) AS sub
+    JOIN titles t ON t.rowid = sub.rowid
+    JOIN title_artists ta ON ta.title_rowid = t.rowid
+    JOIN artists a ON a.rowid = ta.artist_rowid
+    LEFT JOIN downloads d ON d.id = t.id
+    GROUP BY sub.rowid
+    ORDER BY sub.score * t.pref_weight * MAX(a.pref_weight) * CASE WHEN d.id IS NOT NULL THEN 1.0 ELSE 0.1 END ASC;
+'''
+
+TWO_PHASE = '''
+    WITH candidates AS (
+        SELECT rowid, rank AS score
+        FROM catalog_fts
+        WHERE catalog_fts MATCH ?
+          AND rank MATCH 'bm25(1.0, 1.5)'
+        ORDER BY rank
+        LIMIT ?
+    )
+    SELECT t.id
+    FROM candidates c
+    JOIN titles t ON t.rowid = c.rowid
+    ORDER BY c.score * t.static_rank ASC, t.rowid ASC
+    LIMIT ?;
+'''
+
+EXHAUSTIVE = '''
+    SELECT t.id
+    FROM (
+        SELECT rowid, bm25(catalog_fts, 1.0, 1.5) AS score
+        FROM catalog_fts
+        WHERE catalog_fts MATCH ?
+    ) AS sub
+    JOIN titles t ON t.rowid = sub.rowid
+    ORDER BY sub.score * t.static_rank ASC, t.rowid ASC
+    LIMIT ?;
+'''
+
+
+def _keystrokes(texts, n, rng):
+    """Every prefix of the first two words of n random texts, the way a user types them"""
+    queries = []
+    for text in rng.sample(texts, min(n, len(texts))):
+        typed = ""
+        for word in normalize_for_search(text).split()[:2]:
+            for ch in word:
+                typed += ch
+                queries.append(typed)
+            typed += " "
+    return queries
+
+
+def _report(label, timings, overlaps, recalls):
+    ms = sorted(t * 1000 for t in timings)
+    p = quantiles(ms, n=100)
+    print(f"{label:<16}{p[49]:>10.3f}{p[94]:>10.3f}{ms[-1]:>10.3f}{mean(overlaps):>12.3f}{mean(recalls) if recalls else 1.0:>14.3f}")
+
+
+async def main(n_queries: int, pool: int, downloaded: float):
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AudioDatabase(name="bench", filepath=Path(tmp) / "bench.db", typeahead=False, fuzzy=False, search_cache_entries=0)
+        await db.initialize()
+
+        def _setup():
+            with db.cursor() as cur:
+                cur.execute("SELECT id FROM titles;")
+                ids = [row[0] for row in cur.fetchall()]
+                cur.executemany("INSERT INTO downloads (id) VALUES (?);", [(i,) for i in rng.sample(ids, int(len(ids) * downloaded))])
+                cur.execute("SELECT title FROM titles UNION ALL SELECT artist FROM artists;")
+                return [row[0] for row in cur.fetchall()]
+        texts = await db._atomic_write_op(_setup)
+        queries = _keystrokes(texts, n_queries, rng)
+
+        def _run(sql, params):
+            with db.cursor() as cur:
+                start = time.perf_counter()
+                cur.execute(sql, params)
+                ids = [row[0] for row in cur.fetchall()]
+                return ids, time.perf_counter() - start
+
+        def _downloads():
+            with db.cursor() as cur:
+                cur.execute("SELECT id FROM downloads;")
+                return {row[0] for row in cur.fetchall()}
+        downloads = await db._atomic_db_op(_downloads)
+
+        results = {label: ([], [], []) for label in ("single-phase", "two-phase", "exhaustive")}
+        for q in queries:
+            fts_query = " ".join(f"{t}*" for t in normalize_for_search(q).split())
+            truth, elapsed = await db._atomic_db_op(_run, EXHAUSTIVE, (fts_query, LIMIT))
+            results["exhaustive"][0].append(elapsed)
+            truth_downloads = set(truth) & downloads
+
+            single, elapsed = await db._atomic_db_op(_run, SINGLE_PHASE, (fts_query, LIMIT))
+            results["single-phase"][0].append(elapsed)
+
+            two, elapsed = await db._atomic_db_op(_run, TWO_PHASE, (fts_query, pool, LIMIT))
+            results["two-phase"][0].append(elapsed)
+
+            for label, ids in (("single-phase", single), ("two-phase", two), ("exhaustive", truth)):
+                timings, overlaps, recalls = results[label]
+                overlaps.append(len(set(ids) & set(truth)) / len(truth) if truth else 1.0)
+                if truth_downloads:
+                    recalls.append(len(set(ids) & truth_downloads) / len(truth_downloads))
+
+        print(f"\nseed catalog, {len(queries)} keystroke queries, pool {pool}, {len(downloads)} downloaded")
+        print(f"{'ranking':<16}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'overlap@30':>12}{'dl recall':>14}")
+        for label, (timings, overlaps, recalls) in results.items():
+            _report(label, timings, overlaps, recalls)
+
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FTS search ranking quality and latency")
+    parser.add_argument("--queries", type=int, default=300, help="texts to type out, each one yields a query per keystroke")
+    parser.add_argument("--pool", type=int, default=G.SEARCH_CANDIDATE_POOL, help="two-phase candidate pool size")
+    parser.add_argument("--downloaded", type=float, default=0.03, help="fraction of the catalog marked downloaded")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.queries, args.pool, args.downloaded))
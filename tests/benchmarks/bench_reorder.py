@@ -0,0 +1,144 @@
+"""
+Benchmarks reordering a large playlist and the likes list.
+
+Two ways to move one track:
+    load-all    the old reorder, every row of the list loaded into python to find the neighbours
+    neighbours  PositionsMixin, the two neighbours walked off the position index with LIMIT/OFFSET
+
+Random moves are timed on a --tracks long playlist and likes list, then --hammer moves all go into the
+same gap, the worst case for float midpoints, and the background renumbering of the whole list is timed.
+Every timed move goes through the writer like a real request, and both lists are checked against a
+python list model at the end.
+
+Usage:
+    python -m tests.benchmarks.bench_reorder [--tracks 50000] [--moves 200] [--hammer 200]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+from statistics import quantiles
+
+from backend.core.database.audio_database import AudioDatabase
+
+
+def _load_all_move(db, table, scope, params, tie, from_index, to_index):
+    """The reorder this replaced, kept here as the baseline"""
+    with db.cursor() as cur:
+        cur.execute(f"SELECT {tie} AS tie, position FROM {table} WHERE {scope} ORDER BY position ASC;", params)
+        rows = [dict(row) for row in cur.fetchall()]
+
+        n = len(rows) - 1
+        if n == 0 or from_index < 0 or from_index > n or to_index < 0 or to_index > n:
+            return False
+
+        moved = rows.pop(from_index)["tie"]
+        if to_index == 0:
+            new_position = rows[0]["position"] - 1.0
+        elif to_index == n:
+            new_position = rows[-1]["position"] + 1.0
+        else:
+            new_position = (rows[to_index - 1]["position"] + rows[to_index]["position"]) / 2.0
+
+        cur.execute(f"UPDATE {table} SET position = ? WHERE {scope} AND {tie} = ?;", (new_position, *params, moved))
+        return True
+
+
+def _ms(timings):
+    ms = sorted(t * 1000 for t in timings)
+    p = quantiles(ms, n=100)
+    return f"{p[49]:>10.3f}{p[94]:>10.3f}{ms[-1]:>10.3f}"
+
+
+async def main(n_tracks: int, n_moves: int, n_hammer: int):
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AudioDatabase(name="bench", filepath=Path(tmp) / "bench.db", typeahead=False, fuzzy=False, seed_snapshot=None)
+        await db.build_from_file()
+        playlist = (await db.create_playlist(name="big", temp_id="big"))["id"]
+
+        ids = [f"YT___{i}" for i in range(n_tracks)]
+        def _setup():
+            with db.cursor() as cur:
+                cur.executemany("INSERT INTO titles (id, title) VALUES (?, ?);", [(id, id) for id in ids])
+                cur.executemany("INSERT INTO downloads (id) VALUES (?);", [(id,) for id in ids])
+                cur.executemany("INSERT INTO likes (id, position) VALUES (?, ?);", [(id, i + 1.0) for i, id in enumerate(ids)])
+                cur.executemany(
+                    "INSERT INTO playlist_titles (playlist_id, title_id, position) VALUES (?, ?, ?);",
+                    [(playlist, id, i + 1.0) for i, id in enumerate(ids)]
+                )
+        start = time.perf_counter()
+        await db._atomic_write_op(_setup)
+        print(f"\n{n_tracks} track playlist and likes list built in {time.perf_counter() - start:.1f}s")
+
+        lists = {
+            "playlist": (
+                lambda a, b: db.reorder_playlist_track(playlist, a, b),
+                ("playlist_titles", "playlist_id = ?", (playlist,), "title_id"),
+                lambda: db.get_playlist_content(playlist),
+            ),
+            "likes": (
+                db.reorder_likes_track,
+                ("likes", "TRUE", (), "rowid"),
+                db.fetch_liked_tracks,
+            ),
+        }
+
+        print(f"\n{n_moves} random moves")
+        print(f"{'list':<10}{'reorder':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        models = {}
+        for label, (reorder, spec, fetch) in lists.items():
+            model = list(ids)
+            timings = {"load-all": [], "neighbours": []}
+            for i in range(n_moves):
+                from_index, to_index = rng.randrange(n_tracks), rng.randrange(n_tracks)
+                model.insert(to_index, model.pop(from_index))
+
+                start = time.perf_counter()
+                if i % 2:
+                    await db._atomic_write_op(_load_all_move, db, *spec, from_index, to_index)
+                    timings["load-all"].append(time.perf_counter() - start)
+                else:
+                    await reorder(from_index, to_index)
+                    timings["neighbours"].append(time.perf_counter() - start)
+            for method, t in timings.items():
+                print(f"{label:<10}{method:<12}{_ms(t)}")
+            models[label] = model
+
+        print(f"\n{n_hammer} moves into the gap between positions 1 and 2")
+        print(f"{'list':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'renumber ms':>14}")
+        for label, (reorder, spec, fetch) in lists.items():
+            model = models[label]
+            timings = []
+            for i in range(n_hammer):
+                from_index = rng.randrange(2, n_tracks)
+                model.insert(1, model.pop(from_index))
+                start = time.perf_counter()
+                await reorder(from_index, 1)
+                timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                await db.flush_position_rebalance()
+            renumber = time.perf_counter() - start
+
+            content = await fetch()
+            assert (content["trackIds"] if isinstance(content, dict) else content) == model, f"{label} order drifted"
+            print(f"{label:<10}{_ms(timings)}{renumber * 1000:>14.1f}")
+
+        print(f"\nrebalancer: {db.position_rebalance_stats()}")
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Playlist and likes reorder latency")
+    parser.add_argument("--tracks", type=int, default=50000, help="tracks in the playlist and the likes list")
+    parser.add_argument("--moves", type=int, default=200, help="random moves, split between the two reorders")
+    parser.add_argument("--hammer", type=int, default=200, help="moves into the same gap")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.tracks, args.moves, args.hammer))
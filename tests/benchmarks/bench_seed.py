@@ -0,0 +1,69 @@
+"""
+Benchmarks first boot on the bundled catalog.
+
+Two ways a fresh database gets its catalog:
+    csv         SeedMixin.seed, seed.csv streamed into staging tables and derived in bulk with the triggers suspended
+    snapshot    SeedMixin.restore_seed_snapshot, a database prebuilt by `cli.py seed-snapshot` copied into place
+
+Each run starts from an empty directory and times initialize() up to a ready, searchable catalog, with the
+typeahead and fuzzy indexes off so only the seeding path is measured.
+
+Usage:
+    python -m tests.benchmarks.bench_seed [--runs 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.database.cli import seed_snapshot
+
+
+async def _boot(path: Path, snapshot):
+    db = AudioDatabase(name="bench", filepath=path, typeahead=False, fuzzy=False, seed_snapshot=snapshot)
+    start = time.perf_counter()
+    await db.initialize()
+    elapsed = time.perf_counter() - start
+
+    def _count():
+        with db.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM titles;")
+            return cur.fetchone()[0]
+    tracks = await db._atomic_db_op(_count)
+    db.close()
+    return elapsed, tracks
+
+
+async def main(runs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        snapshot = tmp / "seed.db"
+        with contextlib.redirect_stdout(io.StringIO()):
+            await seed_snapshot(snapshot)
+
+        results = {"csv": [], "snapshot": []}
+        tracks = 0
+        for i in range(runs):
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, tracks = await _boot(tmp / f"csv{i}" / "audio.db", None)
+                results["csv"].append(elapsed)
+                elapsed, tracks = await _boot(tmp / f"snapshot{i}" / "audio.db", snapshot)
+                results["snapshot"].append(elapsed)
+
+        print(f"\nbundled catalog, {tracks} tracks, {runs} runs, snapshot {snapshot.stat().st_size / 1024 / 1024:.1f}MB")
+        print(f"{'first boot':<12}{'median s':>10}{'min s':>10}{'tracks/sec':>14}")
+        for label, timings in results.items():
+            print(f"{label:<12}{median(timings):>10.3f}{min(timings):>10.3f}{tracks / median(timings):>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="First boot seeding latency")
+    parser.add_argument("--runs", type=int, default=5, help="fresh boots per seeding path")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.runs))
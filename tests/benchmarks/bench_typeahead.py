@@ -0,0 +1,150 @@
+"""
+Benchmarks search-as-you-type latency, the in-memory typeahead index vs the SQLite FTS path.
+
+Seed catalog: the 10k row seed.csv, every keystroke of real titles and artists through db.search,
+once answered by the typeahead and once by FTS (cache off so every keystroke hits SQLite).
+Synthetic catalog: typeahead only, build time, memory and keystroke latency over --rows rows.
+
+Usage:
+    python -m tests.benchmarks.bench_typeahead [--queries 300] [--rows 1000000] [--skip-synthetic]
+"""
+import argparse
+import asyncio
+import random
+import resource
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+from statistics import quantiles
+
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.lib.utils import normalize_for_search
+from backend.core.search.typeahead import TypeaheadIndex, TypeaheadRow
+
+
+def _keystrokes(texts, n, rng):
+    """Every prefix of the first two words of n random texts, the way a user types them"""
+    queries = []
+    for text in rng.sample(texts, min(n, len(texts))):
+        words = normalize_for_search(text).split()[:2]
+        typed = ""
+        for word in words:
+            for ch in word:
+                typed += ch
+                queries.append(typed)
+            typed += " "
+    return queries
+
+
+def _report(label, timings):
+    ms = sorted(t * 1000 for t in timings)
+    p = quantiles(ms, n=100)
+    print(f"{label:<28}{len(ms):>8}{p[49]:>10.3f}{p[94]:>10.3f}{p[98]:>10.3f}{ms[-1]:>10.3f}")
+
+
+def _header(title):
+    print(f"\n{title}")
+    print(f"{'path':<28}{'queries':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+
+
+async def bench_seed(n_queries: int, rng: random.Random):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+
+        setup = AudioDatabase(name="bench_setup", filepath=db_path, typeahead=False)
+        await setup.initialize()
+        setup.close()
+
+        fts = AudioDatabase(name="bench_fts", filepath=db_path, typeahead=False, search_cache_entries=0)
+        typeahead = AudioDatabase(name="bench_typeahead", filepath=db_path)
+        await typeahead.load_typeahead()
+
+        def _texts():
+            with fts.cursor() as cur:
+                cur.execute("SELECT title FROM titles UNION ALL SELECT artist FROM artists;")
+                return [row[0] for row in cur.fetchall()]
+        queries = _keystrokes(await fts._atomic_db_op(_texts), n_queries, rng)
+
+        timings, matches = {}, {}
+        for label, db in (("fts (db.search)", fts), ("typeahead (db.search)", typeahead)):
+            timings[label], matches[label] = [], {}
+            for q in queries:
+                start = time.perf_counter()
+                content = await db.search(q)
+                timings[label].append(time.perf_counter() - start)
+                matches[label][q] = {t["id"] for t in content}
+
+        index: TypeaheadIndex = typeahead._typeahead
+        direct = []
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q)
+            direct.append(time.perf_counter() - start)
+
+        _header(f"seed catalog, {index.stats()['rows']} rows, built in {index.stats()['build_duration']:.3f}s")
+        _report("fts (db.search)", timings["fts (db.search)"])
+        _report("typeahead (db.search)", timings["typeahead (db.search)"])
+        _report("typeahead (index only)", direct)
+
+        #fts stops at 30 bm25 hits and typeahead at the 30 heaviest, compare only where neither was cut off
+        pairs = [(matches["fts (db.search)"][q], matches["typeahead (db.search)"][q]) for q in set(queries)]
+        comparable = [(a, b) for a, b in pairs if len(a) < 30 and len(b) < 30]
+        agree = sum(1 for a, b in comparable if a == b)
+        print(f"same result set on {agree}/{len(comparable)} uncapped queries")
+
+        fts.close()
+        typeahead.close()
+
+
+def bench_synthetic(rows: int, n_queries: int, rng: random.Random):
+    #zipf-ish vocabulary so some prefixes are huge and most are small, like real titles
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocab = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(60000)]
+    cum_weights = list(accumulate(1 / (i + 1) for i in range(len(vocab))))
+    artists = [" ".join(rng.choices(vocab, cum_weights=cum_weights, k=2)) for _ in range(rows // 20 + 1)]
+
+    catalog = []
+    for i in range(rows):
+        title = " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(1, 4)))
+        artist = artists[i % len(artists)]
+        catalog.append(TypeaheadRow(i + 1, f"SYN___{i}", title, artist, 200.0, f"{title} {artist}", rng.uniform(1.0, 2.5), rng.random() < 0.01))
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    index = TypeaheadIndex()
+    index.load(catalog)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats = index.stats()
+
+    sample = [index._titles[rng.randrange(rows)] + " " + index._artists[rng.randrange(rows)] for _ in range(n_queries)]
+    queries = _keystrokes(sample, n_queries, rng)
+
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q)
+        timings.append(time.perf_counter() - start)
+
+    _header(
+        f"synthetic catalog, {stats['rows']} rows, {stats['tokens']} tokens, {stats['postings']} postings, "
+        f"built in {stats['build_duration']:.1f}s, ~{(rss_after - rss_before) / 1024:.0f}MB"
+    )
+    _report("typeahead (index only)", timings)
+    print(f"rank order scans: {index.stats()['rank_scans']}/{len(queries)}")
+
+
+async def main(n_queries: int, rows: int, skip_synthetic: bool):
+    rng = random.Random(7)
+    await bench_seed(n_queries, rng)
+    if not skip_synthetic:
+        bench_synthetic(rows, n_queries, rng)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Typeahead vs FTS search benchmark")
+    parser.add_argument("--queries", type=int, default=300, help="texts to type out, each one yields a query per keystroke")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-synthetic", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.queries, args.rows, args.skip_synthetic))
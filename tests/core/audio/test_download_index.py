@@ -0,0 +1,55 @@
+import os
+import pytest
+from pathlib import Path
+
+from backend.core.audio.index import DownloadIndex
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.events.event_bus import EventBus
+from backend.core.events.handlers import register_download_index_handlers
+from backend.core.models.track import Track
+
+
+def test_load_prefers_extension_order_and_skips_unknown_ids(tmp_path: Path):
+    for name in ("YT___a.mp3", "YT___a.opus", "YT___b.webm", "YT___c.mp3", "YT___a.txt"):
+        (tmp_path / name).write_bytes(b"x" * 10)
+
+    index = DownloadIndex(base_dir=tmp_path, extensions=["wav", "webm", "opus", "mp3"])
+    assert index.load(["YT___a", "YT___b", "YT___missing"]) == 2
+
+    assert index.get("YT___a").format == "opus"
+    assert index.get("YT___b").path == tmp_path / "YT___b.webm"
+    assert not index.has("YT___c") #file without a downloads row
+    assert index.stats() == {"entries": 2, "bytes": 20, "formats": {"opus": 1, "webm": 1}}
+
+
+@pytest.mark.asyncio
+async def test_index_follows_download_events_without_touching_disk(tmp_path: Path, monkeypatch):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    event_bus = EventBus()
+    db = AudioDatabase(name="test", filepath=tmp_path / "audio.db", event_bus=event_bus, typeahead=False, fuzzy=False, seed_snapshot=None)
+    index = DownloadIndex(base_dir=downloads)
+    register_download_index_handlers(event_bus, db, index)
+    try:
+        await db.build_from_file()
+        for id in ("YT___a", "YT___b", "YT___c"):
+            await db.register_track(Track(id=id, title=id, artist="Band", duration=1))
+            (downloads / f"{id}.opus").write_bytes(b"x")
+            await db.register_download(id)
+        assert all(index.has(id) for id in ("YT___a", "YT___b", "YT___c"))
+
+        #lookups are answered from memory
+        def _no_stat(*args, **kwargs):
+            raise AssertionError("filesystem touched")
+        with monkeypatch.context() as m:
+            m.setattr(os, "stat", _no_stat)
+            m.setattr(Path, "stat", _no_stat)
+            assert index.get("YT___a").size == 1
+            assert not index.has("YT___missing")
+
+        await db.unregister_download("YT___a")
+        await db.unregister_downloads(["YT___b"])
+        await db.unregister_track("YT___c")
+        assert len(index) == 0
+    finally:
+        db.close()
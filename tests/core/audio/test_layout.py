@@ -0,0 +1,30 @@
+import pytest
+from pathlib import Path
+
+from backend.core.audio.index import DownloadIndex
+from backend.core.audio.layout import migrate_flat_downloads
+from backend.core.lib.utils import get_audio_dir, get_audio_path, iter_download_files
+
+
+@pytest.mark.asyncio
+async def test_flat_downloads_move_into_shards_and_stay_resolvable(tmp_path: Path):
+    ids = [f"YT___{i}" for i in range(5)]
+    for id in ids:
+        (tmp_path / f"{id}.opus").write_bytes(id.encode())
+
+    index = DownloadIndex(base_dir=tmp_path)
+    index.load(ids)
+    assert get_audio_path(ids[0], base_dir=tmp_path) == tmp_path / f"{ids[0]}.opus" #flat until moved
+
+    assert await migrate_flat_downloads(tmp_path, index=index, batch_size=2, grace=0) == 5
+
+    for id in ids:
+        shard = get_audio_dir(id, tmp_path)
+        assert shard.parent.parent == tmp_path and len(shard.name) == 2
+        assert index.get(id).path == shard / f"{id}.opus"
+        assert get_audio_path(id, base_dir=tmp_path).read_bytes() == id.encode()
+    assert sorted(entry.name for entry in iter_download_files(tmp_path)) == sorted(f"{id}.opus" for id in ids)
+    assert not any(path.is_file() for path in tmp_path.iterdir())
+
+    assert await migrate_flat_downloads(tmp_path, index=index, grace=0) == 0
+    assert index.load(ids) == 5
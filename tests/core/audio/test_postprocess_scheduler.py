@@ -0,0 +1,96 @@
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+from backend.core.audio.processor import AudioProcessor, ProcessedAudio
+from backend.core.audio.scheduler import PostProcessScheduler
+
+
+class Load:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+
+class FakeProcessor:
+    def __init__(self, load, fail=False):
+        self.load = load
+        self.fail = fail
+        self.calls = []
+
+    async def process(self, input_path, format="webm", bitrate="192k"):
+        self.calls.append(input_path)
+        self.load.running += 1
+        self.load.peak = max(self.load.peak, self.load.running)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail:
+                raise RuntimeError("ffmpeg failed")
+            return ProcessedAudio(Path(input_path), 1.0, 1)
+        finally:
+            self.load.running -= 1
+
+
+def test_scheduler_caps_concurrency_and_routes_background_jobs():
+    async def _run():
+        load = Load()
+        fg, bg = FakeProcessor(load), FakeProcessor(load)
+        scheduler = PostProcessScheduler(fg, background_processor=bg, workers=2, max_queued=2)
+        task = asyncio.create_task(scheduler.run())
+        try:
+            results = await asyncio.gather(
+                *(scheduler.submit(Path(f"{i}.webm"), background=i % 3 == 0) for i in range(9))
+            )
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return load, fg, bg, scheduler, results
+
+    load, fg, bg, scheduler, results = asyncio.run(_run())
+
+    assert [r.path for r in results] == [Path(f"{i}.webm") for i in range(9)]
+    assert load.peak == 2 #background jobs share the same slots
+    assert sorted(bg.calls) == [Path("0.webm"), Path("3.webm"), Path("6.webm")]
+    assert len(fg.calls) == 6
+    stats = scheduler.stats()
+    assert stats["completed"] == 9 and stats["failed"] == 0 and stats["running"] == 0
+
+
+def test_scheduler_never_runs_more_than_workers_and_raises_into_submit():
+    async def _run():
+        load = Load()
+        processor = FakeProcessor(load)
+        scheduler = PostProcessScheduler(processor, workers=3)
+        task = asyncio.create_task(scheduler.run())
+        try:
+            await asyncio.gather(*(scheduler.submit(Path(f"{i}.webm")) for i in range(10)))
+
+            processor.fail = True
+            with pytest.raises(RuntimeError, match="ffmpeg failed"):
+                await scheduler.submit(Path("bad.webm"))
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return load, scheduler
+
+    load, scheduler = asyncio.run(_run())
+
+    assert load.peak == 3
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_processor_adds_thread_limits_and_priority_prefix():
+    processor = AudioProcessor(ffmpeg_bin="ffmpeg", ffprobe_bin="ffprobe", threads=2, niceness=10, ionice=True)
+    cmd = processor._prepare(["ffmpeg", "-y", "-i", "in.webm", "out.webm"])
+
+    prefix = []
+    if shutil.which("ionice"):
+        prefix += ["ionice", "-c", "2", "-n", "7"]
+    if shutil.which("nice"):
+        prefix += ["nice", "-n", "10"]
+    assert cmd == [*prefix, "ffmpeg", "-threads", "2", "-filter_threads", "2", "-y", "-i", "in.webm", "out.webm"]
+
+    #ffprobe gets the priority but not the ffmpeg thread flags
+    assert processor._prepare(["ffprobe", "in.webm"]) == [*prefix, "ffprobe", "in.webm"]
@@ -0,0 +1,87 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from backend.core.audio.processor import AudioProcessor
+
+
+def test_fused_pipeline_reads_loudness_and_duration_from_ffmpeg_output():
+    processor = AudioProcessor(ffmpeg_bin="ffmpeg", ffprobe_bin="ffprobe", pipeline="fused")
+    stderr = (
+        "size=     512kB time=00:01:10.02 bitrate= 59.9kbits/s speed=40x\r"
+        "size=    3104kB time=00:03:21.48 bitrate=126.2kbits/s speed=41x\n"
+        "[Parsed_loudnorm_4 @ 0x5581] \n"
+        '{\n\t"input_i" : "-9.81",\n\t"input_tp" : "0.12",\n\t"input_lra" : "5.40",\n'
+        '\t"input_thresh" : "-19.95",\n\t"target_offset" : "0.31"\n}\n'
+    )
+
+    assert processor._parse_time(stderr) == 201.48
+    assert processor._parse_time("no progress here") is None
+
+    loudnorm = processor._loudnorm_filter(processor._parse_loudnorm_stats(stderr))
+    assert loudnorm == "loudnorm=I=-16:TP=-1.5:LRA=11:measured_I=-9.81:measured_TP=0.12:measured_LRA=5.40:measured_thresh=-19.95:offset=0.31"
+
+
+def test_gain_mode_reads_ebur128_summary():
+    processor = AudioProcessor(ffmpeg_bin="ffmpeg", ffprobe_bin="ffprobe", loudness="gain")
+    stderr = (
+        "[Parsed_ebur128_4 @ 0x5581] Summary:\n\n"
+        "  Integrated loudness:\n    I:          -9.4 LUFS\n    Threshold: -19.6 LUFS\n\n"
+        "  Loudness range:\n    LRA:         6.1 LU\n    Threshold:  -29.5 LUFS\n\n"
+        "  True peak:\n    Peak:        0.7 dBFS\n"
+    )
+
+    assert processor._parse_ebur128(stderr) == {"integrated": -9.4, "true_peak": 0.7, "lra": 6.1}
+    assert processor._parse_ebur128(stderr.replace("-9.4", "-inf")) is None #silence
+    assert processor._parse_ebur128("no summary") is None
+
+
+def _fake_ffmpeg(tmp_path: Path) -> str:
+    #copies stdin to the output file, the last argument, and reports progress like ffmpeg does
+    script = tmp_path / "ffmpeg"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import shutil, sys\n"
+        "with open(sys.argv[-1], 'wb') as f:\n"
+        "    shutil.copyfileobj(sys.stdin.buffer, f)\n"
+        "sys.stderr.write('size=1kB time=00:00:01.50 bitrate=1kbits/s\\n')\n"
+    )
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_stream_pipeline_falls_back_to_fused_on_windows(monkeypatch):
+    monkeypatch.setattr("backend.core.audio.processor.os.name", "nt")
+    assert AudioProcessor(ffmpeg_bin="ffmpeg", ffprobe_bin="ffprobe", pipeline="stream").pipeline == "fused"
+    assert AudioProcessor(ffmpeg_bin="ffmpeg", ffprobe_bin="ffprobe", pipeline="steps").pipeline == "steps"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake ffmpeg is a shebang script")
+@pytest.mark.asyncio
+async def test_pipe_streams_source_into_encoder_and_cleans_up(tmp_path: Path):
+    processor = AudioProcessor(ffmpeg_bin=_fake_ffmpeg(tmp_path), ffprobe_bin="ffprobe", pipeline="stream")
+    target = tmp_path / "out" / "YT___a.webm"
+
+    source = [sys.executable, "-c", "import sys; sys.stderr.write('meta\\n'); sys.stdout.buffer.write(b'x' * 5_000_000)"]
+    processed, source_err = await processor.process_pipe(source, target)
+    assert processed == (target, 1.5, 5_000_000, None) #no ebur128 summary from the fake
+    assert target.read_bytes() == b"x" * 5_000_000
+    assert source_err == "meta\n"
+
+    #a source failing halfway must not leave a truncated file behind, nor replace the good one
+    failing = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'y' * 1000); sys.exit(3)"]
+    with pytest.raises(RuntimeError, match="code 3"):
+        await processor.process_pipe(failing, target)
+    assert target.read_bytes() == b"x" * 5_000_000
+    assert sorted(p.name for p in target.parent.iterdir()) == ["YT___a.webm"]
+
+    #cancelling kills both processes and removes the partial output
+    stalled = [sys.executable, "-c", "import sys, time; sys.stdout.buffer.write(b'z' * 1000); sys.stdout.flush(); time.sleep(60)"]
+    task = asyncio.create_task(processor.process_pipe(stalled, tmp_path / "out" / "YT___b.webm"))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert sorted(p.name for p in target.parent.iterdir()) == ["YT___a.webm"]
@@ -0,0 +1,802 @@
+import asyncio
+import math
+import pytest
+import pytest_asyncio
+import sqlite3
+import threading
+from pathlib import Path
+
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.events.event_bus import EventBus
+from backend.core.events.handlers import register_typeahead_handlers
+from backend.core.models.track import Track
+from backend.exceptions import InvalidCursorError
+import backend.globals as G
+
+#pip install pytest, pip install pytest-asyncio. in venv\Scripts\activate.bat set PYTHONPATH=C:\rootdir, consider swapping to pip install -e
+
+@pytest_asyncio.fixture
+async def db(tmp_path: Path):
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", pool_size=2)
+    await database.build_from_file() #schema only, seeding the full catalog is too slow per test
+    yield database
+    database.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections(db: AudioDatabase):
+    track = Track(id="YT___abc", title="Song A", artist="Artist X", duration=200)
+    await db.register_track(track)
+    await db.register_download(track.id)
+
+    #many concurrent ops never open more than the pool size
+    results = await asyncio.gather(*[db.is_downloaded(track.id) for _ in range(50)])
+
+    assert all(results)
+    assert db._pool.open_count() <= 2
+
+
+@pytest.mark.asyncio
+async def test_pool_rolls_back_failed_operation(db: AudioDatabase):
+    def _fail():
+        with db.cursor() as cur:
+            cur.execute("INSERT INTO playlists (name) VALUES ('doomed');")
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await db._atomic_db_op(_fail)
+
+    #the connection went back to the pool clean, nothing leaked from the failed transaction
+    assert await db.get_all_playlists() == []
+
+
+@pytest.mark.asyncio
+async def test_foreign_keys_enforced_on_pooled_connections(db: AudioDatabase):
+    track = Track(id="YT___abc", title="Song A", artist="Artist X", duration=200)
+    await db.register_track(track)
+    await db.register_download(track.id)
+    await db.toggle_like(track.id)
+
+    #cascades from titles -> downloads -> likes
+    await db.unregister_track(track.id)
+
+    assert not await db.is_downloaded(track.id)
+    assert await db.fetch_liked_tracks() == []
+
+
+@pytest.mark.asyncio
+async def test_enrich_staging_table_survives_connection_reuse(db: AudioDatabase):
+    titles = [{"new_id": "SEED___1", "title": "a", "title_display": "A", "duration": 1.0}]
+
+    #the temp staging table lives as long as the pooled connection does
+    first = await db.batch_update_titles(titles)
+    second = await db.batch_update_titles(titles)
+
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_writer_groups_concurrent_writes(db: AudioDatabase):
+    tracks = [Track(id=f"YT___{i}", title=f"Song {i}", artist=f"Artist {i}", duration=100) for i in range(40)]
+
+    await asyncio.gather(*[db.register_track(t) for t in tracks])
+
+    stats = db._writer.stats()
+    assert stats["ops"] == 40
+    assert stats["groups"] < 40 #a burst shares commits
+    assert all(await asyncio.gather(*[db.is_registered(t.id) for t in tracks]))
+
+
+@pytest.mark.asyncio
+async def test_writer_isolates_failing_write(db: AudioDatabase):
+    def _fail():
+        with db.cursor() as cur:
+            cur.execute("INSERT INTO playlists (name) VALUES ('doomed');")
+            raise RuntimeError("boom")
+
+    #the failing closure is rolled back to its savepoint, its neighbours in the group still commit
+    results = await asyncio.gather(
+        db.create_playlist(name="kept 1", temp_id="t1"),
+        db._atomic_write_op(_fail),
+        db.create_playlist(name="kept 2", temp_id="t2"),
+        return_exceptions=True
+    )
+
+    assert isinstance(results[1], RuntimeError)
+    assert [p["name"] for p in await db.get_all_playlists()] == ["kept 1", "kept 2"]
+
+
+@pytest.mark.asyncio
+async def test_writer_survives_transaction_lost_inside_savepoint(db: AudioDatabase):
+    def _lose_transaction():
+        with db.cursor() as cur:
+            cur.execute("INSERT INTO playlists (name) VALUES ('doomed');")
+            cur.execute("ROLLBACK;") #what sqlite does on its own for SQLITE_FULL, IOERR, BUSY, NOMEM
+            raise sqlite3.OperationalError("database or disk is full")
+
+    db._writer.group_window = 0.2 #keep all three in one group
+    results = await asyncio.gather(
+        db.create_playlist(name="lost 1", temp_id="t1"),
+        db._atomic_write_op(_lose_transaction),
+        db.create_playlist(name="lost 2", temp_id="t2"),
+        return_exceptions=True
+    )
+    db._writer.group_window = 0.0
+
+    #the whole group went with the transaction, and every caller hears about it instead of waiting forever
+    assert all(isinstance(r, sqlite3.OperationalError) for r in results)
+    assert await db.get_all_playlists() == []
+
+    #and the writer thread is still there for the next write
+    await db.create_playlist(name="kept", temp_id="t3")
+    assert [p["name"] for p in await db.get_all_playlists()] == ["kept"]
+
+
+@pytest.mark.asyncio
+async def test_writer_returns_each_callers_result(db: AudioDatabase):
+    created = await asyncio.gather(*[db.create_playlist(name=f"p{i}", temp_id=str(i)) for i in range(10)])
+
+    assert [c["temp_id"] for c in created] == [str(i) for i in range(10)]
+    assert len({c["id"] for c in created}) == 10
+
+
+async def _search_ids(db: AudioDatabase, q: str):
+    return [track["id"] for track in await db.search(q)]
+
+
+@pytest.mark.asyncio
+async def test_search_index_refresh_only_touches_changed_rows(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Alpha Song", artist="First", duration=1))
+    await db.register_track(Track(id="YT___b", title="Beta Song", artist="Second", duration=1))
+
+    assert await db.refresh_search_index() == 2
+    assert await _search_ids(db, "alpha") == ["YT___a"]
+
+    await db.set_metadata("YT___a", {"title": "Gamma Song"})
+    assert await db.refresh_search_index() == 1 #only the renamed row
+
+    assert await _search_ids(db, "alpha") == []
+    assert await _search_ids(db, "gamma") == ["YT___a"]
+    assert await db.refresh_search_index() == 0
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_artist_changes_and_deletes(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Alpha Song", artist="First", duration=1))
+    await db.refresh_search_index()
+
+    def _rename_artist():
+        with db.cursor() as cur:
+            cur.execute("UPDATE artists SET artist = 'renamed' WHERE artist = 'first';")
+    await db._atomic_write_op(_rename_artist)
+    await db.refresh_search_index()
+
+    assert await _search_ids(db, "renamed") == ["YT___a"]
+    assert await _search_ids(db, "first") == []
+
+    await db.unregister_track("YT___a")
+    await db.refresh_search_index()
+
+    assert await _search_ids(db, "alpha") == []
+    assert (await db.check_search_index())["ok"]
+
+
+@pytest.mark.asyncio
+async def test_search_index_check_detects_drift_and_rebuild_repairs(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Alpha Song", artist="First", duration=1))
+    await db.register_track(Track(id="YT___b", title="Beta Song", artist="Second", duration=1))
+    await db.refresh_search_index()
+    assert (await db.check_search_index())["ok"]
+
+    def _break_index():
+        with db.cursor() as cur:
+            cur.execute("DELETE FROM catalog_fts WHERE rowid = (SELECT rowid FROM titles WHERE id = 'YT___a');")
+    await db._atomic_write_op(_break_index)
+
+    report = await db.check_search_index()
+    assert not report["ok"]
+    assert len(report["missing"]) == 1
+
+    await db.rebuild_search_index()
+    report = await db.check_search_index()
+    assert report["ok"]
+    assert report["indexed"] == report["expected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_search_refresh_requests_coalesce_and_flush_reads_own_writes(db: AudioDatabase):
+    for i in range(10):
+        await db.register_track(Track(id=f"YT___{i}", title=f"Burst {i}", artist="Burst", duration=1))
+        db.request_search_refresh()
+
+    await db.flush_search_refresh()
+    assert len(await _search_ids(db, "burst")) == 10
+
+    stats = db.search_refresh_stats()
+    assert stats["requested"] == 10
+    assert stats["executed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_cache_hits_on_normalized_query_and_invalidates_on_writes(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Cafe Song", artist="Someone", duration=1))
+    await db.refresh_search_index()
+
+    first = await db.search("Café  song")
+    second = await db.search("cafe song!")
+    assert first == second
+    assert [t["id"] for t in first] == ["YT___a"]
+
+    stats = db.search_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+    #a new matching track only shows up once the index catches up, and the cache must not hide it
+    await db.register_track(Track(id="YT___b", title="Cafe Song Remix", artist="Someone", duration=1))
+    await db.refresh_search_index()
+    assert {t["id"] for t in await db.search("cafe song")} == {"YT___a", "YT___b"}
+
+    #download status changes the ranking without touching the index
+    await db.register_download("YT___b")
+    assert db.search_cache_stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_typeahead_follows_database_events(tmp_path: Path):
+    event_bus = EventBus()
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", event_bus=event_bus)
+    register_typeahead_handlers(event_bus, database)
+    try:
+        await database.build_from_file()
+        await database.register_track(Track(id="YT___a", title="Alpha Song", artist="First", duration=1))
+        await database.refresh_search_index()
+        await database.load_typeahead()
+
+        assert [t["id"] for t in await database.search("alp")] == ["YT___a"]
+
+        await database.register_track(Track(id="YT___b", title="Alpha Remix", artist="Second", duration=1))
+        await database.register_download("YT___b")
+        await database.set_metadata("YT___a", {"title": "Omega Song"})
+        await database.refresh_search_index()
+
+        assert [t["id"] for t in await database.search("alp")] == ["YT___b"]
+        assert [t["id"] for t in await database.search("ome")] == ["YT___a"]
+        assert database.typeahead_stats()["queries"] == 3 #answered from memory, not FTS
+
+        #longer queries get the bm25 ranked FTS path
+        assert [t["id"] for t in await database.search("omega song")] == ["YT___a"]
+        assert database.typeahead_stats()["queries"] == 3
+
+        await database.unregister_track("YT___b")
+        await database.refresh_search_index()
+        assert await database.search("alp") == []
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+async def test_typeahead_follows_edits_and_deletes_without_a_refresh(tmp_path: Path):
+    event_bus = EventBus()
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", event_bus=event_bus, typeahead=True)
+    register_typeahead_handlers(event_bus, database)
+    try:
+        await database.build_from_file()
+        await database.register_track(Track(id="YT___a", title="Alpha Song", artist="First", duration=1))
+        await database.register_track(Track(id="YT___b", title="Alpha Remix", artist="Second", duration=1))
+        await database.refresh_search_index()
+        await database.load_typeahead()
+
+        #the edit-track endpoint only writes title_display, which no FTS trigger sees
+        await database.set_metadata("YT___a", {"title_display": "Renamed Song"})
+        assert {t["id"]: t["title"] for t in await database.search("alp")}["YT___a"] == "Renamed Song"
+
+        await database.unregister_track("YT___b")
+        assert await database.search("rem") == []
+        assert database.typeahead_stats()["queries"] == 2 #still answered from memory
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("typeahead", [True, False])
+async def test_misspelled_query_is_corrected_against_indexed_vocabulary(tmp_path: Path, typeahead: bool):
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", typeahead=typeahead)
+    try:
+        await database.build_from_file()
+        await database.register_track(Track(id="YT___a", title="Halo", artist="Beyonce", duration=1))
+        await database.refresh_search_index()
+        await database.load_typeahead()
+        await database.load_fuzzy()
+
+        assert [t["id"] for t in await database.search("beyonec")] == ["YT___a"]
+
+        #vocabulary of rows indexed after the load comes in through the refresh
+        await database.register_track(Track(id="YT___b", title="Cruel Summer", artist="Taylor Swift", duration=1))
+        await database.refresh_search_index()
+        await database.load_typeahead([2])
+
+        assert [t["id"] for t in await database.search("tayler swfit")] == ["YT___b"]
+        assert await database.search("zzzzqqq") == []
+        assert database.fuzzy_stats()["corrections"] == 2
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+async def test_static_rank_follows_weights_and_downloads(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Alpha", artist="Band", duration=1))
+
+    def _rank():
+        with db.cursor() as cur:
+            cur.execute("SELECT static_rank FROM titles WHERE id = 'YT___a';")
+            return cur.fetchone()[0]
+
+    def _write(sql):
+        with db.cursor() as cur:
+            cur.execute(sql)
+
+    assert await db._atomic_db_op(_rank) == pytest.approx(0.1)
+
+    await db.register_download("YT___a")
+    assert await db._atomic_db_op(_rank) == pytest.approx(1.0)
+
+    await db._atomic_write_op(_write, "UPDATE artists SET pref = 1.0 WHERE artist = 'band';")
+    await db._atomic_write_op(_write, "UPDATE titles SET pref = 1.0 WHERE id = 'YT___a';")
+    boost = 1 + math.log(2.0)
+    assert await db._atomic_db_op(_rank) == pytest.approx(boost * boost)
+
+    await db._atomic_write_op(_write, "DELETE FROM artists WHERE artist = 'band';")
+    await db.unregister_download("YT___a")
+    assert await db._atomic_db_op(_rank) == pytest.approx(boost * 0.1)
+
+
+@pytest.mark.asyncio
+async def test_track_display_follows_titles_and_artists(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Alpha", artist="Band", duration=1))
+
+    def _display():
+        with db.cursor() as cur:
+            cur.execute("SELECT id, title, artist, duration FROM track_display;")
+            return [tuple(row) for row in cur.fetchall()]
+
+    def _write(sql):
+        with db.cursor() as cur:
+            cur.execute(sql)
+
+    assert await db._atomic_db_op(_display) == [("YT___a", "Alpha", "Band", 1)]
+
+    await db.set_metadata("YT___a", {"new_id": "YT___b", "title_display": "Alpha!"})
+    await db._atomic_write_op(_write, "INSERT INTO artists (artist) VALUES ('Guest');")
+    await db._atomic_write_op(_write, "INSERT INTO title_artists (title_rowid, artist_rowid) SELECT t.rowid, a.rowid FROM titles t, artists a WHERE t.id = 'YT___b' AND a.artist = 'Guest';")
+    await db._atomic_write_op(_write, "UPDATE artists SET artist_display = 'The Band' WHERE artist = 'band';")
+    assert await db._atomic_db_op(_display) == [("YT___b", "Alpha!", "The Band, Guest", 1)]
+    assert (await db.get_metadata("YT___b", artist_delim=";"))["artist"] == "The Band; Guest"
+
+    await db._atomic_write_op(_write, "DELETE FROM artists WHERE artist = 'band';")
+    assert await db._atomic_db_op(_display) == [("YT___b", "Alpha!", "Guest", 1)]
+
+    await db._atomic_write_op(_write, "DELETE FROM titles WHERE id = 'YT___b';")
+    assert await db._atomic_db_op(_display) == []
+
+
+@pytest.mark.asyncio
+async def test_seed_snapshot_restored_only_on_first_boot(tmp_path: Path):
+    snapshot = tmp_path / "snapshot.db"
+    source = AudioDatabase(name="source", filepath=snapshot, seed_snapshot=None)
+    await source.build_from_file()
+    await source.register_track(Track(id="YT___a", title="Alpha", artist="Band", duration=1))
+    source.close()
+
+    first = AudioDatabase(name="first", filepath=tmp_path / "first" / "audio.db", typeahead=False, seed_snapshot=snapshot)
+    assert first.restore_seed_snapshot()
+    await first.build_from_file()
+    assert (await first.get_metadata("YT___a"))["artist"] == "Band"
+    assert not first.restore_seed_snapshot() #file exists now
+    first.close()
+
+    empty = tmp_path / "empty.db"
+    AudioDatabase(name="empty", filepath=empty, seed_snapshot=None).close()
+    assert not AudioDatabase(name="other", filepath=tmp_path / "other.db", seed_snapshot=empty).restore_seed_snapshot()
+
+
+@pytest.mark.asyncio
+async def test_fts_ranking_reaches_past_first_matches_and_is_stable(tmp_path: Path):
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", typeahead=False, search_cache_entries=0)
+    try:
+        await database.build_from_file()
+        for i in range(60):
+            await database.register_track(Track(id=f"YT___{i}", title=f"Song {i}", artist="Band", duration=1))
+        await database.register_download("YT___55")
+        await database.refresh_search_index()
+
+        first = [t["id"] for t in await database.search("song")]
+        assert first[0] == "YT___55" #matched well after the first 30 rows
+        assert first[1:] == [f"YT___{i}" for i in range(29)] #equal scores fall back to insertion order
+        assert [t["id"] for t in await database.search("song")] == first
+    finally:
+        database.close()
+
+
+async def _collect_pages(fetch, limit):
+    items, cursor, totals = [], None, set()
+    while True:
+        result = await fetch(limit, cursor)
+        items.extend(result["content"] if isinstance(result["content"], list) else result["content"]["trackIds"])
+        totals.add(result["total"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return items, totals
+
+
+@pytest.mark.asyncio
+async def test_library_pages_match_unpaginated_order(db: AudioDatabase):
+    for i in range(7):
+        await db.register_track(Track(id=f"YT___{i}", title=f"Song {i}", artist="Band", duration=1))
+        await db.register_download(f"YT___{i}") #same second, the rowid breaks the tie
+        await db.toggle_like(f"YT___{i}")
+    playlist = await db.create_playlist(name="mix", temp_id="tmp")
+    for i in (4, 1, 6, 0):
+        await db.update_track_playlists(f"YT___{i}", [{"id": playlist["id"], "checked": True}])
+
+    downloads, totals = await _collect_pages(db.get_downloads_page, 3)
+    assert downloads == await db.get_downloads_content()
+    assert totals == {7}
+
+    likes, totals = await _collect_pages(db.fetch_liked_page, 2)
+    assert likes == await db.fetch_liked_tracks()
+    assert totals == {7}
+
+    tracks, totals = await _collect_pages(lambda limit, cursor: db.get_playlist_page(playlist["id"], limit, cursor), 3)
+    assert tracks == (await db.get_playlist_content(playlist["id"]))["trackIds"] == ["YT___4", "YT___1", "YT___6", "YT___0"]
+    assert totals == {4}
+
+    #a download landing mid-listing goes on top and doesn't shift the pages after the cursor
+    first = await db.get_downloads_page(3)
+    await db.register_track(Track(id="YT___new", title="New", artist="Band", duration=1))
+    await db.register_download("YT___new")
+    second = await db.get_downloads_page(3, first["next_cursor"])
+    assert [t["id"] for t in first["content"] + second["content"]] == [t["id"] for t in downloads[:6]]
+    assert second["total"] == 8
+
+    with pytest.raises(InvalidCursorError):
+        await db.fetch_liked_page(3, first["next_cursor"])
+    with pytest.raises(InvalidCursorError):
+        await db.get_downloads_page(3, "not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_reorder_matches_list_moves_and_survives_exhausted_gaps(db: AudioDatabase):
+    ids = [f"YT___{i}" for i in range(6)]
+    playlist = await db.create_playlist(name="mix", temp_id="tmp")
+    for id in ids:
+        await db.register_track(Track(id=id, title=id, artist="Band", duration=1))
+        await db.register_download(id)
+        await db.toggle_like(id)
+        await db.update_track_playlists(id, [{"id": playlist["id"], "checked": True}])
+
+    async def _playlist():
+        return (await db.get_playlist_content(playlist["id"]))["trackIds"]
+
+    orders = {}
+    for reorder, fetch in (
+        (db.reorder_likes_track, db.fetch_liked_tracks),
+        (lambda a, b: db.reorder_playlist_track(playlist["id"], a, b), _playlist),
+    ):
+        expected = orders[fetch] = await fetch()
+        for from_index, to_index in [(0, 5), (5, 0), (2, 3), (4, 1), (1, 4), (3, 3)]:
+            assert await reorder(from_index, to_index)
+            expected.insert(to_index, expected.pop(from_index))
+            assert await fetch() == expected
+        assert not await reorder(6, 0)
+        assert not await reorder(0, 6)
+
+        #keeps splitting the gap between the first two until doubles run out
+        for i in range(80):
+            assert await reorder(2 + i % 2, 1)
+            expected.insert(1, expected.pop(2 + i % 2))
+        assert await fetch() == expected
+
+    assert db.position_rebalance_stats()["pending"] == 2
+    await db.flush_position_rebalance()
+    assert db.position_rebalance_stats()["pending"] == 0
+    for fetch, expected in orders.items():
+        assert await fetch() == expected
+
+    def _positions():
+        with db.cursor() as cur:
+            cur.execute("SELECT position FROM likes ORDER BY position;")
+            return [row[0] for row in cur.fetchall()]
+    assert await db._atomic_db_op(_positions) == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("typeahead", [True, False])
+async def test_search_pages_continue_the_same_ranking(tmp_path: Path, typeahead: bool):
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", typeahead=typeahead)
+    try:
+        await database.build_from_file()
+        for i in range(45):
+            await database.register_track(Track(id=f"YT___{i}", title=f"Song {i}", artist="Band", duration=1))
+        await database.register_download("YT___40")
+        await database.refresh_search_index()
+        await database.load_typeahead()
+        await database.load_fuzzy()
+
+        tracks, totals = await _collect_pages(lambda limit, cursor: database.search_page("song", limit, cursor), 20)
+        ids = [t["id"] for t in tracks]
+        assert ids[:30] == [t["id"] for t in await database.search("song")]
+        assert sorted(ids) == sorted(f"YT___{i}" for i in range(45))
+        assert totals == {45}
+
+        #typo correction carries over to the later pages
+        tracks, _ = await _collect_pages(lambda limit, cursor: database.search_page("snog", limit, cursor), 20)
+        assert [t["id"] for t in tracks] == ids
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+async def test_fts_search_total_stops_at_candidate_pool(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(G, "SEARCH_CANDIDATE_POOL", 10)
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", typeahead=False, fuzzy=False)
+    try:
+        await database.build_from_file()
+        for i in range(25):
+            await database.register_track(Track(id=f"YT___{i}", title=f"Song {i}", artist="Band", duration=1))
+        await database.refresh_search_index()
+
+        #the total only promises what paging can reach
+        tracks, totals = await _collect_pages(lambda limit, cursor: database.search_page("song", limit, cursor), 4)
+        assert len(tracks) == 10
+        assert totals == {10}
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+async def test_cursor_with_wrong_key_shape_is_rejected(db: AudioDatabase):
+    from backend.core.database.pagination import encode_cursor
+
+    bad = [
+        (db.get_downloads_page, encode_cursor("downloads", 1)),
+        (db.get_downloads_page, encode_cursor("downloads", None, 1)),
+        (db.get_downloads_page, encode_cursor("downloads", 1, 2, 3)),
+        (db.fetch_liked_page, encode_cursor("likes", [1], 2)),
+        (lambda limit, cursor: db.get_playlist_page(1, limit, cursor), encode_cursor("playlist:1", 1.5, 2)),
+        (lambda limit, cursor: db.search_page(None, limit, cursor), encode_cursor("search", "song", "fts", 1.0)),
+        (lambda limit, cursor: db.search_page(None, limit, cursor), encode_cursor("search", "song", "elsewhere", 1.0, 2)),
+    ]
+    for fetch, cursor in bad:
+        with pytest.raises(InvalidCursorError):
+            await fetch(3, cursor)
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_emit_one_event_each(tmp_path: Path):
+    event_bus = EventBus()
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", event_bus=event_bus, typeahead=False, fuzzy=False)
+    events = []
+    for action in ("update_playlist_tracks", "unlog_downloads", "like_tracks"):
+        event_bus.subscribe(source="test", action=action, handler=lambda e: events.append(e.action))
+    try:
+        await database.build_from_file()
+        ids = [f"YT___{i}" for i in range(6)]
+        for id in ids:
+            await database.register_track(Track(id=id, title=id, artist="Band", duration=1))
+            await database.register_download(id)
+        await database.register_track(Track(id="YT___gone", title="gone", artist="Band", duration=1)) #never downloaded
+        playlist = (await database.create_playlist(name="bulk", temp_id="bulk"))["id"]
+
+        await database.add_tracks_to_playlist(playlist, [ids[0]])
+        content = await database.add_tracks_to_playlist(playlist, [ids[3], ids[1], ids[0], ids[3], "YT___gone", ids[2]])
+        assert content["added"] == [ids[3], ids[1], ids[2]]
+        assert (await database.get_playlist_content(playlist))["trackIds"] == [ids[0], ids[3], ids[1], ids[2]]
+        assert await database.add_tracks_to_playlist(playlist + 1, ids) is None
+
+        content = await database.remove_tracks_from_playlist(playlist, [ids[1], ids[5]])
+        assert content["removed"] == [ids[1]]
+
+        await database.toggle_like(ids[5])
+        assert await database.like_tracks([ids[4], ids[5], ids[2], "YT___gone"]) == [ids[4], ids[2]]
+        assert await database.fetch_liked_tracks() == [ids[4], ids[2], ids[5]]
+
+        assert sorted(await database.unregister_downloads([ids[2], ids[3], "YT___gone"])) == [ids[2], ids[3]]
+        assert (await database.get_playlist_content(playlist))["trackIds"] == [ids[0]]
+        assert await database.fetch_liked_tracks() == [ids[4], ids[5]]
+
+        assert events == ["update_playlist_tracks"] * 3 + ["like_tracks", "unlog_downloads"]
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+async def test_imported_memberships_are_written_together(tmp_path: Path):
+    event_bus = EventBus()
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", event_bus=event_bus, typeahead=False, fuzzy=False)
+    events = []
+    event_bus.subscribe(source="test", action="update_playlist_tracks", handler=lambda e: events.append(e.payload["content"]))
+    event_bus.subscribe(source="test", action="update_playlists", handler=lambda e: events.append(e.payload["content"]))
+    try:
+        await database.build_from_file()
+        ids = [f"YT___{i}" for i in range(5)]
+        for id in ids:
+            await database.register_track(Track(id=id, title=id, artist="Band", duration=1))
+            await database.register_download(id)
+        first = (await database.create_playlist(name="first", temp_id="a"))["id"]
+        second = (await database.create_playlist(name="second", temp_id="b"))["id"]
+
+        #downloads of two imports finishing in any interleaving, nothing is written until the flush
+        for id, playlist in [(ids[2], first), (ids[0], second), (ids[4], first), (ids[1], first), (ids[0], first)]:
+            await database.queue_playlist_updates(id, [{"id": playlist, "checked": True}])
+        assert database.playlist_adds_stats()["pending"] == 5
+        assert (await database.get_playlist_content(first))["trackIds"] == []
+
+        assert await database.flush_playlist_adds() == 5
+        assert (await database.get_playlist_content(first))["trackIds"] == [ids[2], ids[4], ids[1], ids[0]]
+        assert (await database.get_playlist_content(second))["trackIds"] == [ids[0]]
+        assert events == [
+            {"id": first, "added": [ids[2], ids[4], ids[1], ids[0]], "removed": []},
+            {"id": second, "added": [ids[0]], "removed": []},
+        ]
+
+        #the per-track path is set based, one insert and one delete for any number of playlists
+        await database.update_track_playlists(ids[3], [{"id": first, "checked": True}, {"id": second, "checked": True}])
+        await database.update_track_playlists(ids[0], [{"id": first, "checked": False}, {"id": second, "checked": None}])
+        assert (await database.get_playlist_content(first))["trackIds"] == [ids[2], ids[4], ids[1], ids[3]]
+        assert (await database.get_playlist_content(second))["trackIds"] == [ids[0], ids[3]]
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+async def test_artists_resolve_by_normalized_name_and_compaction_merges_legacy_rows(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Alpha", artist="The Band", duration=1))
+    await db.register_track(Track(id="YT___b", title="Beta", artist="the  band!", duration=1))
+
+    def _artists():
+        with db.cursor() as cur:
+            cur.execute("SELECT id, artist, artist_display, pref FROM artists ORDER BY rowid;")
+            return [tuple(row) for row in cur.fetchall()]
+
+    def _display():
+        with db.cursor() as cur:
+            cur.execute("SELECT id, artist FROM track_display ORDER BY id;")
+            return [tuple(row) for row in cur.fetchall()]
+
+    assert await db._atomic_db_op(_artists) == [(None, "the band", "The Band", 0.0)]
+
+    #what older builds left behind, one raw named row per registered track, next to two enriched namesakes
+    def _legacy():
+        with db.cursor() as cur:
+            cur.execute("INSERT INTO artists (id, artist, pref) VALUES ('SP___x', 'the band', 0.2), ('SP___y', 'the band', 0.0);")
+            for title_id, raw, pref in (("YT___c", "The Band", 0.5), ("YT___d", "THE BAND", 0.0)):
+                cur.execute("INSERT INTO titles (id, title) VALUES (?, ?);", (title_id, title_id))
+                cur.execute("INSERT INTO artists (artist, pref) VALUES (?, ?);", (raw, pref))
+                cur.execute("INSERT INTO title_artists (title_rowid, artist_rowid) SELECT t.rowid, last_insert_rowid() FROM titles t WHERE t.id = ?;", (title_id,))
+            #YT___d also credits the surviving artist, the merged link must not duplicate it
+            cur.execute("INSERT INTO title_artists (title_rowid, artist_rowid) SELECT t.rowid, a.rowid FROM titles t, artists a WHERE t.id = 'YT___d' AND a.id = 'SP___x';")
+    await db._atomic_write_op(_legacy)
+
+    assert await db.compact_artists(batch_size=1) == {"renamed": 2, "merged": 3}
+    assert await db._atomic_db_op(_artists) == [("SP___x", "the band", "The Band", 0.5), ("SP___y", "the band", None, 0.0)]
+    assert await db._atomic_db_op(_display) == [(id, "The Band") for id in ("YT___a", "YT___b", "YT___c", "YT___d")]
+    assert not await db.ensure_artist_compaction()
+
+    await db.flush_search_refresh()
+    assert sorted(t["id"] for t in await db.search("band")) == ["YT___a", "YT___b", "YT___c", "YT___d"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("typeahead", [True, False])
+async def test_track_without_artist_is_still_searchable(tmp_path: Path, typeahead: bool):
+    database = AudioDatabase(name="test", filepath=tmp_path / "audio.db", typeahead=typeahead, fuzzy=False)
+    try:
+        await database.build_from_file()
+        await database.register_track(Track(id="YT___a", title="Zyzzyva Anthem", artist="", duration=1))
+        await database.register_track(Track(id="YT___b", title="Zyzzyva Reprise", artist="  ", duration=1))
+        await database.refresh_search_index()
+        await database.load_typeahead()
+
+        #short prefix from the typeahead when it's on, the full title from FTS
+        assert sorted(t["id"] for t in await database.search("zyz")) == ["YT___a", "YT___b"]
+        assert [t["id"] for t in await database.search("zyzzyva anthem")] == ["YT___a"]
+
+        def _artists():
+            with database.cursor() as cur:
+                cur.execute("SELECT artist FROM artists;")
+                return [row[0] for row in cur.fetchall()]
+        assert await database._atomic_db_op(_artists) == [""] #one shared placeholder
+    finally:
+        database.close()
+
+
+@pytest.mark.asyncio
+async def test_db_ops_run_on_own_executor_and_are_timed_per_method(db: AudioDatabase):
+    await db.register_track(Track(id="YT___a", title="Alpha", artist="Band", duration=1))
+    await asyncio.gather(*[db.is_registered("YT___a") for _ in range(20)])
+
+    def _thread_name():
+        return threading.current_thread().name
+    assert (await db._atomic_db_op(_thread_name)).startswith("test-reader")
+
+    with pytest.raises(ZeroDivisionError):
+        await db._atomic_db_op(lambda: 1 / 0)
+
+    stats = db.db_stats()
+    reads, writes = stats["ops"]["read"], stats["ops"]["write"]
+    assert reads["RegisterMixin.is_registered"]["count"] == 20
+    assert reads["RegisterMixin.is_registered"]["run_ms"]["p95"] >= reads["RegisterMixin.is_registered"]["run_ms"]["p50"] > 0
+    assert writes["RegisterMixin.register_track"]["count"] == 1
+    assert sum(op["failed"] for op in reads.values()) == 1
+    assert stats["reads"]["workers"] == 2 and stats["reads"]["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_maintenance_reclaims_pages_and_truncates_wal(db: AudioDatabase):
+    def _fill():
+        with db.cursor() as cur:
+            cur.executemany("INSERT INTO titles (id, title) VALUES (?, ?);", [(f"YT___{i}", "x" * 500) for i in range(2000)])
+    await db._atomic_write_op(_fill)
+    await db.refresh_search_index()
+    def _empty():
+        with db.cursor() as cur:
+            cur.execute("DELETE FROM titles;")
+    await db._atomic_write_op(_empty)
+
+    before = await db.database_metrics()
+    assert before["auto_vacuum"] == 2 and before["freelist_count"] > 0 and before["wal_bytes"] > 0
+
+    run = await db.run_maintenance()
+    assert list(run["steps"]) == ["resolve_prune", "analyze", "fts_merge", "incremental_vacuum", "checkpoint"]
+    assert all("error" not in step and step["ms"] >= 0 for step in run["steps"].values())
+    assert run["steps"]["analyze"]["result"] == "full"
+    assert run["after"]["freelist_count"] == 0 and run["after"]["page_count"] < before["page_count"]
+    assert run["after"]["wal_bytes"] == 0
+    assert db.maintenance_stats()["runs"] == 1
+    assert (await db.run_maintenance(steps=["analyze"]))["steps"]["analyze"]["result"] == "optimize"
+
+
+@pytest.mark.asyncio
+async def test_resolve_cache_matches_normalized_queries_and_expires(db: AudioDatabase):
+    assert await db.get_resolved("Never Gonna Give You Up Rick Astley") == (False, None)
+
+    await db.cache_resolved("Never Gonna Give You Up Rick Astley", "YT___dQw4w9WgXcQ")
+    await db.cache_resolved("nothing matches this", None)
+    assert await db.get_resolved("never gonna give you up, rick astley!") == (True, "YT___dQw4w9WgXcQ")
+    assert await db.get_resolved("Nothing Matches This") == (True, None)
+
+    #a negative entry outlives its shorter ttl before a positive one does
+    def _age(seconds):
+        with db.cursor() as cur:
+            cur.execute("UPDATE resolve_cache SET resolved_at = unixepoch() - ?;", (seconds,))
+    await db._atomic_write_op(_age, G.RESOLVE_CACHE_NEGATIVE_TTL + 1)
+    assert await db.get_resolved("nothing matches this") == (False, None)
+    assert (await db.get_resolved("never gonna give you up rick astley"))[0]
+
+    run = await db.run_maintenance(steps=["resolve_prune"])
+    assert run["steps"]["resolve_prune"]["result"] == 1
+
+    assert await db.forget_resolved("YT___dQw4w9WgXcQ") == 1
+    assert await db.get_resolved("never gonna give you up rick astley") == (False, None)
+    assert db.resolve_cache_stats() == {"hits": 2, "negative_hits": 1, "misses": 3}
+
+
+@pytest.mark.asyncio
+async def test_loudness_gain_is_capped_by_true_peak_and_retargets_in_place(db: AudioDatabase):
+    for id in ("YT___loud", "YT___quiet", "YT___gone"):
+        await db.register_track(Track(id=id, title=id, artist="Band", duration=1))
+        await db.register_download(id)
+
+    await db.set_loudness("YT___loud", {"integrated": -8.0, "true_peak": 0.5, "lra": 4.0})
+    await db.set_loudness("YT___quiet", {"integrated": -24.0, "true_peak": -4.0, "lra": 9.0})
+    await db.set_loudness("YT___gone", {"integrated": -12.0, "true_peak": -1.0})
+
+    assert await db.get_loudness("YT___loud") == {"integrated": -8.0, "true_peak": 0.5, "lra": 4.0, "gain": -8.0, "target": G.LOUDNESS_TARGET}
+    assert (await db.get_loudness("YT___quiet"))["gain"] == G.LOUDNESS_TRUE_PEAK + 4.0 #+8 would clip
+    assert await db.get_loudness("YT___never") is None
+
+    await db.unregister_download("YT___gone")
+    assert await db.get_loudness("YT___gone") is None
+
+    assert await db.retarget_loudness(-20) == 2
+    assert await db.get_loudness("YT___loud") == {"integrated": -8.0, "true_peak": 0.5, "lra": 4.0, "gain": -12.0, "target": -20.0}
+    assert (await db.get_loudness("YT___quiet"))["gain"] == 2.5
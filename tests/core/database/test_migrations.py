@@ -0,0 +1,106 @@
+import pytest
+from pathlib import Path
+
+from backend.core.database import migrations
+from backend.core.database.audio_database import AudioDatabase
+from backend.core.models.track import Track
+from backend.exceptions import SchemaVersionError
+import backend.globals as G
+
+
+def _version(db: AudioDatabase) -> int:
+    with db.cursor() as cur:
+        return migrations.schema_version(cur)
+
+
+@pytest.mark.asyncio
+async def test_fresh_database_is_stamped_and_current_one_is_skipped(tmp_path: Path):
+    db = AudioDatabase(name="test", filepath=tmp_path / "audio.db", seed_snapshot=None)
+    try:
+        assert [m.name for m in await db.build_from_file()] == [m.name for m in migrations.MIGRATIONS]
+        assert await db._atomic_db_op(_version, db) == migrations.LATEST
+        assert await db.build_from_file() == []
+
+        def _from_the_future():
+            with db.cursor() as cur:
+                cur.execute(f"PRAGMA user_version = {migrations.LATEST + 1};")
+        await db._atomic_db_op(_from_the_future)
+        with pytest.raises(SchemaVersionError):
+            await db.build_from_file()
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_baseline_leaves_the_database_untouched(tmp_path: Path, monkeypatch):
+    broken = tmp_path / "schema.sql"
+    broken.write_text(migrations.SCHEMA_PATH.read_text() + "\nSELECT * FROM no_such_table;\n")
+    monkeypatch.setattr(migrations, "SCHEMA_PATH", broken)
+
+    db = AudioDatabase(name="test", filepath=tmp_path / "audio.db", seed_snapshot=None)
+    try:
+        with pytest.raises(Exception, match="no_such_table"):
+            await db.build_from_file()
+
+        def _tables(cur):
+            cur.execute("SELECT name FROM sqlite_master;")
+            return cur.fetchall()
+
+        #every statement before the failure rolled back with it, the next startup starts clean
+        with db.cursor() as cur:
+            assert _tables(cur) == []
+            assert migrations.schema_version(cur) == 0
+
+        monkeypatch.setattr(migrations, "SCHEMA_PATH", migrations.Path(migrations.__file__).parent / "base_schema.sql")
+        assert len(await db.build_from_file()) == len(migrations.MIGRATIONS)
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_steps_apply_in_order(tmp_path: Path, monkeypatch):
+    db = AudioDatabase(name="test", filepath=tmp_path / "audio.db", seed_snapshot=None)
+    try:
+        await db.build_from_file()
+        await db.register_track(Track(id="YT___a", title="Alpha", artist="Band", duration=1))
+
+        ran = []
+        steps = [
+            migrations.Migration(migrations.LATEST + 1, "first", lambda cur: ran.append("first")),
+            migrations.Migration(migrations.LATEST + 2, "second", lambda cur: ran.append("second")),
+        ]
+        monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + steps)
+        monkeypatch.setattr(migrations, "LATEST", migrations.LATEST + 2)
+
+        assert [s["name"] for s in (await db.migration_status())["pending"]] == ["first", "second"]
+        await db.build_from_file()
+        assert ran == ["first", "second"]
+        assert (await db.migration_status())["pending"] == []
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_search_index_rebuilt_only_when_marker_is_stale(tmp_path: Path, monkeypatch):
+    db = AudioDatabase(name="test", filepath=tmp_path / "audio.db", typeahead=False, fuzzy=False, seed_snapshot=None)
+    try:
+        await db.build_from_file()
+        await db.register_track(Track(id="YT___a", title="Alpha", artist="Band", duration=1))
+
+        rebuilds = []
+        rebuild = db.rebuild_search_index
+        async def _counting_rebuild():
+            rebuilds.append(1)
+            await rebuild()
+        monkeypatch.setattr(db, "rebuild_search_index", _counting_rebuild)
+
+        await db.ensure_search_index() #never marked
+        await db.ensure_search_index()
+        assert len(rebuilds) == 1
+        assert [t["id"] for t in await db.search("alpha")] == ["YT___a"]
+
+        monkeypatch.setattr(G, "SEARCH_INDEX_VERSION", G.SEARCH_INDEX_VERSION + 1)
+        await db.ensure_search_index()
+        assert len(rebuilds) == 2
+    finally:
+        db.close()
@@ -0,0 +1,45 @@
+from backend.core.models.track import Track
+from backend.core.search.cache import SearchCache, approx_size
+
+
+def _tracks(n: int, prefix: str = "t"):
+    return [Track(id=f"{prefix}{i}", title=f"title {i}", artist="artist", duration=1) for i in range(n)]
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = SearchCache(max_entries=2)
+    cache.put("a", _tracks(1), cache.generation)
+    cache.put("b", _tracks(1), cache.generation)
+
+    assert cache.get("a") is not None #a is now the most recent
+    cache.put("c", _tracks(1), cache.generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_bounds_the_cache():
+    one = approx_size(tuple(_tracks(10)))
+    cache = SearchCache(max_entries=100, max_bytes=one * 3)
+
+    for key in range(10):
+        cache.put(key, _tracks(10), cache.generation)
+
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_invalidate_drops_entries_and_rejects_results_from_before_it():
+    cache = SearchCache()
+    cache.put("a", _tracks(1), cache.generation)
+
+    generation = cache.generation #a query starts here
+    cache.invalidate() #a write lands while it runs
+    cache.put("b", _tracks(1), generation)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.stats()["stale_puts"] == 1
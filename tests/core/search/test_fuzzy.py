@@ -0,0 +1,34 @@
+from backend.core.search.fuzzy import FuzzyIndex
+
+
+def test_suggests_closest_token_for_typos_and_transpositions():
+    index = FuzzyIndex()
+    index.load(["Halo Beyonce", "Beyond The Sea Bobby Darin", "Die With A Smile Lady Gaga", "Myles Smith"])
+
+    assert index.suggest("beyonec") == "beyonce"
+    assert index.suggest("smyle") == "smile"
+    assert index.suggest("gagga") == "gaga"
+    assert index.suggest("xq") is None #too short to guess
+    assert index.suggest("zzzzzz") is None
+
+
+def test_only_unmatched_tokens_are_rewritten():
+    index = FuzzyIndex()
+    index.load(["Cruel Summer Taylor Swift", "Lover Taylor Swift", "Hey Tyler"])
+
+    assert index.correct("taylor sw") == [] #half typed, nothing to correct
+    rewrites = index.correct("tayler swfit")
+    assert "taylor swift" in rewrites
+    assert all(r.endswith(" swift") for r in rewrites)
+    assert index.correct("cruel qwxzv") == [] #one hopeless token sinks the rewrite
+
+
+def test_add_extends_the_vocabulary():
+    index = FuzzyIndex()
+    index.load(["Halo Beyonce"])
+    assert index.suggest("rosalai") is None
+
+    index.add(["Despecha Rosalia"])
+    assert index.has_prefix("rosal")
+    assert index.suggest("rosalai") == "rosalia"
+    assert index.stats()["tokens"] == 4
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+
+from backend.core.search.scheduler import RefreshScheduler
+
+
+class CountingRefresh:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_burst_of_requests_runs_one_refresh():
+    refresh = CountingRefresh()
+    scheduler = RefreshScheduler(refresh, debounce=0.05)
+
+    for _ in range(20):
+        scheduler.request()
+    await asyncio.sleep(0.15)
+
+    stats = scheduler.stats()
+    assert refresh.calls == 1
+    assert stats["requested"] == 20
+    assert stats["coalesced"] == 19
+    assert stats["executed"] == 1
+    assert not stats["dirty"]
+
+
+@pytest.mark.asyncio
+async def test_flush_skips_the_debounce_and_absorbs_pending_requests():
+    refresh = CountingRefresh()
+    scheduler = RefreshScheduler(refresh, debounce=10)
+
+    scheduler.request()
+    scheduler.request()
+    await scheduler.flush()
+
+    assert refresh.calls == 1 #ran now, not 10s from now
+
+    await asyncio.sleep(0.05)
+    assert refresh.calls == 1 #and the armed timer was dropped
+    scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_request_during_refresh_gets_its_own_refresh():
+    refresh = CountingRefresh(delay=0.1)
+    scheduler = RefreshScheduler(refresh, debounce=0.01)
+
+    scheduler.request()
+    await asyncio.sleep(0.05) #first refresh is running now
+    scheduler.request()
+    await asyncio.sleep(0.3)
+
+    assert refresh.calls == 2
+    assert not scheduler.stats()["dirty"]
@@ -0,0 +1,79 @@
+import random
+
+from backend.core.search.typeahead import TypeaheadIndex, TypeaheadRow
+
+
+def _row(rowid, title, artist, weight=1.0, downloaded=False):
+    return TypeaheadRow(rowid, f"YT___{rowid}", title, artist, 1.0, f"{title} {artist}", weight, downloaded)
+
+
+def _ids(tracks):
+    return [t.id for t in tracks]
+
+
+def test_every_query_token_must_prefix_a_title_or_artist_token():
+    index = TypeaheadIndex()
+    index.load([
+        _row(1, "Die With A Smile", "Lady Gaga"),
+        _row(2, "Bad Romance", "Lady Gaga"),
+        _row(3, "Die For You", "The Weeknd"),
+    ])
+
+    assert set(_ids(index.search("die"))) == {"YT___1", "YT___3"}
+    assert _ids(index.search("die ga")) == ["YT___1"]
+    assert _ids(index.search("lady rom")) == ["YT___2"]
+    assert index.search("dies") == []
+
+
+def test_ranks_by_weight_with_download_boost():
+    index = TypeaheadIndex()
+    index.load([
+        _row(1, "Love Story", "Taylor Swift", weight=1.5),
+        _row(2, "Love Song", "Adele", weight=1.0, downloaded=True),
+        _row(3, "Lovely", "Billie Eilish", weight=1.2),
+    ])
+
+    #downloaded wins over a 10x boost, the rest go by weight
+    assert _ids(index.search("lov")) == ["YT___2", "YT___1", "YT___3"]
+
+    index.set_downloaded("YT___2", False)
+    assert _ids(index.search("lov")) == ["YT___1", "YT___3", "YT___2"]
+
+
+def test_upsert_and_remove_keep_results_current_across_compaction():
+    index = TypeaheadIndex()
+    index.load([_row(i, f"song {i}", "someone") for i in range(8)])
+
+    index.upsert([_row(3, "renamed", "someone")])
+    assert _ids(index.search("renamed")) == ["YT___3"]
+    assert "YT___3" not in _ids(index.search("song"))
+
+    index.remove([0, 1]) #pushes tombstones past a quarter, compacts
+    assert index.stats()["tombstones"] == 0
+    assert set(_ids(index.search("song"))) == {f"YT___{i}" for i in (2, 4, 5, 6, 7)}
+    assert _ids(index.search("renamed")) == ["YT___3"]
+
+
+def test_rank_scan_and_postings_paths_match_brute_force():
+    rng = random.Random(3)
+    words = ["alpha", "alpine", "beta", "bravo", "charlie", "delta", "echo", "sierra", "song", "sun"]
+    rows = [
+        _row(i, " ".join(rng.choices(words, k=2)), rng.choice(words), weight=rng.uniform(1, 2), downloaded=rng.random() < 0.1)
+        for i in range(3000)
+    ]
+    index = TypeaheadIndex()
+    index.load(rows)
+
+    #moved docs have to be found even though they're out of rank order
+    index.set_downloaded("YT___5", True)
+    index.upsert([_row(7, "zulu song", "sun", weight=2.0, downloaded=True)])
+
+    def brute(q):
+        qs = q.split()
+        live = [i for i in range(len(index._rowids)) if index._alive[i]]
+        hits = [i for i in live if all(any(t.startswith(p) for t in index._texts[i].split()) for p in qs)]
+        return [index._ids[i] for i in sorted(hits, key=index._rank, reverse=True)[:30]]
+
+    for q in ["s", "a", "so s", "al b", "zu", "echo delta", "sun z"]:
+        assert _ids(index.search(q)) == brute(q), q
+    assert index.stats()["rank_scans"] > 0
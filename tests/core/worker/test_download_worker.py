@@ -0,0 +1,162 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from backend.core.models.jobs import DownloadJob
+from backend.core.models.track import Track
+from backend.core.worker.download import DownloadWorker
+from backend.core.youtube.client import YouTubeClient
+import backend.globals as G
+
+
+class FakeQueue:
+    def __init__(self):
+        self.jobs = asyncio.Queue()
+
+    async def pop(self):
+        return await self.jobs.get()
+
+
+class FakePlayQueue:
+    def __init__(self):
+        self.ids = []
+
+    async def push(self, id):
+        self.ids.append(id)
+
+    async def insert_next(self, id):
+        self.ids.insert(0, id)
+
+
+class FakeEnrichQueue:
+    async def push(self, job):
+        pass
+
+
+class FakeDownloadIndex:
+    def __init__(self):
+        self.ids = set()
+
+    def has(self, id):
+        return id in self.ids
+
+
+class FakeDatabase:
+    def __init__(self, index):
+        self.index = index
+        self.playlist_updates = []
+
+    async def register_track(self, track):
+        pass
+
+    def request_search_refresh(self):
+        pass
+
+    async def register_download(self, id):
+        self.index.ids.add(id) #the download events keep the real index current
+
+    async def queue_playlist_updates(self, track_id, playlist_updates):
+        self.playlist_updates.append((track_id, playlist_updates))
+
+
+class FakeYouTubeClient:
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = failing
+        self.downloads = []
+
+    async def download_by_id(self, id, custom_metadata=None, background=False):
+        self.downloads.append(id)
+        await asyncio.sleep(self.delays[id])
+        if id in self.failing:
+            return None
+        return Track(id=id, title=id, artist="Band", duration=1)
+
+
+@pytest.mark.asyncio
+async def test_play_queue_follows_pop_order_not_completion_order():
+    ids = [f"YT___{i}" for i in range(5)]
+    #later jobs finish first, and one never downloads
+    delays = {ids[0]: 0.05, ids[1]: 0.0, ids[2]: 0.03, ids[3]: 0.0, ids[4]: 0.01}
+
+    download_queue, play_queue, index = FakeQueue(), FakePlayQueue(), FakeDownloadIndex()
+    worker = DownloadWorker(
+        play_queue=play_queue,
+        download_queue=download_queue,
+        enrich_queue=FakeEnrichQueue(),
+        youtube_client=FakeYouTubeClient(delays, failing={ids[3]}),
+        audio_database=FakeDatabase(index),
+        download_index=index,
+    )
+    worker._slots = asyncio.Semaphore(len(ids)) #all of them in flight at once
+
+    for id in ids:
+        download_queue.jobs.put_nowait(DownloadJob(id=id, queue_last=True))
+
+    task = asyncio.create_task(worker.run())
+    try:
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if worker._queue_next == len(ids):
+                break
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert play_queue.ids == [ids[0], ids[1], ids[2], ids[4]]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_job_waits_for_the_running_download_and_keeps_its_updates():
+    id = "YT___a"
+    first = [{"id": 1, "checked": True}]
+    second = [{"id": 2, "checked": True}]
+
+    download_queue, index = FakeQueue(), FakeDownloadIndex()
+    database, client = FakeDatabase(index), FakeYouTubeClient({id: 0.05})
+    worker = DownloadWorker(
+        play_queue=FakePlayQueue(),
+        download_queue=download_queue,
+        enrich_queue=FakeEnrichQueue(),
+        youtube_client=client,
+        audio_database=database,
+        download_index=index,
+    )
+
+    download_queue.jobs.put_nowait(DownloadJob(id=id, updates=first))
+    download_queue.jobs.put_nowait(DownloadJob(id=id, updates=second))
+
+    task = asyncio.create_task(worker.run())
+    try:
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if len(database.playlist_updates) == 2:
+                break
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert client.downloads == [id]
+    assert database.playlist_updates == [(id, first), (id, second)]
+    assert worker._in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_query_resolution_shares_the_download_slots(tmp_path: Path):
+    client = YouTubeClient(name="test", base_dir=tmp_path)
+    running, peak = 0, 0
+
+    async def _search(q, limit=3, timeout=60):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [Track(id=f"YT___{q}", title=q, artist="Band", duration=1)]
+
+    client.search = _search
+    ids = await asyncio.gather(*(client.id_by_query(str(i)) for i in range(6)))
+
+    assert ids == [f"YT___{i}" for i in range(6)]
+    assert peak == G.DOWNLOAD_CONCURRENCY